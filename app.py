@@ -1,72 +1,145 @@
 import asyncio
-from flask import Flask, request, jsonify, after_this_request
+from flask import Flask, Response, g, request, jsonify, after_this_request, send_file
 from flask_cors import CORS
 from core.config import load_config, Config
 from core.cache import CacheManager
 from core.services.translation_service import TranslationService
 from core.services.audio_service import AudioService
-from core.connectors.anki_connector import AnkiConnector
-from core.helpers import safe_json_loads
-from core.errors import AnkiError, ConfigurationError, TranslationError
-from core.types import Features
-from core.html_generator import generate_goldendict_html, WordData, generate_grammar_check_html
+from core.services.job_service import JobManager, DEFAULT_JOB_FEATURES
+from core.services.vocabulary_store import VocabularyStore
+from core.services.container import ServiceContainer
+from core.connectors.anki_outbox import AnkiOutbox
+from core.helpers import safe_json_loads, split_sentences
+from core.background import gather_with_deadlines
+from core.errors import AIProviderError, AnkiError, CacheError, ConfigurationError, IncompleteResultError, TranslationError
+from core.types import DeadlinesConfig, Features
+from core.html_generator import generate_goldendict_html, WordData, generate_grammar_check_html, compression_dictionary
+from core.memory_cache import CompressedCache
+from core.lookup_context import LookupContext
+from core.cache_snapshot import export_snapshot, import_snapshot
+from core.scheduler import DEFERRED, INTERACTIVE, PriorityScope, configure_schedulers, lower_priority, run_at, scheduler_stats
 from settings.settings import get_settings_handlers
-from prompts.custom_prompt import detect_language
+from core.language import CHINESE, ENGLISH, JAPANESE, KOREAN, LATIN, RUSSIAN, detect_language
+from core.recorder import RequestRecorder
+from core.shared_cache import SharedCache, SharedMapping
+from core.workers import serve
+from core.profiling import ProfileStore, end_trace, span, start_trace
+from core.metrics import DEADLINE_MISSES, IN_FLIGHT, LATE_COMPLETIONS, REGISTRY, REQUEST_SECONDS, STAGE_SECONDS, peer_snapshots, publish_periodically, record_cache, record_error
+from providers.router import RoutingAIProvider
+import io
+import os
 import re
+import time
+from collections import OrderedDict
 from typing import Dict, List, Optional, Tuple
 
 app = Flask(__name__)
 CORS(app, resources={
     r"/add_note_to_anki": {"origins": "ifr://localhost"},
+    r"/add_notes_to_anki": {"origins": "ifr://localhost"},
+    r"/anki_outbox": {"origins": "ifr://localhost"},
+    r"/usage": {"origins": "ifr://localhost"},
+    r"/metrics": {"origins": "ifr://localhost"},
+    r"/routing": {"origins": "ifr://localhost"},
+    r"/cache*": {"origins": "ifr://localhost"},
+    r"/scheduler": {"origins": "ifr://localhost"},
+    r"/profiles*": {"origins": "ifr://localhost"},
     r"/": {"origins": "ifr://localhost"},
     r"/update_settings": {"origins": "ifr://localhost"},
     r"/get_settings": {"origins": "ifr://localhost"},
     r"/refresh": {"origins": "ifr://localhost"},
-    r"/grammar_check": {"origins": "ifr://localhost"}
+    r"/word_audio": {"origins": "ifr://localhost"},
+    r"/grammar_check": {"origins": "ifr://localhost"},
+    r"/jobs*": {"origins": "ifr://localhost"},
+    r"/vocabulary/*": {"origins": "ifr://localhost"}
 })
 
 # --- Constants ---
-MAX_TRANSLATION_CACHE_SIZE = 10000
+MAX_CACHED_TEXT_LENGTH = 10000  # Longer lookups are not cached
+MAX_SHARED_PAGE_ENTRIES = 10000  # Page limit of the shared cache in multi-worker mode
+MAX_CONTEXT_TERM_WORDS = 5  # Longer lookups are never answered from the lookup context
 GRAMMAR_CHECK_PREFIX="~"
+RECORDED_ENDPOINTS = ("process_request", "refresh_translation")
+
+# --- Multi-Worker State (see init_worker) ---
+shared_cache: Optional[SharedCache] = None
+config_seen: Optional[str] = None  # Last settings fingerprint published in the shared cache
+config_checked_at = 0.0
+lookup_context: Optional[LookupContext] = None  # Recently analyzed sentences, when enabled
+metrics_store: Optional[SharedMapping] = None  # Each worker's latest metrics snapshot, keyed by worker number
+worker_key = "0"
 # --- Helper Functions ---
 
-async def fetch_ai_data(text: str, features: Features, translation_service: TranslationService, audio_service: Optional[AudioService]) -> Tuple:
-    """Fetches data from AI providers based on enabled features."""
-    tasks = []
+async def fetch_ai_data(text: str, features: Features, translation_service: TranslationService, audio_service: Optional[AudioService], force_refresh: bool = False) -> Tuple:
+    """Fetches data from AI providers based on enabled features, waiting for each only until its deadline.
+
+    The last two elements list the features that missed their deadline, which keep running in the
+    background so their results land in the result cache for the next lookup, and the features that
+    failed in whole or for some sentences, which are rendered with whatever did succeed.
+    """
+    tasks = {}
     if features.translation_enabled:
-        tasks.append(translation_service.get_translation_data(text))
+        tasks["translation"] = translation_service.get_translation_data(text, force_refresh)
     if features.analysis_enabled:
-        tasks.append(translation_service.get_analysis_data(text))
+        tasks["analysis"] = translation_service.get_analysis_data(text, force_refresh)
     if features.tts_enabled and audio_service:
-        tasks.append(audio_service.generate_audio(text))
+        tasks["tts"] = audio_service.generate_audio(text)
     if features.grammar_check_enabled:
-        tasks.append(translation_service.get_grammar_check_data(text))
-
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks["grammar_check"] = translation_service.get_grammar_check_data(text, force_refresh)
+    # One priority per feature, so a feature that misses its deadline can drop behind other lookups
+    scopes = {feature: PriorityScope(INTERACTIVE) for feature in tasks}
+    tasks = {feature: run_at(scopes[feature], coroutine) for feature, coroutine in tasks.items()}
+
+    with span("fetch_ai_data", tasks=len(tasks)):
+        results, missed = await gather_with_deadlines(tasks, feature_deadlines(config.deadlines), on_late=record_late_completion)
+    for feature in missed:
+        print(f"Deadline missed for {feature}; rendering without it")
+        DEADLINE_MISSES.inc(feature)
+        lower_priority(scopes[feature], DEFERRED)
 
     translation_data, translation_time = {}, 0
     analysis_data, analysis_time = {}, 0
     audio_file_path, audio_time = "", 0
     grammar_check_data, grammar_check_time = {}, 0
 
-    for result in results:
-        if isinstance(result, Exception):
+    failed = []
+    for feature, result in results.items():
+        if isinstance(result, IncompleteResultError):
+            print(f"Incomplete {feature} ({result}); rendering the rest")
+            failed.append(feature)
+            result = (result.data, result.elapsed)
+        elif isinstance(result, Exception):
             print(f"Error during AI data fetching: {result}")
-            # Handle the error appropriately, e.g., log it, retry, or set default values
+            record_error("fetch", result)
+            failed.append(feature)
             continue  # Skip to the next result
 
-        if isinstance(result, tuple) and len(result) == 2:
-            if isinstance(result[0], dict):
-                if "Translation" in result[0]:
-                    translation_data, translation_time = result
-                elif "Words" in result[0]:
-                    analysis_data, analysis_time = result
-                elif "CorrectedSentence" in result[0]:
-                    grammar_check_data, grammar_check_time = result
-            elif isinstance(result[0], str) and isinstance(result[1], float):
-                audio_file_path, audio_time = result
-
-    return translation_data, translation_time, analysis_data, analysis_time, audio_file_path, audio_time, grammar_check_data, grammar_check_time
+        if feature == "translation":
+            translation_data, translation_time = result
+        elif feature == "analysis":
+            analysis_data, analysis_time = result
+        elif feature == "tts":
+            audio_file_path, audio_time = result
+        elif feature == "grammar_check":
+            grammar_check_data, grammar_check_time = result
+
+    return translation_data, translation_time, analysis_data, analysis_time, audio_file_path, audio_time, grammar_check_data, grammar_check_time, missed, failed
+
+def feature_deadlines(deadlines: DeadlinesConfig) -> Dict[str, float]:
+    """Converts the configured deadlines to seconds per feature, each capped by the overall budget."""
+    budget = deadlines.budget_ms / 1000 if deadlines.budget_ms > 0 else float("inf")
+    result = {}
+    for feature in ("translation", "analysis", "tts", "grammar_check"):
+        deadline_ms = getattr(deadlines, f"{feature}_ms")
+        result[feature] = min(deadline_ms / 1000 if deadline_ms > 0 else float("inf"), budget)
+    return result
+
+def record_late_completion(feature: str, future):
+    """Counts how a feature that missed its deadline finished in the background."""
+    if future.cancelled() or future.exception() is not None:
+        LATE_COMPLETIONS.inc(feature, "error")
+    else:
+        LATE_COMPLETIONS.inc(feature, "ok")
 
 def process_ai_results(translation_data: Dict, analysis_data: Dict, grammar_check_data: Dict, features: Features) -> Tuple[str, List[WordData]]:
     """Processes the results from the AI providers."""
@@ -82,6 +155,7 @@ def process_ai_results(translation_data: Dict, analysis_data: Dict, grammar_chec
 
 def merge_translation_and_analysis_data(translation_data: Dict, analysis_data: Dict, translation_enabled: bool, analysis_enabled: bool) -> Dict:
     """Merges translation and analysis data, removing duplicates if necessary."""
+    translation_data = dict(translation_data)  # The result cache holds the original; it must stay plain JSON
     if analysis_enabled:
         analysis_words = prepare_word_data(analysis_data)
         if translation_enabled:
@@ -101,6 +175,29 @@ def prepare_word_data(analysis_data: Dict) -> List[WordData]:
     """Prepares WordData objects from analysis data."""
     return [WordData(word=word_data["word"], definition=word_data["definition"]) for word_data in analysis_data.get("Words", [])]
 
+def sentence_of(word: str, sentences: List[str]) -> Optional[str]:
+    """Returns the first sentence containing the word as a whole word, or failing that (e.g. CJK text) as a substring."""
+    pattern = re.compile(rf"(?<!\w){re.escape(word)}(?!\w)", flags=re.IGNORECASE)
+    lowered = word.lower()
+    return (next((sentence for sentence in sentences if pattern.search(sentence)), None)
+            or next((sentence for sentence in sentences if lowered in sentence.lower()), None))
+
+def record_vocabulary(text: str, words: List[WordData], translation: str, translation_service: TranslationService):
+    """Counts a lookup of the analyzed words, each stored with the sentence of `text` it occurs in and that sentence's translation."""
+    if vocabulary_store is None or not words:
+        return
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        vocabulary_store.record(words, text, translation)
+        return
+    by_sentence: Dict[str, List[WordData]] = {}
+    for word_data in words:
+        by_sentence.setdefault(sentence_of(word_data.word, sentences) or text, []).append(word_data)
+    for sentence, sentence_words in by_sentence.items():
+        # Each sentence was translated on its own, so its translation is in the result cache
+        sentence_translation = translation if sentence == text else translation_service.cached_data("translation", sentence).get("Translation", "")
+        vocabulary_store.record(sentence_words, sentence, sentence_translation)
+
 def compile_word_pattern(words: List[WordData]) -> Optional[re.Pattern]:
     """Compiles a regex pattern for word highlighting."""
     if words:
@@ -109,11 +206,100 @@ def compile_word_pattern(words: List[WordData]) -> Optional[re.Pattern]:
 
 # --- Request Handling ---
 
+@app.before_request
+def start_request_metrics():
+    g.metrics_endpoint = request.endpoint or "unknown"
+    g.metrics_start = time.perf_counter()
+    IN_FLIGHT.inc(g.metrics_endpoint)
+
+@app.before_request
+def sync_config():
+    """In multi-worker mode, reloads settings that another worker saved, at most once per check interval."""
+    global config_seen, config_checked_at
+    if shared_cache is None or time.monotonic() - config_checked_at < config.workers.config_check_interval_ms / 1000:
+        return
+    config_checked_at = time.monotonic()
+    fingerprint = shared_cache.get_meta("config_fingerprint")
+    # Compared with the last published value, so a worker whose file state differs does not reload on every check
+    if fingerprint is None or fingerprint == config_seen:
+        return
+    config_seen = fingerprint
+    if fingerprint != config.snapshot.fingerprint:
+        previous_settings = config.as_dict()
+        config.refresh()
+        services = service_container.reload(previous_settings)
+        job_manager.translation_service = services.translation_service
+        configure_schedulers(config.scheduler)
+
+@app.before_request
+def acquire_services():
+    # Keeps services replaced by a settings change open until this request is done with them
+    g.services = service_container.acquire()
+
+@app.before_request
+def start_profiling():
+    """Traces lookups when profiling is enabled; `?profile=1` (or the X-Profile header) keeps the trace, `profile=cpu` also samples stacks."""
+    profiling = config.profiling
+    if not profiling.enabled or request.endpoint not in RECORDED_ENDPOINTS:
+        return
+    requested = request.args.get('profile') or request.headers.get('X-Profile')
+    sample_interval = profiling.sample_interval_ms / 1000 if requested == 'cpu' else 0
+    g.trace, g.trace_token = start_trace(request.path, {'text': request.args.get('text', '')}, sample_interval)
+    g.trace_requested = bool(requested)
+
+def finish_profiling(response=None):
+    trace = g.pop('trace', None)
+    if trace is None:
+        return
+    end_trace(trace, g.pop('trace_token'))
+    if g.get('trace_requested') or trace.duration * 1000 >= config.profiling.slow_threshold_ms or response is None:
+        profile_store.add(trace)
+        if response is not None:
+            response.headers['X-Profile-Id'] = trace.trace_id
+
+@app.teardown_request
+def release_services(error=None):
+    services = g.pop("services", None)
+    if services is not None:
+        service_container.release(services)
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    if "metrics_start" not in g:
+        return
+    IN_FLIGHT.dec(g.metrics_endpoint)
+    REQUEST_SECONDS.observe(time.perf_counter() - g.metrics_start, g.metrics_endpoint)
+    if error is not None:
+        record_error("request", error)
+    # Only still open when the view raised; failed requests are always kept
+    finish_profiling()
+
 @app.after_request
 def add_permissions_policy(response):
     response.headers['Permissions-Policy'] = 'clipboard-write=(self)'
     return response
 
+@app.after_request
+def record_lookup(response):
+    """Marks HTML cache outcomes with X-Cache and appends lookups to the recording, if enabled."""
+    if request.endpoint not in RECORDED_ENDPOINTS:
+        return response
+    finish_profiling(response)
+    cache_outcome = g.get("lookup_cache", "none")
+    response.headers['X-Cache'] = cache_outcome.upper()
+    if request_recorder is not None:
+        request_recorder.record({
+            "ts": time.time(),
+            "endpoint": request.path,
+            "text": request.args.get('text', ''),
+            "features": g.get("lookup_features"),
+            "status": response.status_code,
+            "duration": round(time.perf_counter() - g.metrics_start, 4),
+            "cache": cache_outcome,
+            "missed": g.get("lookup_missed", []),
+        })
+    return response
+
 @app.route('/add_note_to_anki', methods=['POST'])
 async def add_note_to_anki():
     data = request.get_json()
@@ -128,55 +314,173 @@ async def add_note_to_anki():
     if not word or not definition:
         raise AnkiError('Missing word or definition')
 
+    anki_connector = service_container.current.anki_connector
+    if anki_connector.note_index.contains(word) or anki_outbox.is_pending(word):
+        return jsonify({'error': f"'{word}' is already in deck '{anki_connector.deck_name}'"}), 409
+
+    outbox_id = anki_outbox.enqueue(word, anki_connector.build_note(word, definition, context, context_translation))
+    return jsonify({'result': f"'{word}' queued for Anki", 'outboxId': outbox_id}), 202
+
+@app.route('/add_notes_to_anki', methods=['POST'])
+def add_notes_to_anki():
+    """Queues several notes for one AnkiConnect round trip; expects {"notes": [{word, definition, context, contextTranslation}, ...]}."""
+    data = request.get_json()
+    if not data or not data.get('notes'):
+        raise AnkiError('No notes provided')
+
+    anki_connector = service_container.current.anki_connector
+    notes = []
+    for note in data['notes']:
+        if not note.get('word') or not note.get('definition'):
+            raise AnkiError('Missing word or definition')
+        notes.append((note['word'], anki_connector.build_note(note['word'], note['definition'], note.get('context'), note.get('contextTranslation'))))
+
+    outbox_ids = anki_outbox.enqueue_many(notes)
+    return jsonify({'result': f'{len(notes)} notes queued for Anki', 'outboxIds': outbox_ids}), 202
+
+@app.route('/anki_outbox', methods=['GET'])
+def get_anki_outbox():
+    """Reports the Anki outbox queue depth and delivery latency."""
+    return jsonify(anki_outbox.stats())
+
+@app.route('/usage', methods=['GET'])
+def get_usage():
+    """Reports provider token usage, including prompt tokens served from provider-side caches."""
+    return jsonify(service_container.current.translation_service.usage_stats())
+
+@app.route('/routing', methods=['GET'])
+def get_routing():
+    """Reports per-route call counts, fallbacks and latency percentiles when routing is enabled."""
+    ai_provider = service_container.current.translation_service.ai_provider
+    if not isinstance(ai_provider, RoutingAIProvider):
+        return jsonify({"enabled": False, "provider": ai_provider.provider_name})
+    return jsonify({"enabled": True, "preferFastest": config.routing.prefer_fastest, "routes": ai_provider.route_stats()})
+
+@app.route('/cache', methods=['GET'])
+def get_cache():
+    """Reports the page cache's entries and resident size; in multi-worker mode pages live in the shared cache."""
+    if isinstance(translation_cache, CompressedCache):
+        return jsonify({"shared": False, **translation_cache.stats()})
+    return jsonify({"shared": True, "entries": len(translation_cache), "maxEntries": MAX_SHARED_PAGE_ENTRIES})
+
+@app.route('/cache/snapshot', methods=['GET'])
+def export_cache_snapshot():
+    """Downloads the cached provider results and word audio as a snapshot another install can import."""
+    services = service_container.current
+    snapshot = io.BytesIO()
+    export_snapshot(snapshot, services.translation_service, services.audio_service)
+    snapshot.seek(0)
+    return send_file(snapshot, mimetype='application/zip', as_attachment=True,
+                     download_name=f"linguaboost-cache-{time.strftime('%Y%m%d-%H%M%S')}.lbcache")
+
+@app.route('/cache/snapshot', methods=['POST'])
+def import_cache_snapshot():
+    """Merges an uploaded snapshot (the request body) into the caches and reports what was imported or skipped."""
+    services = service_container.current
     try:
-        anki_response = anki_connector.add_note_to_anki(word, definition, context, context_translation)
-        return jsonify({'result': 'Note added successfully', 'noteId': anki_response})
-    except Exception as e:
-        raise AnkiError(f"Failed to add note to Anki: {e}")
+        counts = import_snapshot(io.BytesIO(request.get_data()), services.translation_service, services.audio_service)
+    except CacheError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(counts)
+
+@app.route('/scheduler', methods=['GET'])
+def get_scheduler():
+    """Reports slots, running calls and queue waits per priority class for provider, TTS and AnkiConnect calls."""
+    return jsonify(scheduler_stats())
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Exports pipeline metrics in the Prometheus text format; in multi-worker mode, summed over the workers."""
+    others = peer_snapshots(metrics_store, worker_key) if metrics_store is not None else ()
+    return Response(REGISTRY.render(others), mimetype='text/plain; version=0.0.4')
+
+@app.route('/profiles', methods=['GET'])
+def list_profiles():
+    """Lists retained traces: requested ones and the most recent slow lookups."""
+    return jsonify(profile_store.summaries())
+
+@app.route('/profiles/<trace_id>', methods=['GET'])
+def get_profile(trace_id: str):
+    """Downloads a retained trace as Chrome trace JSON (default) or speedscope JSON (`?format=speedscope`)."""
+    export_format = request.args.get('format', 'chrome')
+    if export_format not in ('chrome', 'speedscope'):
+        return jsonify({'error': f'Unknown format: {export_format}'}), 400
+    body = profile_store.get(trace_id, export_format)
+    if body is None:
+        return jsonify({'error': f'Unknown profile: {trace_id}'}), 404
+    response = jsonify(body)
+    response.headers['Content-Disposition'] = f'attachment; filename=profile-{trace_id}.{export_format}.json'
+    return response
 
-async def translate_and_format_async(text: str, features: Features, config: Config, translation_service: TranslationService, audio_service: Optional[AudioService]) -> str:
-    """Translates the text, analyzes it, generates audio, and formats the output as HTML."""
+async def translate_and_format_async(text: str, features: Features, config: Config, translation_service: TranslationService, audio_service: Optional[AudioService], force_refresh: bool = False) -> Tuple[str, List[str], List[str]]:
+    """Translates the text, analyzes it, generates audio, and formats the output as HTML; also returns the features that missed their deadline and those that failed."""
 
-    translation_data, translation_time, analysis_data, analysis_time, audio_file_path, audio_time, grammar_check_data, grammar_check_time = await fetch_ai_data(
-        text, features, translation_service, audio_service
+    translation_data, translation_time, analysis_data, analysis_time, audio_file_path, audio_time, grammar_check_data, grammar_check_time, missed, failed = await fetch_ai_data(
+        text, features, translation_service, audio_service, force_refresh
     )
 
-    translation, words = process_ai_results(translation_data, analysis_data, grammar_check_data, features)
-    word_pattern = compile_word_pattern(words)
+    with span("process_results"):
+        translation, words = process_ai_results(translation_data, analysis_data, grammar_check_data, features)
+        word_pattern = compile_word_pattern(words)
+    with span("anki_known_terms"):
+        note_index = service_container.current.anki_connector.note_index
+        note_index.sync_if_stale()
+        known_terms = note_index.known_terms(word_data.word for word_data in words)
+    record_vocabulary(text, words, translation, translation_service)
+    if lookup_context is not None and words:
+        lookup_context.remember(text, words, translation)
 
     # Pass grammar_check_data to generate_goldendict_html
-    html_output = generate_goldendict_html(
-        text,
-        words,
-        translation,
-        config,
-        audio_file_path,
-        translation_time,
-        analysis_time,
-        audio_time,
-        word_pattern,
-        grammar_check_data,  # Pass grammar_check_data
-        grammar_check_time
-    )
-    return html_output
+    with span("render"), STAGE_SECONDS.time("render", "lookup", "html"):
+        html_output = generate_goldendict_html(
+            text,
+            words,
+            translation,
+            config,
+            audio_file_path,
+            translation_time,
+            analysis_time,
+            audio_time,
+            word_pattern,
+            grammar_check_data,  # Pass grammar_check_data
+            grammar_check_time,
+            known_terms
+        )
+    # Same condition as WORD_AUDIO_ENABLED in the page: without autoplay hovering plays nothing
+    if features.tts_enabled and config.snapshot.audio.autoplay and audio_service is not None and words:
+        # Synthesized in the background so hovering a highlighted word can play it instantly
+        audio_service.prefetch(word_data.word for word_data in words)
+    return html_output, missed, failed
 
 async def process_text(text_to_translate: str, features: Features, config: Config, translation_service: TranslationService, audio_service: Optional[AudioService], force_refresh: bool = False) -> str:
     """Processes the text, utilizing caching and handling language-specific logic."""
-    cache_key = f"{text_to_translate}-{features.translation_enabled}-{features.tts_enabled}-{features.analysis_enabled}-{features.grammar_check_enabled}"
-
-    if not force_refresh and cache_key in translation_cache and len(text_to_translate) < MAX_TRANSLATION_CACHE_SIZE:
-        print(f"Cache hit for: {cache_key}")
-        return translation_cache[cache_key]
+    g.lookup_features = features._asdict()
+    cache_key = f"{text_to_translate}-{features.translation_enabled}-{features.tts_enabled}-{features.analysis_enabled}-{features.grammar_check_enabled}-{config.snapshot.fingerprint}"
+
+    # One read: the page can be evicted (or trimmed by another worker) between a membership test and the lookup
+    cached_html = translation_cache.get(cache_key) if not force_refresh and len(text_to_translate) < MAX_CACHED_TEXT_LENGTH else None
+    if cached_html is not None:
+        record_cache("html", True)
+        g.lookup_cache = "hit"
+        if lookup_context is not None:
+            lookup_context.touch(text_to_translate)
+        if vocabulary_store is not None and features.analysis_enabled:
+            # A repeat lookup counts too; the words come from the analysis the page was rendered from
+            translation_data = translation_service.cached_data("translation", text_to_translate) if features.translation_enabled else {}
+            translation, words = process_ai_results(translation_data, translation_service.cached_data("analysis", text_to_translate), {}, features)
+            record_vocabulary(text_to_translate, words, translation, translation_service)
+        return cached_html
     else:
-        print(f"Cache miss for: {cache_key}")
+        record_cache("html", False)
+        g.lookup_cache = "miss"
 
-        if len(translation_cache) >= MAX_TRANSLATION_CACHE_SIZE:
-            oldest_key = next(iter(translation_cache))
-            translation_cache.pop(oldest_key)
+        html_output, missed, failed = await translate_and_format_async(text_to_translate, features, config, translation_service, audio_service, force_refresh)
+        g.lookup_missed = missed
 
-        html_output = await translate_and_format_async(text_to_translate, features, config, translation_service, audio_service)
-
-        if len(text_to_translate) < MAX_TRANSLATION_CACHE_SIZE:
+        # A partial page is not cached; the late features fill the result cache for the next lookup instead,
+        # and the next lookup asks again for the sentences that failed (the others are served from the result cache)
+        # The cache evicts its least recently used pages itself once over its budget
+        if len(text_to_translate) < MAX_CACHED_TEXT_LENGTH and not missed and not failed:
             translation_cache[cache_key] = html_output
 
         return html_output
@@ -228,6 +532,23 @@ async def process_text(text_to_translate: str, features: Features, config: Confi
 #     return html_output
 
 
+def answer_from_context(text: str, config: Config, translation_service: TranslationService) -> Optional[str]:
+    """Renders a word or short phrase from a recently analyzed sentence containing it, without a provider call."""
+    if lookup_context is None or len(text.split()) > MAX_CONTEXT_TERM_WORDS:
+        return None
+    with span("lookup_context"), STAGE_SECONDS.time("lookup_context", "analysis", "local"):
+        match = lookup_context.lookup(text)
+    record_cache("lookup_context", match is not None)
+    if match is None:
+        return None
+    g.lookup_cache = "context"
+    words = [WordData(match.term, match.definition)]
+    record_vocabulary(match.sentence, words, match.translation, translation_service)
+    known_terms = service_container.current.anki_connector.note_index.known_terms([match.term])
+    with span("render"), STAGE_SECONDS.time("render", "lookup_context", "html"):
+        return generate_goldendict_html(match.sentence, words, match.translation, config, compiled_pattern=compile_word_pattern(words),
+                                        known_terms=known_terms, context_term=match.term, context_definition=match.definition)
+
 async def handle_translation_request(text_to_translate: str, config: Config, translation_service: TranslationService, audio_service: Optional[AudioService]) -> str:
     """Handles translation requests."""
     features = Features(
@@ -236,14 +557,17 @@ async def handle_translation_request(text_to_translate: str, config: Config, tra
         analysis_enabled=config.get_setting('analysisEnabled', True),
         grammar_check_enabled=False
     )
+    context_html = answer_from_context(text_to_translate, config, translation_service)
+    if context_html is not None:
+        return context_html
     detected_language = detect_language(text_to_translate)
-    if detected_language == "English":
+    if detected_language in (ENGLISH, LATIN, RUSSIAN):
         if len(text_to_translate.split()) >= 2:
             result = await process_text(text_to_translate, features, config, translation_service, audio_service)
             return result
         else:
             return ""
-    elif detected_language == "Chinese":
+    elif detected_language in (CHINESE, JAPANESE, KOREAN):
         result = await process_text(text_to_translate, features, config, translation_service, audio_service)
         return result
     else:
@@ -257,31 +581,35 @@ async def handle_grammar_check_request(text_to_check: str, config: Config, trans
         analysis_enabled=False,
         grammar_check_enabled=True
     )
+    g.lookup_features = features._asdict()
     try:
-        _, _, _, _, _, _, grammar_check_data, grammar_check_time = await fetch_ai_data(
+        _, _, _, _, _, _, grammar_check_data, grammar_check_time, g.lookup_missed, _ = await fetch_ai_data(
             text_to_check, features, translation_service, audio_service
         )
-        html_output = generate_grammar_check_html(text_to_check, config, grammar_check_data, grammar_check_time)
+        with span("render"), STAGE_SECONDS.time("render", "grammar_check", "html"):
+            html_output = generate_grammar_check_html(text_to_check, config, grammar_check_data, grammar_check_time)
         return html_output
     except Exception as e:
         print(f"Error during grammar check: {e}")
+        record_error("grammar_check", e)
         return f"Error during grammar check: {e}", 500
 
 @app.route('/', methods=['GET'])
 async def process_request():
     text_to_translate = request.args.get('text', '')
-    print("kankan" ,text_to_translate)
+    services = service_container.current
     # Check for grammar check prefix using startswith
     if text_to_translate.startswith(GRAMMAR_CHECK_PREFIX):
         # Remove the prefix and any leading spaces for grammar check
         text_to_check = text_to_translate[len(GRAMMAR_CHECK_PREFIX):].lstrip()
-        return await handle_grammar_check_request(text_to_check, config, translation_service, audio_service)
+        return await handle_grammar_check_request(text_to_check, config, services.translation_service, services.audio_service)
     else:
-        return await handle_translation_request(text_to_translate, config, translation_service, audio_service)
+        return await handle_translation_request(text_to_translate, config, services.translation_service, services.audio_service)
 
 
 @app.route('/get_settings', methods=['GET'])
 def get_settings():
+    provider_config = config.get_provider_config(config.selected_provider)
     settings = {
         'translationEnabled': config.get_setting('translationEnabled', True),
         'ttsEnabled': config.get_setting('ttsEnabled', True),
@@ -289,9 +617,9 @@ def get_settings():
         'grammarCheckEnabled': config.get_setting('grammarCheckEnabled', False),
         'autoplayEnabled': config.audio.autoplay,
         'selectedProvider': config.get_ai_provider_name(),
-        'apiKey': config.get_provider_config(config.selected_provider).api_key,
-        'baseUrl': config.get_provider_config(config.selected_provider).base_url,
-        'model': config.get_provider_config(config.selected_provider).model,
+        'apiKey': provider_config.api_key,
+        'baseUrl': provider_config.base_url,
+        'model': provider_config.model,
     }
     return jsonify(settings)
 
@@ -302,23 +630,34 @@ def update_settings():
     if not data:
         raise ConfigurationError('No data provided')
 
+    previous_settings = config.as_dict()
     for handler in settings_handlers:
         if handler.key in data:
             handler.handler(config, handler.key, data[handler.key])
 
     config.save_settings(config_path)
     config_changed = True
-    # Refresh services and config if necessary
+    # Refresh config and rebuild only the services whose settings changed
     config.refresh()
-    translation_service = TranslationService(config)
-    global audio_service
-    audio_service = AudioService(config) if config.get_setting('ttsEnabled', True) else None
-    # Update global variables
-    global anki_connector, cache_manager
-    cache_manager = CacheManager()
-    anki_connector = AnkiConnector(config, cache_manager)
+    services = service_container.reload(previous_settings)
+    job_manager.translation_service = services.translation_service
+    configure_schedulers(config.scheduler)
+    publish_config()
     return jsonify({'message': 'Settings updated successfully'})
 
+@app.route('/word_audio', methods=['GET'])
+async def get_word_audio():
+    """Serves the pronunciation of a single word, usually already prefetched."""
+    word = request.args.get('text', '').strip()
+    audio_service = service_container.current.audio_service
+    if not word or audio_service is None:
+        return jsonify({'error': 'Word audio is not available'}), 404
+    try:
+        audio_file_path = await audio_service.get_word_audio(word)
+    except AIProviderError as e:
+        return jsonify({'error': str(e)}), 502
+    return send_file(audio_file_path, mimetype='audio/mpeg', max_age=86400)
+
 @app.route('/refresh', methods=['GET'])
 async def refresh_translation():
     text_to_translate = request.args.get('text', '')
@@ -329,23 +668,169 @@ async def refresh_translation():
         grammar_check_enabled=config.get_setting('grammarCheckEnabled', False)
     )
     if text_to_translate:
-        result = await process_text(text_to_translate, features, config, translation_service, audio_service, force_refresh=True)
+        services = service_container.current
+        result = await process_text(text_to_translate, features, config, services.translation_service, services.audio_service, force_refresh=True)
         return result
     else:
         return "Please provide text to translate via the 'text' query parameter."
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Submits a document as an offline job, either as JSON {"text", "features"} or as an uploaded "document" file."""
+    if 'document' in request.files:
+        text = request.files['document'].read().decode('utf-8')
+        features = request.form.get('features', ','.join(DEFAULT_JOB_FEATURES)).split(',')
+    else:
+        data = request.get_json(silent=True) or {}
+        text = data.get('text', '')
+        features = data.get('features', list(DEFAULT_JOB_FEATURES))
+    try:
+        job = job_manager.submit(text, [feature.strip() for feature in features])
+    except TranslationError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(job.progress()), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    try:
+        return jsonify(job_manager.get(job_id).progress())
+    except TranslationError as e:
+        return jsonify({'error': str(e)}), 404
+
+@app.route('/jobs/<job_id>/<action>', methods=['POST'])
+def control_job(job_id: str, action: str):
+    if action not in ('pause', 'resume'):
+        return jsonify({'error': f'Unknown action: {action}'}), 400
+    try:
+        job = job_manager.pause(job_id) if action == 'pause' else job_manager.resume(job_id)
+    except TranslationError as e:
+        return jsonify({'error': str(e)}), 404
+    return jsonify(job.progress())
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def get_job_results(job_id: str):
+    try:
+        job = job_manager.get(job_id)
+    except TranslationError as e:
+        return jsonify({'error': str(e)}), 404
+    if not os.path.exists(job.output_path):
+        return jsonify({'error': 'No results yet'}), 404
+    return send_file(job.output_path, mimetype='application/x-ndjson', as_attachment=True)
+
+def _vocabulary_unavailable():
+    return jsonify({'error': 'Vocabulary history is disabled'}), 404
+
+@app.route('/vocabulary/top', methods=['GET'])
+def get_top_vocabulary():
+    """Most looked-up words, e.g. /vocabulary/top?days=30&limit=20&offset=0&unknown=true."""
+    if vocabulary_store is None:
+        return _vocabulary_unavailable()
+    days = request.args.get('days', type=float)
+    since = time.time() - days * 86400 if days else None
+    note_index = service_container.current.anki_connector.note_index
+    exclude = note_index.contains if request.args.get('unknown', 'true').lower() == 'true' else None
+    words = vocabulary_store.top_words(
+        since=since,
+        limit=request.args.get('limit', 20, type=int),
+        offset=request.args.get('offset', 0, type=int),
+        exclude=exclude
+    )
+    return jsonify({'words': words})
+
+@app.route('/vocabulary/words/<word>', methods=['GET'])
+def get_vocabulary_history(word: str):
+    if vocabulary_store is None:
+        return _vocabulary_unavailable()
+    history = vocabulary_store.history(word, request.args.get('limit', 20, type=int), request.args.get('offset', 0, type=int))
+    return jsonify({'word': word, 'lookups': history})
+
+@app.route('/vocabulary/export', methods=['POST'])
+def export_vocabulary():
+    """Queues the selected words for Anki in one batch; expects {"words": [...]}."""
+    if vocabulary_store is None:
+        return _vocabulary_unavailable()
+    data = request.get_json()
+    if not data or not data.get('words'):
+        raise AnkiError('No words provided')
+
+    anki_connector = service_container.current.anki_connector
+    notes = [
+        (entry['word'], anki_connector.build_note(entry['word'], entry['definition'], entry['sentence'], entry['translation']))
+        for entry in vocabulary_store.entries(data['words'])
+        if not anki_connector.note_index.contains(entry['word']) and not anki_outbox.is_pending(entry['word'])
+    ]
+    outbox_ids = anki_outbox.enqueue_many(notes) if notes else []
+    return jsonify({'result': f'{len(notes)} words queued for Anki', 'outboxIds': outbox_ids}), 202
+
 # --- Main ---
 
-if __name__ == '__main__':
+def publish_config():
+    """Announces the current settings to the other workers, which reload them on their next request."""
+    global config_seen
+    if shared_cache is not None:
+        config_seen = config.snapshot.fingerprint
+        shared_cache.set_meta("config_fingerprint", config_seen)
+
+def init_worker(worker: int):
+    """Builds the runtime state of one server process; with several workers, worker 0 also delivers the Anki outbox."""
+    global cache_manager, config, config_path, service_container, anki_outbox, vocabulary_store, request_recorder
+    global profile_store, settings_handlers, job_manager, translation_cache, config_changed, shared_cache, lookup_context
+    global metrics_store, worker_key
     # Initialize cache manager, config, and services
     cache_manager = CacheManager()
     config, config_path = load_config(cache_manager)
-    anki_connector = AnkiConnector(config, cache_manager)
-    translation_service = TranslationService(config)
-    audio_service = AudioService(config) if config.get_setting('ttsEnabled', True) else None
+    configure_schedulers(config.scheduler)
+    workers = config.workers
+    shared_cache = SharedCache(workers.shared_cache_path) if workers.count > 1 else None
+    service_container = ServiceContainer(config, cache_manager, shared_cache)
+    if shared_cache is not None:
+        # A scrape reaches one worker, which adds the others' latest snapshots to its own values
+        worker_key = str(worker)
+        metrics_store = shared_cache.mapping("metrics", workers.count, codec="json")
+        publish_periodically(metrics_store, worker_key)
+    anki_outbox = AnkiOutbox(config.anki.outbox_path, lambda: service_container.current.anki_connector)
+    if worker == 0:
+        anki_outbox.start()
+    vocabulary_store = VocabularyStore(config.vocabulary.path) if config.vocabulary.enabled else None
+    recorder_path = config.recorder.path
+    if workers.count > 1:
+        # One recording per worker; replay.py reads them one at a time
+        recorder_path = "{0}.worker{2}{1}".format(*os.path.splitext(recorder_path), worker)
+    request_recorder = RequestRecorder(recorder_path) if config.recorder.enabled else None
+    # Retained traces are shared, so any worker serves /profiles/<id> for a trace another one recorded
+    profile_buffer = config.profiling.buffer_size
+    profile_store = ProfileStore(profile_buffer, shared_cache.mapping("profiles", profile_buffer, codec="json") if shared_cache else None)
     settings_handlers = get_settings_handlers(config)
-    # --- In-Memory Cache for Translation Results ---
-    translation_cache: Dict[str, str] = {}
+    job_manager = JobManager(config, service_container.current.translation_service)
+    # --- Cache for Translation Results (shared by all workers in multi-worker mode) ---
+    if shared_cache is not None:
+        translation_cache = shared_cache.mapping("html", MAX_SHARED_PAGE_ENTRIES)
+    else:
+        memory_cache = config.memory_cache
+        translation_cache = CompressedCache(int(memory_cache.budget_mb * 1024 * 1024), memory_cache.compression_level,
+                                            compression_dictionary())
+    # --- Recently analyzed sentences, answering lookups of their words ---
+    context_config = config.lookup_context
+    if context_config.enabled:
+        store = shared_cache.mapping("context", context_config.max_sentences, codec="json") if shared_cache else OrderedDict()
+        lookup_context = LookupContext(store, context_config.ttl_seconds, context_config.max_sentences)
     # --- Configuration Change Flag ---
     config_changed = False
-    app.run(debug=False)
\ No newline at end of file
+    if worker == 0:
+        publish_config()
+        if config.cache_snapshot.import_path:
+            # In multi-worker mode the results land in the shared cache, so one import warms every worker
+            services = service_container.current
+            try:
+                counts = import_snapshot(config.cache_snapshot.import_path, services.translation_service, services.audio_service)
+                print(f"Cache snapshot imported from {config.cache_snapshot.import_path}: {counts}")
+            except (CacheError, OSError) as e:
+                print(f"Cache snapshot not imported: {e}")
+                record_error("cache_snapshot", e)
+
+if __name__ == '__main__':
+    # Only the worker settings are read here; each worker loads its own state after the fork
+    cache_manager = CacheManager()
+    workers = load_config(cache_manager)[0].workers
+    cache_manager.flush()  # Leaves no write-behind timer thread running across the fork
+    serve(app, workers.host, workers.port, workers.count, init_worker)
@@ -0,0 +1,99 @@
+"""Measures the per-request cost of Config accessors before and after the compiled snapshot.
+
+The legacy_* functions reproduce the accessors as they were before the snapshot: every call
+re-queried configparser and rebuilt the NamedTuples. Both variants replay the accessor pattern
+of a single lookup (handle_translation_request, get_settings_handlers, generate_goldendict_html).
+
+    python benchmarks/bench_config.py
+"""
+import configparser
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.cache import CacheManager
+from core.config import Config, _parse_value, _get_config_path
+from core.types import AnkiConfig, AudioConfig, HTMLTemplateConfig, ProviderConfig
+
+ITERATIONS = 20000
+
+
+def legacy_get_setting(parser: configparser.ConfigParser, key: str, default):
+    return _parse_value(parser.get("settings", key, fallback=default))
+
+def legacy_anki(parser: configparser.ConfigParser) -> AnkiConfig:
+    return AnkiConfig(
+        deck_name=_parse_value(parser.get("anki", "deckName", fallback=None)),
+        model_name=_parse_value(parser.get("anki", "modelName", fallback=None)),
+        connect_url=_parse_value(parser.get("anki", "ankiConnectUrl", fallback="http://localhost:8765")),
+        api_key=_parse_value(parser.get("anki", "api_key", fallback=None)),
+        fields=dict(parser.items("anki.fields")),
+    )
+
+def legacy_audio(parser: configparser.ConfigParser) -> AudioConfig:
+    return AudioConfig(autoplay=parser.getboolean("audio", "autoplay", fallback=False))
+
+def legacy_html_template(parser: configparser.ConfigParser) -> HTMLTemplateConfig:
+    return HTMLTemplateConfig(
+        show_translation=parser.getboolean("html_template", "show_translation", fallback=True),
+        show_timing_info=parser.getboolean("html_template", "show_timing_info", fallback=True)
+    )
+
+def legacy_provider_config(parser: configparser.ConfigParser, provider_name: str) -> ProviderConfig:
+    items = dict(parser.items(f"providers.{provider_name}"))
+    params_section = f"providers.{provider_name}.parameters"
+    params_items = dict(parser.items(params_section)) if parser.has_section(params_section) else {}
+    return ProviderConfig(items.get("api_key", ""), items.get("base_url", ""), items.get("model", ""), params_items)
+
+def legacy_request(parser: configparser.ConfigParser):
+    selected = lambda: _parse_value(parser.get("providers", "selected_provider"))
+    # handle_translation_request
+    for key in ("translationEnabled", "ttsEnabled", "analysisEnabled"):
+        legacy_get_setting(parser, key, "True")
+    # get_settings_handlers
+    for key in ("translationEnabled", "ttsEnabled", "analysisEnabled"):
+        legacy_get_setting(parser, key, "True")
+    legacy_audio(parser)
+    selected()
+    for _ in range(3):
+        legacy_provider_config(parser, selected())
+    # generate_goldendict_html
+    legacy_audio(parser)
+    for _ in range(5):
+        legacy_anki(parser)
+    for _ in range(2):
+        legacy_html_template(parser)
+
+def snapshot_request(config: Config):
+    # handle_translation_request
+    for key in ("translationEnabled", "ttsEnabled", "analysisEnabled"):
+        config.get_setting(key, True)
+    # get_settings_handlers
+    for key in ("translationEnabled", "ttsEnabled", "analysisEnabled"):
+        config.get_setting(key, True)
+    config.audio
+    config.get_provider_config(config.selected_provider)
+    # generate_goldendict_html
+    snapshot = config.snapshot
+    snapshot.audio
+    config.anki
+    snapshot.html_template
+    snapshot.html_template
+
+def main():
+    cache_manager = CacheManager(os.path.join(tempfile.mkdtemp(), "anki_cache.json"))
+    config = Config(_get_config_path(), cache_manager)
+
+    legacy = min(timeit.repeat(lambda: legacy_request(config.config), number=ITERATIONS, repeat=5)) / ITERATIONS
+    compiled = min(timeit.repeat(lambda: snapshot_request(config), number=ITERATIONS, repeat=5)) / ITERATIONS
+    compile_cost = min(timeit.repeat(config._compile, number=1000, repeat=5)) / 1000
+
+    print(f"legacy accessors per request:   {legacy * 1e6:8.2f} us")
+    print(f"snapshot accessors per request: {compiled * 1e6:8.2f} us ({legacy / compiled:.0f}x faster)")
+    print(f"snapshot compile (per change):  {compile_cost * 1e6:8.2f} us")
+
+if __name__ == "__main__":
+    main()
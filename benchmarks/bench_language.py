@@ -0,0 +1,49 @@
+"""Measures language detection before and after the sampled single-pass script counter.
+
+legacy_detect_language reproduces the detector as it was in prompts/custom_prompt.py: a Python
+loop over every character that only told Chinese from English. The new detector is timed both
+uncached (ASCII fast path or one regex pass over a sample) and cached (repeated lookups of the same text).
+
+    python benchmarks/bench_language.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.language import SAMPLE_CHARS, detect_language, detect_sample_language
+
+ITERATIONS = 2000
+
+SAMPLES = {
+    "english": "The quick brown fox jumps over the lazy dog while the committee reviews the proposal. " * 20,
+    "chinese": "我们今天在图书馆里讨论了这个项目的进展，并决定下周继续完善细节。" * 40,
+    "japanese": "私たちは今日図書館でこのプロジェクトの進捗について話し合いました。" * 40,
+    "mixed": "We deployed the new 模型 to production, and 用户反馈 was mostly positive overall. " * 20,
+}
+
+
+def legacy_detect_language(text: str) -> str:
+    chinese_count = 0
+    for char in text:
+        if '一' <= char <= '鿿':
+            chinese_count += 1
+    if chinese_count / len(text) > 0.1:
+        return "Chinese"
+    else:
+        return "English"
+
+def main():
+    def uncached(text: str) -> str:
+        return detect_sample_language.__wrapped__(text[:SAMPLE_CHARS])
+
+    for name, text in SAMPLES.items():
+        legacy = min(timeit.repeat(lambda: legacy_detect_language(text), number=ITERATIONS, repeat=5)) / ITERATIONS
+        single_pass = min(timeit.repeat(lambda: uncached(text), number=ITERATIONS, repeat=5)) / ITERATIONS
+        cached = min(timeit.repeat(lambda: detect_language(text), number=ITERATIONS, repeat=5)) / ITERATIONS
+        print(f"{name:9} ({len(text):5} chars) legacy {legacy * 1e6:8.2f} us -> {uncached(text):8} "
+              f"{single_pass * 1e6:7.2f} us ({legacy / single_pass:4.1f}x), cached {cached * 1e6:5.2f} us")
+
+if __name__ == "__main__":
+    main()
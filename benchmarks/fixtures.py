@@ -0,0 +1,54 @@
+"""Realistic inputs for the microbenchmark suite: lookup texts, analysis results and raw provider responses."""
+import json
+
+from core.html_generator import WordData
+
+PHRASE = "kick the bucket"
+SENTENCE = "In terms of performance, the new scheduler clearly outperforms its predecessor."
+PARAGRAPH = (
+    "The committee reviewed the proposal in considerable detail before reaching a verdict. "
+    "Although several members raised concerns about the budget, the overall sentiment was favourable. "
+    "In terms of implementation, the team intends to roll out the changes incrementally, "
+    "starting with the least disruptive components. Nevertheless, a contingency plan will be drafted "
+    "in case the preliminary results prove inconclusive."
+)
+CJK_PARAGRAPH = (
+    "委员会在作出决定之前详细审查了这项提案。尽管有几位成员对预算表示担忧，但总体态度是积极的。"
+    "在实施方面，团队打算逐步推出这些变更，从影响最小的部分开始。"
+)
+MIXED = "We deployed the new 模型 to production, and 用户反馈 was mostly positive overall."
+
+TEXTS = {
+    "phrase": PHRASE,
+    "sentence": SENTENCE,
+    "paragraph": PARAGRAPH,
+    "cjk": CJK_PARAGRAPH,
+    "mixed": MIXED,
+}
+
+PARAGRAPH_WORDS = [
+    WordData(word, f"definition of {word}")
+    for word in ("committee", "considerable", "verdict", "sentiment", "favourable", "in terms of",
+                 "incrementally", "disruptive", "Nevertheless", "contingency", "preliminary", "inconclusive")
+]
+# Sentences that share most of their wording, as in subtitles or drill exercises
+MEMORY_SENTENCES = [
+    f"{subject} {verb} the {thing} {when}."
+    for subject in ("The committee", "Our teacher", "The new manager", "A tourist", "My neighbour")
+    for verb in ("reviewed", "described", "rejected", "praised")
+    for thing in ("proposal", "quarterly report", "museum exhibit", "travel plans", "garden fence")
+    for when in ("before lunch", "in great detail", "after the meeting", "without hesitation")
+]
+NEAR_SENTENCE = "The committee reviewed the quarterly reports before lunch."
+GRAMMAR_ORIGINAL = "Although she have went to the market yesterday, she dont buyed no apples for the childs."
+GRAMMAR_CORRECTED = "Although she went to the market yesterday, she didn't buy any apples for the children."
+TRANSLATION_DATA = {"Translation": "委员会在作出决定之前详细审查了这项提案。"}
+ANALYSIS_DATA = {"Words": [{"word": word_data.word, "definition": word_data.definition} for word_data in PARAGRAPH_WORDS]}
+
+_ANALYSIS_JSON = json.dumps(ANALYSIS_DATA, ensure_ascii=False, indent=2)
+RESPONSES = {
+    "clean": _ANALYSIS_JSON,
+    # Typical chat-model output: a fenced block with prose around it and trailing commas
+    "fenced": "Here is the vocabulary you asked for:\n```json\n" + _ANALYSIS_JSON.replace('"\n  }', '",\n  }').replace("}\n  ]", "},\n  ]") + "\n```\nLet me know if you need more.",
+    "malformed": "```json\n" + _ANALYSIS_JSON[:-20],
+}
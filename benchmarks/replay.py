@@ -0,0 +1,140 @@
+"""Replays a lookup recording against a running LinguaBoost server and reports latency.
+
+Record traffic by setting `enabled = true` in the `[recorder]` section of config.ini. For
+regression checks, run the server with `selected_provider = stub` so provider latency is fixed.
+
+    python benchmarks/replay.py recordings/lookups.jsonl --speed 1        # original timing
+    python benchmarks/replay.py recordings/lookups.jsonl --speed 10       # timing compressed 10x
+    python benchmarks/replay.py recordings/lookups.jsonl --rate 20        # fixed 20 requests/s
+    python benchmarks/replay.py recordings/lookups.jsonl --concurrency 8  # closed loop, 8 at a time
+
+With --speed or --rate, requests go out when due however many are still in flight, and latency
+counts from that due time. The cache hit ratio is read from the X-Cache header the server sets on lookups.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from core.recorder import read_recording
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def schedule(entries: List[Dict], speed: Optional[float], rate: Optional[float]) -> Optional[List[float]]:
+    """Returns the start offset of each request in seconds, or None for a closed loop."""
+    if rate:
+        return [index / rate for index in range(len(entries))]
+    if speed:
+        first = entries[0].get("ts", 0)
+        return [(entry.get("ts", first) - first) / speed for entry in entries]
+    return None
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def replay(entries: List[Dict], base_url: str, offsets: Optional[List[float]], concurrency: int, timeout: float) -> Dict:
+    """Sends the entries and reports latency; with offsets (open loop) each request goes out on its own thread when due.
+
+    Open-loop latency is measured from when a request was due, not from when it was sent, so time
+    a request spends waiting behind a server that fell behind counts (no coordinated omission).
+    """
+    session = requests.Session()
+    pool_size = concurrency if offsets is None else len(entries)
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=pool_size))
+    results = []
+    lock = threading.Lock()
+
+    def send(entry: Dict, due: Optional[float]):
+        sent_at = time.perf_counter()
+        start_time = sent_at if due is None else due
+        try:
+            response = session.get(base_url + entry.get("endpoint", "/"), params={"text": entry["text"]}, timeout=timeout)
+            outcome = (response.status_code, response.headers.get("X-Cache", "NONE").lower())
+        except requests.RequestException:
+            outcome = (0, "none")
+        with lock:
+            results.append((time.perf_counter() - start_time,) + outcome + (sent_at, sent_at - start_time))
+
+    started_at = time.perf_counter()
+    if offsets is None:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for entry in entries:
+                pool.submit(send, entry, None)
+    else:
+        threads = []
+        for entry, offset in zip(entries, offsets):
+            due = started_at + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            thread = threading.Thread(target=send, args=(entry, due), daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - started_at
+
+    latencies = sorted(result[0] for result in results)
+    hits = sum(1 for result in results if result[2] == "hit")
+    lookups = sum(1 for result in results if result[2] in ("hit", "miss"))
+    sent_times = sorted(result[3] for result in results)
+    send_window = sent_times[-1] - sent_times[0] if len(sent_times) > 1 else 0
+    return {
+        "requests": len(results),
+        "errors": sum(1 for result in results if result[1] == 0 or result[1] >= 500),
+        "elapsed": round(elapsed, 3),
+        "throughput": round(len(results) / elapsed, 2) if elapsed else 0,
+        # Open loop only: the request rate asked for, the rate requests actually went out at and the worst send delay
+        "targetRate": round((len(offsets) - 1) / offsets[-1], 2) if offsets and offsets[-1] > 0 else None,
+        "achievedRate": round((len(sent_times) - 1) / send_window, 2) if offsets and send_window else None,
+        "sendLagMax": round(max(result[4] for result in results), 4) if offsets and results else None,
+        "latency": {f"p{pct}": round(percentile(latencies, pct), 4) for pct in PERCENTILES},
+        "latencyMax": round(latencies[-1], 4) if latencies else 0,
+        "latencyMean": round(sum(latencies) / len(latencies), 4) if latencies else 0,
+        "cacheHitRatio": round(hits / lookups, 3) if lookups else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a LinguaBoost lookup recording against a running server.")
+    parser.add_argument("recording", help="JSONL file written by the request recorder")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--speed", type=float, help="Keep the recorded spacing, divided by this factor")
+    parser.add_argument("--rate", type=float, help="Send at a fixed number of requests per second instead")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight in a closed loop (without --speed or --rate)")
+    parser.add_argument("--limit", type=int, help="Replay only the first N entries")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    entries = [entry for entry in read_recording(args.recording) if entry.get("text")]
+    if args.limit:
+        entries = entries[:args.limit]
+    if not entries:
+        sys.exit("No lookups in the recording.")
+
+    report = replay(entries, args.base_url.rstrip("/"), schedule(entries, args.speed, args.rate), max(1, args.concurrency), args.timeout)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"requests:    {report['requests']} ({report['errors']} errors) in {report['elapsed']}s")
+    print(f"throughput:  {report['throughput']} req/s")
+    if report["targetRate"] is not None:
+        print(f"send rate:   {report['achievedRate']} req/s (target {report['targetRate']}), max send lag {report['sendLagMax'] * 1000:.1f}ms")
+    print("latency:     " + "  ".join(f"{name} {value * 1000:.1f}ms" for name, value in report["latency"].items())
+          + f"  max {report['latencyMax'] * 1000:.1f}ms")
+    print(f"cache hits:  {report['cacheHitRatio'] if report['cacheHitRatio'] is not None else 'n/a'}")
+
+if __name__ == "__main__":
+    main()
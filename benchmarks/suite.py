@@ -0,0 +1,166 @@
+"""Microbenchmarks for the pure-Python work done on every lookup.
+
+Each case is timed with timeit; the best of several repeats is reported per call. Results can be
+saved as JSON and compared against a saved baseline, failing when a case is slower than the
+baseline by more than the threshold.
+
+    python benchmarks/suite.py --output baseline.json
+    python benchmarks/suite.py --compare baseline.json --threshold 0.15
+    python benchmarks/suite.py --filter parse_response
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import warnings
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+from app import compile_word_pattern, merge_translation_and_analysis_data
+from benchmarks import fixtures
+from core.cache import CacheManager
+from core.config import Config, _get_config_path
+from core.errors import JSONParsingError
+from core.helpers import remove_trailing_commas
+from core.html_generator import compression_dictionary, create_word_highlighter, generate_goldendict_html
+from core.language import SAMPLE_CHARS, detect_language, detect_sample_language
+from core.memory_cache import CompressedCache
+from core.text_diff import diff_tokens
+from core.translation_memory import TranslationMemory
+from providers.implementations.gemini_ai_provider import GeminiAIProvider
+from providers.implementations.openai_ai_provider import OpenAIAIProvider
+
+REPEAT = 5
+MIN_TIME = 0.2  # Seconds per repeat; timeit picks the loop count to reach it
+
+
+def _parse(provider_class, response: str) -> Callable[[], object]:
+    # parse_response only looks at the response, so the providers are not constructed (no API keys needed)
+    provider = object.__new__(provider_class)
+
+    def run():
+        try:
+            return provider.parse_response(response)
+        except (JSONParsingError, ValueError):
+            return None
+    return run
+
+def build_cases(config: Config) -> List[Tuple[str, Callable[[], object]]]:
+    cases = []
+    for name, text in fixtures.TEXTS.items():
+        cases.append((f"detect_language/{name}", lambda text=text: detect_sample_language.__wrapped__(text[:SAMPLE_CHARS])))
+    cases.append(("detect_language/cached", lambda: detect_language(fixtures.PARAGRAPH)))
+
+    words = fixtures.PARAGRAPH_WORDS
+    cases.append(("compile_word_pattern/paragraph", lambda: compile_word_pattern(words)))
+    pattern = compile_word_pattern(words)
+    known_terms = {"verdict", "contingency"}
+    cases.append(("highlight_words/paragraph", lambda: create_word_highlighter(pattern, known_terms)(fixtures.PARAGRAPH, words)))
+
+    cases.append(("merge_translation_and_analysis", lambda: merge_translation_and_analysis_data(
+        dict(fixtures.TRANSLATION_DATA), fixtures.ANALYSIS_DATA, True, True)))
+
+    for name, response in fixtures.RESPONSES.items():
+        cases.append((f"remove_trailing_commas/{name}", lambda response=response: remove_trailing_commas(response)))
+        cases.append((f"parse_response/openai/{name}", _parse(OpenAIAIProvider, response)))
+        cases.append((f"parse_response/gemini/{name}", _parse(GeminiAIProvider, response)))
+
+    memory = TranslationMemory()
+    for sentence in fixtures.MEMORY_SENTENCES:
+        memory.add(sentence)
+    cases.append(("translation_memory/signature", lambda: memory.signature(fixtures.SENTENCE)))
+    cases.append(("translation_memory/query_near", lambda: memory.query(fixtures.NEAR_SENTENCE)))
+    cases.append(("translation_memory/query_miss", lambda: memory.query(fixtures.MIXED)))
+
+    cases.append(("diff_tokens/grammar_check", lambda: diff_tokens(fixtures.GRAMMAR_ORIGINAL, fixtures.GRAMMAR_CORRECTED)))
+
+    page = generate_goldendict_html(
+        fixtures.PARAGRAPH, words, fixtures.TRANSLATION_DATA["Translation"], config, "", 0.5, 0.7, 0.3, pattern, None, 0, known_terms)
+    cases.append(("generate_goldendict_html/paragraph", lambda: generate_goldendict_html(
+        fixtures.PARAGRAPH, words, fixtures.TRANSLATION_DATA["Translation"], config, "", 0.5, 0.7, 0.3, pattern, None, 0, known_terms)))
+
+    page_cache = CompressedCache(64 * 1024 * 1024, 6, compression_dictionary())
+    page_cache["page"] = page
+    cases.append(("memory_cache/set_page", lambda: page_cache.__setitem__("other", page)))
+    cases.append(("memory_cache/get_page", lambda: page_cache["page"]))
+
+    def config_accessors():
+        for key in ("translationEnabled", "ttsEnabled", "analysisEnabled", "grammarCheckEnabled"):
+            config.get_setting(key, True)
+        config.audio
+        config.anki
+        config.get_provider_config(config.selected_provider)
+    cases.append(("config_accessors/request", config_accessors))
+    return cases
+
+def measure(function: Callable[[], object], repeat: int) -> Dict[str, float]:
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * MIN_TIME / max(elapsed, 1e-9)))
+    timings = sorted(t / number for t in timer.repeat(repeat=repeat, number=number))
+    return {"min_us": round(timings[0] * 1e6, 3), "median_us": round(timings[len(timings) // 2] * 1e6, 3), "loops": number}
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Prints each case against the baseline and returns the names that regressed beyond the threshold."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:45} {result['min_us']:12.2f} us   (new)")
+            continue
+        change = result["min_us"] / before["min_us"] - 1 if before["min_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:45} {result['min_us']:12.2f} us   {change:+7.1%} vs {before['min_us']:.2f} us{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the LinguaBoost hot-path microbenchmarks.")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline JSON written by --output")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown against the baseline (0.15 = 15%%)")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    config_dir = tempfile.mkdtemp()
+    shutil.copy(_get_config_path(), os.path.join(config_dir, "config.ini"))
+    config = Config(os.path.join(config_dir, "config.ini"), CacheManager(os.path.join(config_dir, "anki_cache.json")))
+
+    results = {}
+    for name, function in build_cases(config):
+        if args.filter in name:
+            results[name] = measure(function, args.repeat)
+            if not args.compare:
+                print(f"{name:45} {results[name]['min_us']:12.2f} us   (median {results[name]['median_us']:.2f} us)")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["results"], args.threshold)
+
+    if args.output:
+        report = {
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if regressions:
+        sys.exit(f"{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import json
+import sys
+import requests
+
+DEFAULT_SERVER = "http://127.0.0.1:5000"
+TIMEOUT = 300
+
+def main():
+    parser = argparse.ArgumentParser(description="Exports the caches of a running LinguaBoost server to a snapshot file, or imports one into it.")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("path", help="Snapshot file to write (export) or read (import).")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help=f"Base URL of the LinguaBoost server (default {DEFAULT_SERVER}).")
+    args = parser.parse_args()
+
+    url = f"{args.server.rstrip('/')}/cache/snapshot"
+    if args.action == "export":
+        response = requests.get(url, timeout=TIMEOUT)
+        response.raise_for_status()
+        with open(args.path, "wb") as f:
+            f.write(response.content)
+        print(f"Wrote {len(response.content)} bytes to {args.path}")
+    else:
+        with open(args.path, "rb") as f:
+            response = requests.post(url, data=f.read(), headers={"Content-Type": "application/zip"}, timeout=TIMEOUT)
+        if response.status_code != 200:
+            print(f"Import failed: {response.json().get('error', response.text)}")
+            sys.exit(1)
+        print(json.dumps(response.json(), indent=2))
+
+if __name__ == "__main__":
+    main()
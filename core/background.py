@@ -0,0 +1,57 @@
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """Returns the process-wide event loop that outlives requests, starting it on first use.
+
+    Each Flask request runs on its own short-lived loop, so work that has to finish after the
+    response (such as a provider call that missed its deadline) is scheduled here instead.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="background-loop", daemon=True).start()
+        return _loop
+
+def run_in_background(coroutine: Coroutine) -> concurrent.futures.Future:
+    """Schedules the coroutine on the background loop; context variables of the caller carry over."""
+    return asyncio.run_coroutine_threadsafe(coroutine, background_loop())
+
+async def gather_with_deadlines(coroutines: Dict[str, Coroutine], deadlines: Dict[str, float],
+                                on_late: Optional[Callable[[str, concurrent.futures.Future], None]] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """Runs the named coroutines on the background loop and waits for each until its deadline (seconds).
+
+    Returns the results that arrived in time (an exception counts as a result) and the names that
+    missed their deadline. Missed coroutines are not cancelled; `on_late` is called when they finish.
+    """
+    start_time = time.monotonic()
+    pending = {name: run_in_background(coroutine) for name, coroutine in coroutines.items()}
+    waiting = {name: asyncio.wrap_future(future) for name, future in pending.items()}
+    results: Dict[str, Any] = {}
+    missed: List[str] = []
+    while waiting:
+        elapsed = time.monotonic() - start_time
+        for name in [name for name in waiting if deadlines.get(name, float("inf")) <= elapsed]:
+            # Not awaited any more, but the background task keeps running
+            del waiting[name]
+            missed.append(name)
+            if on_late is not None:
+                pending[name].add_done_callback(lambda future, name=name: on_late(name, future))
+        if not waiting:
+            break
+        timeout = min(deadlines.get(name, float("inf")) for name in waiting) - elapsed
+        done, _ = await asyncio.wait(waiting.values(), timeout=None if timeout == float("inf") else timeout,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        for name, future in list(waiting.items()):
+            if future in done:
+                results[name] = future.exception() or future.result()
+                del waiting[name]
+    return results, missed
@@ -1,17 +1,53 @@
+import atexit
+import copy
 import json
 import os
 import sys
-from typing import Dict, Any
+import tempfile
+import threading
+from typing import Dict, Any, Optional
 from core.errors import CacheError
 
+SCHEMA_VERSION = 2
+FLUSH_DELAY = 1.0
+
+def atomic_write_json(path: str, data: Any):
+    """Writes JSON to a temp file in the target directory and renames it over the target."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
 class CacheManager:
-    def __init__(self, cache_file_path: str = None):
+    """Caches Anki deck/model metadata and the last loaded config.
+
+    The two live in separate files so that marking a deck as known does not re-serialize the
+    config. Changes are kept in memory and flushed by a background timer, coalescing bursts of
+    updates into one atomic write; `flush()` (also run at exit) writes pending changes immediately.
+    """
+
+    def __init__(self, cache_file_path: str = None, flush_delay: float = FLUSH_DELAY):
         if cache_file_path is None:
             cache_file_path = self._get_default_cache_path()
         self.cache_file_path = cache_file_path
+        self.config_cache_path = os.path.splitext(cache_file_path)[0] + "_config.json"
+        self.flush_delay = flush_delay
         self._decks = None
         self._models = None
         self._config = None
+        self._dirty = set()
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
 
     def _get_default_cache_path(self) -> str:
         if getattr(sys, 'frozen', False):
@@ -38,50 +74,92 @@ class CacheManager:
             self.load()
         return self._config
 
-    def load(self):
+    def _read_json(self, path: str) -> Optional[Dict[str, Any]]:
         try:
-            with open(self.cache_file_path, "r") as f:
-                cache_data = json.load(f)
-                self._decks = cache_data.get("decks", {})
-                self._models = cache_data.get("models", {})
-                self._config = cache_data.get("config", {})
-            print("Cache loaded from file.")
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
         except FileNotFoundError:
-            print("Cache file not found. Starting with an empty cache.")
-            self._decks = {}
-            self._models = {}
-            self._config = {}
+            return None
         except json.JSONDecodeError as e:
-            raise CacheError(f"Error decoding JSON from cache file: {e}")
+            raise CacheError(f"Error decoding JSON from cache file {path}: {e}")
 
+    def load(self):
+        with self._lock:
+            cache_data = self._read_json(self.cache_file_path)
+            config_data = self._read_json(self.config_cache_path)
+            if cache_data is None:
+                print("Cache file not found. Starting with an empty cache.")
+                cache_data = {}
+            else:
+                print("Cache loaded from file.")
+            self._decks = cache_data.get("decks", {})
+            self._models = cache_data.get("models", {})
+            self._config = config_data if config_data is not None else {}
+            if "config" in cache_data:
+                # Schema 1 kept the config inside the Anki cache; move it out on the next flush
+                if config_data is None:
+                    self._config = cache_data["config"]
+                self._mark_dirty("anki", "config")
 
     def save(self):
-        cache_data = {
-            "decks": self.decks,
-            "models": self.models,
-            "config": self.config
-        }
+        """Writes the whole cache immediately."""
+        with self._lock:
+            self._dirty.update(("anki", "config"))
+        self.flush()
+
+    def flush(self):
+        """Writes pending changes now instead of waiting for the write-behind timer."""
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                dirty, self._dirty = self._dirty, set()
+                if not dirty or self._decks is None:
+                    return
+                writes = []
+                if "anki" in dirty:
+                    writes.append((self.cache_file_path, {"schema": SCHEMA_VERSION, "decks": dict(self._decks), "models": dict(self._models)}))
+                if "config" in dirty:
+                    writes.append((self.config_cache_path, copy.deepcopy(self._config)))
+            try:
+                for path, data in writes:
+                    atomic_write_json(path, data)
+                print("Cache saved to file.")
+            except Exception as e:
+                with self._lock:
+                    self._dirty.update(dirty)  # Retry on the next flush
+                raise CacheError(f"Error saving cache to file: {e}")
+
+    def _mark_dirty(self, *parts: str):
+        with self._lock:
+            self._dirty.update(parts)
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_delay, self._flush_in_background)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush_in_background(self):
         try:
-            with open(self.cache_file_path, "w") as f:
-                json.dump(cache_data, f)
-            print("Cache saved to file.")
-        except Exception as e:
-            raise CacheError(f"Error saving cache to file: {e}")
+            self.flush()
+        except CacheError as e:
+            print(f"Error: {e}")
 
     def deck_exists(self, deck_name: str) -> bool:
         return self.decks.get(deck_name, False)
 
     def add_deck(self, deck_name: str):
         self.decks[deck_name] = True
-        self.save()
+        self._mark_dirty("anki")
 
     def model_exists(self, model_name: str) -> bool:
         return self.models.get(model_name, False)
 
     def add_model(self, model_name: str):
         self.models[model_name] = True
-        self.save()
+        self._mark_dirty("anki")
 
     def update_config(self, config_data: Dict[str, Any]):
+        self.config  # Make sure the Anki part is loaded before it can be written back
         self._config = config_data
-        self.save()
\ No newline at end of file
+        self._mark_dirty("config")
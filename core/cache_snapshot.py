@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import time
+import zipfile
+from typing import IO, Dict, List, Optional, Union
+from core.errors import CacheError
+from core.services.audio_service import AudioService
+from core.services.translation_service import FEATURE_PROMPTS, TranslationService
+
+SNAPSHOT_FORMAT = "linguaboost-cache-snapshot"
+SNAPSHOT_VERSION = 1
+MANIFEST = "manifest.json"
+RESULTS = "results.jsonl"
+AUDIO_INDEX = "audio.jsonl"
+AUDIO_DIR = "audio/"
+_RESULT_PREFIXES = tuple(f"{prompt_generator.__name__}:" for prompt_generator in FEATURE_PROMPTS.values())
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _jsonl(items: List[Dict]) -> bytes:
+    return "".join(json.dumps(item, ensure_ascii=False, separators=(",", ":")) + "\n" for item in items).encode("utf-8")
+
+def export_snapshot(file: Union[str, IO[bytes]], translation_service: TranslationService, audio_service: Optional[AudioService]) -> Dict[str, int]:
+    """Writes the cached provider results and the pronunciations of their analyzed words to one snapshot file.
+
+    The snapshot is a zip archive: a manifest (format version, creation time and the SHA-256 of
+    every member), the results as JSON lines tagged with the provider, model and prompt version
+    that produced them, and the audio files with their voice. Returns the number of entries per section.
+    """
+    provenance = translation_service.provenance()
+    results = []
+    words = {}
+    for cache_key, data in translation_service.cached_results():
+        results.append({"key": cache_key, **provenance, "value": data})
+        for word_data in data.get("Words", []):
+            word = str(word_data.get("word", "")).strip().lower()
+            if word:
+                words[word] = None
+    audio = []
+    audio_files = {}
+    if audio_service is not None:
+        voice = audio_service.config.voice_default
+        for word in words:
+            path = audio_service.word_audio_path(word)
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            name = AUDIO_DIR + os.path.basename(path)
+            audio.append({"word": word, "voice": voice, "file": name, "sha256": _sha256(data)})
+            audio_files[name] = data
+
+    members = {RESULTS: _jsonl(results), AUDIO_INDEX: _jsonl(audio)}
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "createdAt": time.time(),
+        "entries": {"results": len(results), "audio": len(audio)},
+        "sha256": {name: _sha256(data) for name, data in members.items()},
+    }
+    with zipfile.ZipFile(file, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        archive.writestr(MANIFEST, json.dumps(manifest, indent=1))
+        for name, data in members.items():
+            archive.writestr(name, data)
+        for name, data in audio_files.items():
+            archive.writestr(name, data, compress_type=zipfile.ZIP_STORED)  # MP3 does not compress further
+    return manifest["entries"]
+
+def import_snapshot(file: Union[str, IO[bytes]], translation_service: TranslationService, audio_service: Optional[AudioService]) -> Dict[str, Dict[str, int]]:
+    """Merges a snapshot into the caches, keeping entries that are cached already.
+
+    Results from another provider, model or prompt version and audio in another voice are skipped.
+    Raises CacheError when the file is not a snapshot, is from a newer version or fails its checksums.
+    """
+    try:
+        with zipfile.ZipFile(file) as archive:
+            manifest = json.loads(archive.read(MANIFEST))
+            if manifest.get("format") != SNAPSHOT_FORMAT:
+                raise CacheError("Not a LinguaBoost cache snapshot")
+            if manifest.get("version", 0) > SNAPSHOT_VERSION:
+                raise CacheError(f"Cache snapshot version {manifest.get('version')} is newer than supported ({SNAPSHOT_VERSION})")
+            members = {}
+            for name in (RESULTS, AUDIO_INDEX):
+                data = archive.read(name)
+                if _sha256(data) != manifest.get("sha256", {}).get(name):
+                    raise CacheError(f"Cache snapshot member {name} fails its checksum")
+                members[name] = [json.loads(line) for line in data.decode("utf-8").splitlines() if line]
+
+            provenance = translation_service.provenance()
+            results = dict.fromkeys(("imported", "existing", "mismatched"), 0)
+            for entry in members[RESULTS]:
+                if any(entry.get(key) != value for key, value in provenance.items()) or not entry["key"].startswith(_RESULT_PREFIXES):
+                    results["mismatched"] += 1
+                elif translation_service.restore_result(entry["key"], entry["value"]):
+                    results["imported"] += 1
+                else:
+                    results["existing"] += 1
+
+            audio = dict.fromkeys(("imported", "existing", "mismatched", "corrupt"), 0)
+            for entry in members[AUDIO_INDEX]:
+                if audio_service is None or entry.get("voice") != audio_service.config.voice_default:
+                    audio["mismatched"] += 1
+                    continue
+                data = archive.read(entry["file"])
+                if _sha256(data) != entry.get("sha256"):
+                    audio["corrupt"] += 1
+                elif audio_service.store_word_audio(entry["word"], data):
+                    audio["imported"] += 1
+                else:
+                    audio["existing"] += 1
+    except (zipfile.BadZipFile, KeyError, ValueError) as e:
+        raise CacheError(f"Invalid cache snapshot: {e}")
+    return {"results": results, "audio": audio}
@@ -1,23 +1,36 @@
 import configparser
+import hashlib
+import json
 import os
 import sys
-from typing import Tuple, Dict, Any
+from types import MappingProxyType
+from typing import Tuple, Dict, Any, Optional
 from core.cache import CacheManager
 from core.errors import ConfigurationError
-from core.types import AnkiConfig, AudioConfig, HTMLTemplateConfig, ProviderConfig
+from core.types import AnkiConfig, AudioConfig, CacheSnapshotConfig, ConfigSnapshot, DeadlinesConfig, HTMLTemplateConfig, JobsConfig, LookupContextConfig, MemoryCacheConfig, ProfilingConfig, ProviderConfig, RecorderConfig, RouteRule, RouteTarget, RoutingConfig, SchedulerConfig, TranslationMemoryConfig, VocabularyConfig, WorkersConfig
 
 
 class Config:
+    """Wraps config.ini and compiles it into an immutable ConfigSnapshot on every change.
+
+    Readers on the hot path use `config.snapshot` (or the properties below, which read from it)
+    instead of re-querying configparser; `snapshot.version` changes whenever a setting does, and
+    `snapshot.fingerprint` identifies the settings themselves across processes.
+    """
+
     def __init__(self, config_path: str, cache_manager: CacheManager):
         self.config_path = config_path
         self.config = configparser.ConfigParser()
         self.cache_manager = cache_manager
+        self.version = 0
+        self.snapshot: ConfigSnapshot = None
         self.load_from_cache_or_file()
 
     def load_from_cache_or_file(self):
         cached_config = self.cache_manager.config
         if cached_config:
             self.config.read_dict(cached_config)
+            self._compile()
         else:
             self.load_config_from_file()
             self.cache_manager.update_config(self.config._sections)
@@ -30,21 +43,164 @@ class Config:
                 self.config.read_file(f)
         except Exception as e:
             raise ConfigurationError(f"Error reading configuration file: {e}")
+        self._compile()
 
     def refresh(self):
         """Reloads the configuration from the file."""
         self.load_config_from_file()
         self.cache_manager.update_config(self.config._sections)
 
+    def as_dict(self) -> Dict[str, Dict[str, str]]:
+        """Returns a detached copy of the raw settings, used to diff before and after an update."""
+        return {section: dict(self.config.items(section, raw=True)) for section in self.config.sections()}
+
+    def _compile(self):
+        """Rebuilds the snapshot from the parsed file; the only place that reads configparser."""
+        self.version += 1
+        self.snapshot = ConfigSnapshot(
+            version=self.version,
+            fingerprint=hashlib.sha1(json.dumps(self.as_dict(), sort_keys=True).encode("utf-8")).hexdigest()[:16],
+            anki=self._build_anki_config(),
+            audio=AudioConfig(
+                autoplay=self.config.getboolean("audio", "autoplay", fallback=False),
+                prefetch_enabled=self.config.getboolean("audio", "prefetch_enabled", fallback=True),
+                prefetch_workers=self.config.getint("audio", "prefetch_workers", fallback=2),
+                prefetch_per_minute=self.config.getint("audio", "prefetch_per_minute", fallback=60),
+                word_audio_max_mb=self.config.getint("audio", "word_audio_max_mb", fallback=100)
+            ),
+            html_template=HTMLTemplateConfig(
+                show_translation=self.config.getboolean("html_template", "show_translation", fallback=True),
+                show_timing_info=self.config.getboolean("html_template", "show_timing_info", fallback=True)
+            ),
+            jobs=self._build_jobs_config(),
+            vocabulary=VocabularyConfig(
+                enabled=self.config.getboolean("vocabulary", "enabled", fallback=True),
+                path=self._resolve_path(self.config.get("vocabulary", "path", fallback="vocabulary.sqlite3"))
+            ),
+            recorder=RecorderConfig(
+                enabled=self.config.getboolean("recorder", "enabled", fallback=False),
+                path=self._resolve_path(self.config.get("recorder", "path", fallback="recordings/lookups.jsonl"))
+            ),
+            profiling=ProfilingConfig(
+                enabled=self.config.getboolean("profiling", "enabled", fallback=False),
+                slow_threshold_ms=self.config.getfloat("profiling", "slow_threshold_ms", fallback=2000),
+                buffer_size=self.config.getint("profiling", "buffer_size", fallback=20),
+                sample_interval_ms=self.config.getfloat("profiling", "sample_interval_ms", fallback=5)
+            ),
+            deadlines=DeadlinesConfig(
+                budget_ms=self.config.getfloat("deadlines", "budget_ms", fallback=10000),
+                translation_ms=self.config.getfloat("deadlines", "translation_ms", fallback=6000),
+                analysis_ms=self.config.getfloat("deadlines", "analysis_ms", fallback=8000),
+                tts_ms=self.config.getfloat("deadlines", "tts_ms", fallback=5000),
+                grammar_check_ms=self.config.getfloat("deadlines", "grammar_check_ms", fallback=10000)
+            ),
+            routing=self._build_routing_config(),
+            workers=WorkersConfig(
+                count=max(1, self.config.getint("workers", "count", fallback=1)),
+                host=self.config.get("workers", "host", fallback="127.0.0.1"),
+                port=self.config.getint("workers", "port", fallback=5000),
+                shared_cache_path=self._resolve_path(self.config.get("workers", "shared_cache_path", fallback="shared_cache.sqlite3")),
+                config_check_interval_ms=self.config.getfloat("workers", "config_check_interval_ms", fallback=500)
+            ),
+            translation_memory=TranslationMemoryConfig(
+                enabled=self.config.getboolean("translation_memory", "enabled", fallback=False),
+                threshold=self.config.getfloat("translation_memory", "threshold", fallback=0.7),
+                ngram=self.config.getint("translation_memory", "ngram", fallback=3),
+                num_perm=self.config.getint("translation_memory", "num_perm", fallback=64),
+                bands=self.config.getint("translation_memory", "bands", fallback=16),
+                max_entries=self.config.getint("translation_memory", "max_entries", fallback=20000),
+                reference=self.config.getboolean("translation_memory", "reference", fallback=False)
+            ),
+            memory_cache=MemoryCacheConfig(
+                budget_mb=self.config.getfloat("memory_cache", "budget_mb", fallback=64),
+                compression_level=min(9, max(1, self.config.getint("memory_cache", "compression_level", fallback=6)))
+            ),
+            lookup_context=LookupContextConfig(
+                enabled=self.config.getboolean("lookup_context", "enabled", fallback=True),
+                ttl_seconds=self.config.getfloat("lookup_context", "ttl_seconds", fallback=600),
+                max_sentences=self.config.getint("lookup_context", "max_sentences", fallback=50)
+            ),
+            cache_snapshot=self._build_cache_snapshot_config(),
+            scheduler=SchedulerConfig(
+                enabled=self.config.getboolean("scheduler", "enabled", fallback=True),
+                provider_slots=self.config.getint("scheduler", "provider_slots", fallback=8),
+                tts_slots=self.config.getint("scheduler", "tts_slots", fallback=4),
+                anki_slots=self.config.getint("scheduler", "anki_slots", fallback=2),
+                interactive_share=min(1.0, max(0.0, self.config.getfloat("scheduler", "interactive_share", fallback=0.25)))
+            ),
+            voice_default=self._get_config_value("voice", "default_voice", fallback="en-US-ChristopherNeural"),
+            selected_provider=self._get_config_value("providers", "selected_provider"),
+            providers=MappingProxyType(self._build_provider_configs()),
+            settings=MappingProxyType({key: _parse_value(value) for key, value in self.config.items("settings")} if self.config.has_section("settings") else {}),
+        )
+
+    def _build_anki_config(self) -> Optional[AnkiConfig]:
+        if not self.config.has_section("anki.fields"):
+            return None  # Reported when the Anki settings are first used
+        return AnkiConfig(
+            deck_name=self._get_config_value("anki", "deckName"),
+            model_name=self._get_config_value("anki", "modelName"),
+            connect_url=self._get_config_value("anki", "ankiConnectUrl", fallback="http://localhost:8765"),
+            api_key=self._get_config_value("anki", "api_key", fallback=None),
+            fields=dict(self.config.items("anki.fields")),
+            timeout=self.config.getfloat("anki", "timeout", fallback=5.0),
+            index_sync_interval=self.config.getfloat("anki", "index_sync_interval", fallback=300.0),
+            outbox_path=self._resolve_path(self.config.get("anki", "outbox_path", fallback="anki_outbox.sqlite3")),
+        )
+
+    def _build_jobs_config(self) -> JobsConfig:
+        return JobsConfig(
+            output_dir=self._resolve_path(self.config.get("jobs", "output_dir", fallback="jobs")),
+            workers=self.config.getint("jobs", "workers", fallback=4),
+            process_workers=self.config.getint("jobs", "process_workers", fallback=2),
+            max_chunk_chars=self.config.getint("jobs", "max_chunk_chars", fallback=600)
+        )
+
+    def _build_cache_snapshot_config(self) -> CacheSnapshotConfig:
+        import_path = self.config.get("cache_snapshot", "import_path", fallback="").strip()
+        return CacheSnapshotConfig(import_path=self._resolve_path(import_path) if import_path else "")
+
+    def _build_provider_configs(self) -> Dict[str, ProviderConfig]:
+        providers = {}
+        for section in self.config.sections():
+            if not section.startswith("providers.") or section.endswith(".parameters"):
+                continue
+            provider_name = section[len("providers."):]
+            items = dict(self.config.items(section))
+            params_items = {}
+            config_section = f"{section}.parameters"
+            if self.config.has_section(config_section):
+                params_items = dict(self.config.items(config_section))
+
+            # Provide default values if keys are missing
+            providers[provider_name] = ProviderConfig(
+                api_key=items.get("api_key", ""),
+                base_url=items.get("base_url", ""),
+                model=items.get("model", ""),
+                parameters=params_items
+            )
+        return providers
+
+    def _build_routing_config(self) -> RoutingConfig:
+        rules = []
+        if self.config.has_section("routing.rules"):
+            for name, rule in self.config.items("routing.rules"):
+                rules.append(_parse_route_rule(name, rule))
+        return RoutingConfig(
+            enabled=self.config.getboolean("routing", "enabled", fallback=False),
+            prefer_fastest=self.config.getboolean("routing", "prefer_fastest", fallback=False),
+            rules=tuple(rules)
+        )
+
+    def _resolve_path(self, path: str) -> str:
+        """Resolves paths in config.ini relative to the directory holding it."""
+        if os.path.isabs(path):
+            return path
+        return os.path.join(os.path.dirname(self.config_path), path)
+
     def _get_config_value(self, section: str, key: str, fallback: Any = None) -> Any:
         try:
-            value = self.config.get(section, key, fallback=fallback)
-            if value.lower() == 'true':
-                return True
-            elif value.lower() == 'false':
-                return False
-            else:
-                return value
+            return _parse_value(self.config.get(section, key, fallback=fallback))
         except (configparser.NoSectionError, configparser.NoOptionError) as e:
             raise ConfigurationError(f"Missing configuration: {e}")
 
@@ -52,27 +208,17 @@ class Config:
         if not self.config.has_section(section):
             self.config.add_section(section)
         self.config.set(section, key, str(value))
+        self._compile()
 
     @property
     def anki(self) -> AnkiConfig:
-        fields = {}
-        try:
-            fields = dict(self.config.items("anki.fields"))
-        except configparser.NoSectionError as e:
-            raise ConfigurationError(f"Missing configuration section: {e}")
-        return AnkiConfig(
-            deck_name=self._get_config_value("anki", "deckName"),
-            model_name=self._get_config_value("anki", "modelName"),
-            connect_url=self._get_config_value("anki", "ankiConnectUrl", fallback="http://localhost:8765"),
-            api_key=self._get_config_value("anki", "api_key", fallback=None),
-            fields=fields,
-        )
+        if self.snapshot.anki is None:
+            raise ConfigurationError("Missing configuration section: 'anki.fields'")
+        return self.snapshot.anki
 
     @property
     def audio(self) -> AudioConfig:
-        return AudioConfig(
-            autoplay=self.config.getboolean("audio", "autoplay", fallback=False)
-        )
+        return self.snapshot.audio
 
     @audio.setter
     def audio(self, value: AudioConfig):
@@ -80,18 +226,63 @@ class Config:
 
     @property
     def voice_default(self) -> str:
-        return self._get_config_value("voice", "default_voice", fallback="en-US-ChristopherNeural")
+        return self.snapshot.voice_default
 
     @property
     def html_template(self) -> HTMLTemplateConfig:
-        return HTMLTemplateConfig(
-            show_translation=self.config.getboolean("html_template", "show_translation", fallback=True),
-            show_timing_info=self.config.getboolean("html_template", "show_timing_info", fallback=True)
-        )
+        return self.snapshot.html_template
+
+    @property
+    def jobs(self) -> JobsConfig:
+        return self.snapshot.jobs
+
+    @property
+    def vocabulary(self) -> VocabularyConfig:
+        return self.snapshot.vocabulary
+
+    @property
+    def recorder(self) -> RecorderConfig:
+        return self.snapshot.recorder
+
+    @property
+    def profiling(self) -> ProfilingConfig:
+        return self.snapshot.profiling
+
+    @property
+    def deadlines(self) -> DeadlinesConfig:
+        return self.snapshot.deadlines
+
+    @property
+    def routing(self) -> RoutingConfig:
+        return self.snapshot.routing
+
+    @property
+    def workers(self) -> WorkersConfig:
+        return self.snapshot.workers
+
+    @property
+    def translation_memory(self) -> TranslationMemoryConfig:
+        return self.snapshot.translation_memory
+
+    @property
+    def memory_cache(self) -> MemoryCacheConfig:
+        return self.snapshot.memory_cache
+
+    @property
+    def lookup_context(self) -> LookupContextConfig:
+        return self.snapshot.lookup_context
+
+    @property
+    def cache_snapshot(self) -> CacheSnapshotConfig:
+        return self.snapshot.cache_snapshot
+
+    @property
+    def scheduler(self) -> SchedulerConfig:
+        return self.snapshot.scheduler
 
     @property
     def selected_provider(self) -> str:
-        return self._get_config_value("providers", "selected_provider")
+        return self.snapshot.selected_provider
 
     @selected_provider.setter
     def selected_provider(self, value: str):
@@ -102,38 +293,23 @@ class Config:
 
     def get_provider_config(self, provider_name: str) -> ProviderConfig:
         try:
-            items = dict(self.config.items(f"providers.{provider_name}"))
-            params_items = {}
-            config_section = f"providers.{provider_name}.parameters"
-            if self.config.has_section(config_section):
-                params_items = dict(self.config.items(config_section))
-            # else:
-            #     print(f"No parameters found for provider: {provider_name}")
-
-            # Provide default values if keys are missing
-            api_key = items.get("api_key", "")
-            base_url = items.get("base_url", "")
-            model = items.get("model", "")
-
-            return ProviderConfig(
-                api_key=api_key,
-                base_url=base_url,
-                model=model,
-                parameters=params_items
-            )
-        except configparser.NoSectionError as e:
-            raise ConfigurationError(f"Missing configuration section: {e}")
+            return self.snapshot.providers[provider_name]
+        except KeyError:
+            raise ConfigurationError(f"Missing configuration section: 'providers.{provider_name}'")
 
     def get_setting(self, key: str, default: Any = None) -> Any:
-        return self._get_config_value("settings", key, fallback=default)
+        return self.snapshot.settings.get(key.lower(), default)
 
     def set_setting(self, key: str, value: Any):
         self._set_config_value("settings", key, value)
 
     def save_settings(self, config_path: str):
+        # Written to a temp file and renamed, so other workers never read a half-written file
+        temp_path = f"{config_path}.tmp"
         try:
-            with open(config_path, "w", encoding="utf-8") as f:
+            with open(temp_path, "w", encoding="utf-8") as f:
                 self.config.write(f)
+            os.replace(temp_path, config_path)
         except Exception as e:
             raise ConfigurationError(f"Error writing to configuration file: {e}")
 
@@ -146,6 +322,42 @@ class Config:
     def set_selected_provider_model(self, model: str):
         self._set_config_value(f"providers.{self.selected_provider}", "model", model)
 
+def _parse_value(value: Any) -> Any:
+    if isinstance(value, str):
+        if value.lower() == 'true':
+            return True
+        elif value.lower() == 'false':
+            return False
+    return value
+
+def _parse_route_rule(name: str, rule: str) -> RouteRule:
+    """Parses `feature=translation, max_chars=80 -> openai:some-model, gemini` from [routing.rules]."""
+    conditions, separator, targets = rule.partition("->")
+    if not separator or not targets.strip():
+        raise ConfigurationError(f"Routing rule '{name}' needs '-> provider[:model], ...'")
+    values: Dict[str, str] = {}
+    for condition in filter(None, (part.strip() for part in conditions.split(","))):
+        key, _, value = condition.partition("=")
+        values[key.strip().lower()] = value.strip()
+    unknown = set(values) - {"feature", "language", "min_chars", "max_chars", "min_tokens", "max_tokens"}
+    if unknown:
+        raise ConfigurationError(f"Routing rule '{name}' has unknown conditions: {', '.join(sorted(unknown))}")
+    try:
+        limits = {key: int(values.get(key, 0)) for key in ("min_chars", "max_chars", "min_tokens", "max_tokens")}
+    except ValueError as e:
+        raise ConfigurationError(f"Routing rule '{name}' has a non-numeric limit: {e}")
+    route_targets = []
+    for target in filter(None, (part.strip() for part in targets.split(","))):
+        provider, _, model = target.partition(":")
+        route_targets.append(RouteTarget(provider=provider.strip(), model=model.strip()))
+    return RouteRule(
+        name=name,
+        features=tuple(value.strip() for value in values.get("feature", "").split("|") if value.strip()),
+        languages=tuple(value.strip().lower() for value in values.get("language", "").split("|") if value.strip()),
+        targets=tuple(route_targets),
+        **limits
+    )
+
 def _get_config_path() -> str:
     if getattr(sys, 'frozen', False):
         application_path = os.path.join(os.path.dirname(sys.executable), "_internal")
@@ -1,9 +1,24 @@
 import json
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from core.config import Config
 from core.cache import CacheManager
-from core.errors import AnkiError
-from typing import List, Dict
+from core.connectors.anki_index import AnkiNoteIndex
+from core.errors import AnkiActionError, AnkiError
+from core.metrics import STAGE_SECONDS, record_error
+from core.scheduler import PREFETCH, SCHEDULERS, set_priority
+from typing import Any, List, Dict, NamedTuple, Optional, Tuple
+
+POOL_SIZE = 4
+MODEL_CSS = ".card { font-family: arial; font-size: 20px; text-align: center; color: black; background-color: white;}"
+DUPLICATE_ERROR = "cannot create note because it is a duplicate"  # AnkiConnect's wording, for notes rejected locally
+
+
+class NoteResult(NamedTuple):
+    note_id: Optional[int]  # None when the note was not added
+    error: str = ""
 
 class AnkiConnector:
     def __init__(self, config: Config, cache_manager: CacheManager):
@@ -11,60 +26,102 @@ class AnkiConnector:
         self.anki_config = config.anki
         self.base_url = self.anki_config.connect_url
         self.api_key = self.anki_config.api_key
+        self.timeout = self.anki_config.timeout
         self.cache = cache_manager
         self.deck_name = self.anki_config.deck_name
         self.model_name = self.anki_config.model_name
         self.fields_mapping = self.anki_config.fields
         self.deck_and_model_checked = False
+        self.note_index = AnkiNoteIndex(self, self.anki_config.index_sync_interval)
+        self._bootstrap_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers['Content-Type'] = 'application/json'
+        if self.api_key:
+            self.session.headers['Authorization'] = f'Bearer {self.api_key}'
+
+    def close(self):
+        self.session.close()
 
     def _request(self, action: str, **params) -> Dict:
         return {'action': action, 'params': params, 'version': 6}
 
     def invoke(self, action: str, **params) -> Dict:
         request_json = json.dumps(self._request(action, **params)).encode('utf-8')
-        headers = {'Content-Type': 'application/json'}
-        if self.api_key:
-            headers['Authorization'] = f'Bearer {self.api_key}'
 
         try:
-            response = requests.post(self.base_url, data=request_json, headers=headers)
+            with SCHEDULERS["anki"].slot(), STAGE_SECONDS.time("anki", action, "ankiconnect"):
+                response = self.session.post(self.base_url, data=request_json, timeout=self.timeout)
             response.raise_for_status()  # Raise HTTPError for bad responses (4xx or 5xx)
             response_data = response.json()
 
             if response_data.get('error'):
-                raise AnkiError(f"AnkiConnect Error: {response_data['error']}")
+                raise AnkiActionError(f"AnkiConnect Error: {response_data['error']}")
             return response_data.get('result')
         except requests.exceptions.RequestException as e:
+            record_error("anki", e)
             raise AnkiError(f"Error connecting to AnkiConnect: {e}")
 
-    def create_deck_if_not_exists(self, deck_name: str) -> bool:
-        if self.cache.deck_exists(deck_name):
-            print(f"Deck '{deck_name}' found in cache.")
-            return False
-        if deck_name not in self.invoke("deckNames"):
-            self.invoke("createDeck", deck=deck_name)
-            print(f"Deck '{deck_name}' created successfully.")
-            self.cache.add_deck(deck_name)
-            return True
-        else:
-            print(f"Deck '{deck_name}' already exists.")
-            self.cache.add_deck(deck_name)
-            return False
-
-    def create_model_if_not_exists(self, model_name: str, fields: List[str], card_templates: List[Dict], css: str) -> bool:
-        if self.cache.model_exists(model_name):
-            print(f"Model '{model_name}' found in cache.")
-            return False
-
-        if model_name not in self.invoke("modelNames"):
-            self.invoke("createModel", modelName=model_name, inOrderFields=fields, cardTemplates=card_templates, css=css)
-            print(f"Model '{model_name}' created successfully.")
-            self.cache.add_model(model_name)
-            return True
-        else:
-            print(f"Model '{model_name}' already exists.")
-            self.cache.add_model(model_name)
-            return False
+    def multi(self, actions: List[Dict]) -> List:
+        """Runs several actions in one round trip; each action's error is raised as AnkiActionError."""
+        results = []
+        for action, (result, error) in zip(actions, self.multi_entries(actions)):
+            if error:
+                raise AnkiActionError(f"AnkiConnect Error in {action['action']}: {error}")
+            results.append(result)
+        return results
+
+    def multi_entries(self, actions: List[Dict]) -> List[Tuple[Any, Optional[str]]]:
+        """Runs several actions in one round trip and returns (result, error) per action, without raising action errors."""
+        entries = []
+        for result in self.invoke("multi", actions=actions):
+            # With version 6 each entry is wrapped as {"result": ..., "error": ...}
+            if isinstance(result, dict) and set(result) == {"result", "error"}:
+                entries.append((result["result"], result["error"]))
+            else:
+                entries.append((result, None))
+        return entries
+
+    def start_bootstrap(self):
+        """Verifies the deck and model in the background so the first card does not pay for it."""
+        threading.Thread(target=self._bootstrap_in_background, name="anki-bootstrap", daemon=True).start()
+
+    def _bootstrap_in_background(self):
+        set_priority(PREFETCH)
+        try:
+            self.ensure_deck_and_model()
+            self.note_index.sync()
+        except AnkiError as e:
+            print(f"Anki bootstrap deferred until the first note: {e}")
+
+    def ensure_deck_and_model(self):
+        """Checks the deck and model with one multi call and creates whichever is missing with another."""
+        with self._bootstrap_lock:
+            if self.deck_and_model_checked:
+                return
+            deck_known = self.cache.deck_exists(self.deck_name)
+            model_known = self.cache.model_exists(self.model_name)
+            create_actions = []
+            if not (deck_known and model_known):
+                deck_names, model_names = self.multi([self._request("deckNames"), self._request("modelNames")])
+                if not deck_known and self.deck_name not in deck_names:
+                    create_actions.append(self._request("createDeck", deck=self.deck_name))
+                if not model_known and self.model_name not in model_names:
+                    create_actions.append(self._request(
+                        "createModel",
+                        modelName=self.model_name,
+                        inOrderFields=list(self.fields_mapping.values()),
+                        cardTemplates=self._generate_card_templates(),
+                        css=MODEL_CSS,
+                    ))
+                if create_actions:
+                    self.multi(create_actions)
+                    print(f"Created in Anki: {', '.join(action['action'] for action in create_actions)}")
+                self.cache.add_deck(self.deck_name)
+                self.cache.add_model(self.model_name)
+            self.deck_and_model_checked = True
 
     def _generate_card_templates(self) -> List[Dict]:
         """Generates card templates for Anki model."""
@@ -105,15 +162,7 @@ class AnkiConnector:
             "Back": back_template,
         }]
 
-    def add_note_to_anki(self, word: str, definition: str, context: str, context_translation: str) -> int:
-        if not self.deck_and_model_checked:
-            self.create_deck_if_not_exists(self.deck_name)
-            model_fields = list(self.fields_mapping.values())
-            card_templates = self._generate_card_templates()
-            css = ".card { font-family: arial; font-size: 20px; text-align: center; color: black; background-color: white;}"
-            self.create_model_if_not_exists(self.model_name, model_fields, card_templates, css)
-            self.deck_and_model_checked = True
-
+    def build_note(self, word: str, definition: str, context: str, context_translation: str) -> Dict:
         fields = {}
         for key, anki_field_name in self.fields_mapping.items():
             if key == '_text':
@@ -125,7 +174,7 @@ class AnkiConnector:
             elif key == '_context_translation':
                 fields[anki_field_name] = context_translation
 
-        note = {
+        return {
             "deckName": self.deck_name,
             "modelName": self.model_name,
             "fields": fields,
@@ -135,4 +184,41 @@ class AnkiConnector:
             "tags": ["goldendict"]
         }
 
-        return self.invoke("addNote", note=note)
\ No newline at end of file
+    def add_notes(self, notes: List[Dict]) -> List[NoteResult]:
+        """Adds notes built by build_note, in one addNotes call when all of them are valid.
+
+        AnkiConnect fails the whole call when any note is a duplicate or invalid, possibly after
+        adding the others. The note index is then re-synced to find the notes that did go in (note
+        ids are creation times in milliseconds), and the rest are added one by one, so each note
+        gets its own result and error.
+        """
+        self.note_index.sync_if_stale()
+        text_field = self.fields_mapping['_text']
+        # Known duplicates are answered locally and never sent
+        results = [NoteResult(None, DUPLICATE_ERROR)] * len(notes)
+        pending = [index for index, note in enumerate(notes) if not self.note_index.contains(note["fields"][text_field])]
+        if not pending:
+            return results
+        self.ensure_deck_and_model()
+        started_ms = int(time.time() * 1000)
+        try:
+            entries = [(note_id, None if note_id else "rejected by Anki")
+                       for note_id in self.invoke("addNotes", notes=[notes[index] for index in pending])]
+        except AnkiActionError as e:
+            print(f"Anki rejected the addNotes batch ({e}); adding its notes one by one")
+            self.note_index.sync()
+            retry = []
+            for index in pending:
+                note_id = self.note_index.note_id(notes[index]["fields"][text_field])
+                if note_id is None:
+                    retry.append(index)
+                else:
+                    # Added by the failed call itself, or by someone else before it
+                    results[index] = NoteResult(note_id) if note_id >= started_ms else NoteResult(None, DUPLICATE_ERROR)
+            pending = retry
+            entries = self.multi_entries([self._request("addNote", note=notes[index]) for index in pending]) if pending else []
+        for index, (note_id, error) in zip(pending, entries):
+            results[index] = NoteResult(note_id, "" if note_id else str(error or "rejected by Anki"))
+            if note_id:
+                self.note_index.add(notes[index]["fields"][text_field], note_id)
+        return results
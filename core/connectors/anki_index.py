@@ -0,0 +1,114 @@
+import math
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from core.errors import AnkiError
+from core.scheduler import PREFETCH, set_priority
+
+DAY_SECONDS = 86400
+FAILED_SYNC_BACKOFF = 30.0
+_TAGS = re.compile(r"<[^>]+>")
+
+def normalize_term(text: str) -> str:
+    return " ".join(_TAGS.sub("", text or "").split()).lower()
+
+
+class AnkiNoteIndex:
+    """In-memory index of the `_text` field of every note in the configured deck.
+
+    The first sync reads all notes; later syncs list note ids (cheap) to pick up additions and
+    deletions, and use an `edited:N` query to re-read only notes whose modification time moved.
+    """
+
+    def __init__(self, connector, sync_interval: float):
+        self.connector = connector
+        self.sync_interval = sync_interval
+        self.text_field = connector.fields_mapping.get('_text', 'Text')
+        self.notes: Dict[int, Tuple[str, int]] = {}  # note id -> (normalized term, mod time)
+        self.terms: Dict[str, int] = {}  # normalized term -> note id
+        self.last_sync: Optional[float] = None
+        self._retry_after = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.last_sync is not None
+
+    def contains(self, term: str) -> bool:
+        return normalize_term(term) in self.terms
+
+    def note_id(self, term: str) -> Optional[int]:
+        return self.terms.get(normalize_term(term))
+
+    def known_terms(self, terms: Iterable[str]) -> Set[str]:
+        """Returns the given terms (as passed in) that already have a note; never touches the network."""
+        return {term for term in terms if normalize_term(term) in self.terms}
+
+    def add(self, term: str, note_id: int):
+        with self._lock:
+            self._put(note_id, normalize_term(term), int(time.time()))
+
+    def sync_if_stale(self):
+        """Starts a background sync when the index is older than the sync interval."""
+        now = time.time()
+        if (self.last_sync is None or now - self.last_sync > self.sync_interval) and now >= self._retry_after:
+            if not self._sync_lock.locked():
+                threading.Thread(target=self._sync_in_background, name="anki-index-sync", daemon=True).start()
+
+    def _sync_in_background(self):
+        set_priority(PREFETCH)
+        try:
+            self.sync()
+        except AnkiError as e:
+            # Anki is often closed; do not retry on every lookup
+            self._retry_after = time.time() + min(self.sync_interval, FAILED_SYNC_BACKOFF)
+            print(f"Anki note index sync skipped: {e}")
+
+    def sync(self):
+        with self._sync_lock:
+            started_at = time.time()
+            deck_query = f'"deck:{self.connector.deck_name}"'
+            if self.last_sync is None:
+                note_ids = self.connector.invoke("findNotes", query=deck_query)
+                edited_ids = []
+            else:
+                days = max(1, math.ceil((started_at - self.last_sync) / DAY_SECONDS))
+                note_ids, edited_ids = self.connector.multi([
+                    self.connector._request("findNotes", query=deck_query),
+                    self.connector._request("findNotes", query=f"{deck_query} edited:{days}"),
+                ])
+            current_ids = set(note_ids)
+            with self._lock:
+                known_ids = set(self.notes)
+                for note_id in known_ids - current_ids:
+                    self._remove(note_id)
+            to_fetch = (current_ids - known_ids) | (set(edited_ids) & known_ids)
+            if to_fetch:
+                self._update(self.connector.invoke("notesInfo", notes=sorted(to_fetch)))
+            self.last_sync = started_at
+            print(f"Anki note index synced: {len(self.notes)} notes ({len(to_fetch)} fetched).")
+
+    def _update(self, notes_info: List[Dict]):
+        with self._lock:
+            for note in notes_info:
+                if not note:
+                    continue
+                note_id = note["noteId"]
+                mod = note.get("mod", 0)
+                if note_id in self.notes and self.notes[note_id][1] >= mod:
+                    continue
+                value = note.get("fields", {}).get(self.text_field, {}).get("value", "")
+                self._remove(note_id)
+                self._put(note_id, normalize_term(value), mod)
+
+    def _put(self, note_id: int, term: str, mod: int):
+        self.notes[note_id] = (term, mod)
+        if term:
+            self.terms[term] = note_id
+
+    def _remove(self, note_id: int):
+        term, _ = self.notes.pop(note_id, ("", 0))
+        if self.terms.get(term) == note_id:
+            del self.terms[term]
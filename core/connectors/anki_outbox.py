@@ -0,0 +1,149 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from core.errors import AnkiActionError, AnkiError
+from core.scheduler import DEFERRED, set_priority
+
+BATCH_SIZE = 25
+RETRY_INTERVAL = 10.0
+MAX_RETRY_INTERVAL = 300.0
+LATENCY_WINDOW = 100
+MAX_ATTEMPTS = 5  # Batches Anki answered with an error before a note is given up as rejected
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    word TEXT NOT NULL,
+    note TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created_at REAL NOT NULL,
+    delivered_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    note_id INTEGER,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, id);
+"""
+
+
+class AnkiOutbox:
+    """Durable queue of notes waiting for AnkiConnect.
+
+    Notes are committed to SQLite before the request returns; a background worker delivers
+    pending notes in addNotes batches whenever Anki is reachable, backing off while it is not.
+    Notes Anki refuses are marked rejected one by one; a batch that keeps failing with an
+    AnkiConnect error (not a connection error) is rejected after MAX_ATTEMPTS tries, so one bad
+    note cannot hold up the queue. `get_connector` is called for each batch so that a rebuilt
+    connector is picked up.
+    """
+
+    def __init__(self, db_path: str, get_connector: Callable, batch_size: int = BATCH_SIZE):
+        self.get_connector = get_connector
+        self.batch_size = batch_size
+        self.reachable: Optional[bool] = None
+        self.last_attempt_at: Optional[float] = None
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="anki-outbox", daemon=True)
+            self._thread.start()
+
+    def enqueue(self, word: str, note: Dict) -> int:
+        return self.enqueue_many([(word, note)])[0]
+
+    def enqueue_many(self, items: List[tuple]) -> List[int]:
+        """Stores (word, note) pairs and wakes the worker; returns their outbox ids."""
+        now = time.time()
+        with self._lock, self._db:
+            ids = [
+                self._db.execute("INSERT INTO outbox (word, note, created_at) VALUES (?, ?, ?)", (word, json.dumps(note), now)).lastrowid
+                for word, note in items
+            ]
+        self._wake.set()
+        return ids
+
+    def is_pending(self, word: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM outbox WHERE status = 'pending' AND word = ? LIMIT 1", (word,)).fetchone() is not None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+            oldest = self._db.execute("SELECT MIN(created_at) FROM outbox WHERE status = 'pending'").fetchone()[0]
+            latencies = [row[0] for row in self._db.execute(
+                "SELECT delivered_at - created_at FROM outbox WHERE status = 'delivered' ORDER BY delivered_at DESC LIMIT ?", (LATENCY_WINDOW,)
+            )]
+        return {
+            "depth": counts.get("pending", 0),
+            "delivered": counts.get("delivered", 0),
+            "rejected": counts.get("rejected", 0),
+            "oldestPendingAge": round(time.time() - oldest, 1) if oldest else 0,
+            "lastDeliveryLatency": round(latencies[0], 3) if latencies else None,
+            "avgDeliveryLatency": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "maxDeliveryLatency": round(max(latencies), 3) if latencies else None,
+            "ankiReachable": self.reachable,
+            "lastAttemptAt": self.last_attempt_at,
+        }
+
+    def deliver_pending(self) -> int:
+        """Delivers pending notes batch by batch; returns how many were handled. Raises AnkiError if a batch could not be delivered."""
+        handled = 0
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, note FROM outbox WHERE status = 'pending' ORDER BY id LIMIT ?", (self.batch_size,)
+                ).fetchall()
+            if not rows:
+                return handled
+            self.last_attempt_at = time.time()
+            try:
+                results = self.get_connector().add_notes([json.loads(note) for _, note in rows])
+            except AnkiActionError as e:
+                # Anki is up but refused the batch; count the attempt and give up on notes that keep failing
+                self.reachable = True
+                with self._lock, self._db:
+                    self._db.executemany("UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?", [(str(e), row_id) for row_id, _ in rows])
+                    self._db.execute("UPDATE outbox SET status = 'rejected', delivered_at = ? WHERE status = 'pending' AND attempts >= ?", (time.time(), MAX_ATTEMPTS))
+                raise
+            except AnkiError as e:
+                self.reachable = False
+                with self._lock, self._db:
+                    self._db.executemany("UPDATE outbox SET last_error = ? WHERE id = ?", [(str(e), row_id) for row_id, _ in rows])
+                raise
+            self.reachable = True
+            now = time.time()
+            with self._lock, self._db:
+                for (row_id, _), result in zip(rows, results):
+                    if result.note_id:
+                        self._db.execute("UPDATE outbox SET status = 'delivered', delivered_at = ?, note_id = ?, attempts = attempts + 1 WHERE id = ?", (now, result.note_id, row_id))
+                    else:
+                        # Duplicates and invalid notes; retrying would not help
+                        self._db.execute("UPDATE outbox SET status = 'rejected', delivered_at = ?, attempts = attempts + 1, last_error = ? WHERE id = ?", (now, result.error, row_id))
+            handled += len(rows)
+
+    def _run(self):
+        set_priority(DEFERRED)  # Queued notes go out behind interactive AnkiConnect calls
+        retry_interval = RETRY_INTERVAL
+        while True:
+            self._wake.wait(timeout=retry_interval)
+            self._wake.clear()
+            try:
+                if self.deliver_pending():
+                    print("Anki outbox delivered pending notes.")
+                retry_interval = RETRY_INTERVAL
+            except AnkiActionError as e:
+                retry_interval = min(retry_interval * 2, MAX_RETRY_INTERVAL)
+                print(f"Anki outbox batch refused by AnkiConnect (retry in {retry_interval:.0f}s): {e}")
+            except AnkiError as e:
+                retry_interval = min(retry_interval * 2, MAX_RETRY_INTERVAL)
+                print(f"Anki outbox waiting for AnkiConnect (retry in {retry_interval:.0f}s): {e}")
+            except Exception as e:
+                print(f"Error delivering Anki outbox: {e}")
@@ -17,6 +17,10 @@ class AnkiError(Exception):
     """Base class for exceptions related to Anki interactions."""
     pass
 
+class AnkiActionError(AnkiError):
+    """Raised when AnkiConnect is reachable but answers an action with an error."""
+    pass
+
 class ConfigurationError(Exception):
     """Base class for exceptions related to configuration."""
     pass
@@ -27,4 +31,12 @@ class CacheError(Exception):
 
 class TranslationError(Exception):
     """Base class for exceptions related to translation."""
-    pass
\ No newline at end of file
+    pass
+
+class IncompleteResultError(TranslationError):
+    """Raised when some sentences of a text got no result; carries the merged result of the others."""
+    def __init__(self, failed: int, data: dict, elapsed: float):
+        super().__init__(f"{failed} sentence(s) got no result")
+        self.failed = failed
+        self.data = data
+        self.elapsed = elapsed
@@ -1,5 +1,6 @@
 import json
 import re
+from typing import List
 from core.errors import JSONParsingError
 
 def remove_trailing_commas(json_string: str) -> str:
@@ -11,4 +12,24 @@ def safe_json_loads(json_string: str, error_message: str = "Error decoding JSON"
     try:
         return json.loads(remove_trailing_commas(json_string))
     except json.JSONDecodeError as e:
-        raise JSONParsingError(f"{error_message}: {e}")
\ No newline at end of file
+        raise JSONParsingError(f"{error_message}: {e}")
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[。！？])|(?<=[.!?])\s+')
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "prof.", "st.", "vs.", "etc.", "e.g.", "i.e.", "no."}
+
+def split_sentences(text: str) -> List[str]:
+    """Splits text into sentences on English and CJK terminal punctuation, keeping common abbreviations intact."""
+    sentences = []
+    pending = ""
+    for part in _SENTENCE_BOUNDARY.split(text.strip()):
+        if not part or not part.strip():
+            continue
+        pending = f"{pending} {part.strip()}" if pending else part.strip()
+        last_token = pending.rsplit(None, 1)[-1].lower()
+        if last_token in _ABBREVIATIONS:
+            continue
+        sentences.append(pending)
+        pending = ""
+    if pending:
+        sentences.append(pending)
+    return sentences
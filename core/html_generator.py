@@ -3,9 +3,11 @@ import json
 import os
 import sys
 from core.config import Config
-from typing import Dict, List, Callable, Optional, NamedTuple
+from typing import Dict, List, Callable, Optional, NamedTuple, Set
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from settings.settings import get_settings_handlers
+from core.profiling import span
+from core.text_diff import diff_tokens
 
 # --- Data Structures ---
 class WordData(NamedTuple):
@@ -56,9 +58,15 @@ def load_content(file_name: str) -> str:
         print(f"Error: file not found at {full_path}")
         return ""
 
-def create_anki_link(word: str, definition: str) -> str:
-    """Creates an Anki link with the given word and definition."""
-    return f'<a href="#" class="highlighted-term" data-definition="{definition}">{word}</a>'
+def compression_dictionary() -> bytes:
+    """Returns the markup every generated page repeats (templates, inlined CSS and JS), to prime page compression."""
+    templates = "".join(env.loader.get_source(env, name)[0] for name in ("grammar_check.html", "goldendict_output.html"))
+    return (templates + load_content("styles.css") + load_content("scripts.js")).encode("utf-8")
+
+def create_anki_link(word: str, definition: str, known: bool = False) -> str:
+    """Creates an Anki link with the given word and definition, marked when the word already has a note."""
+    css_class = "highlighted-term known-term" if known else "highlighted-term"
+    return f'<a href="#" class="{css_class}" data-definition="{definition}">{word}</a>'
 
 def highlight_words(text: str, words_data: List[WordData], word_highlighter: Optional[Callable[[str, List[WordData]], str]]) -> str:
     """Highlights words in the text using the provided highlighting function.
@@ -67,8 +75,10 @@ def highlight_words(text: str, words_data: List[WordData], word_highlighter: Opt
         return text
     return word_highlighter(text, words_data)
 
-def create_word_highlighter(compiled_pattern: re.Pattern) -> Callable[[str, List[WordData]], str]:
+def create_word_highlighter(compiled_pattern: re.Pattern, known_terms: Optional[Set[str]] = None) -> Callable[[str, List[WordData]], str]:
     """Creates a word highlighting function based on a compiled regex pattern."""
+    known = {term.lower() for term in known_terms or ()}
+
     def word_highlighter(text: str, words_data: List[WordData]) -> str:
         """Highlights words in the text based on the pre-compiled pattern."""
         word_to_definition = {word_data.word: word_data.definition for word_data in words_data}
@@ -77,7 +87,7 @@ def create_word_highlighter(compiled_pattern: re.Pattern) -> Callable[[str, List
             """Replaces a matched word with an Anki link."""
             word = match.group(0)
             definition = word_to_definition.get(word, "")
-            return create_anki_link(word, definition)
+            return create_anki_link(word, definition, word.lower() in known)
 
         return compiled_pattern.sub(replace_with_link, text)
     return word_highlighter
@@ -95,15 +105,22 @@ def generate_goldendict_html(
     audio_time: float = 0,
     compiled_pattern: Optional[re.Pattern] = None,
     grammar_check_data: Dict = None,
-    grammar_check_time: float = 0
+    grammar_check_time: float = 0,
+    known_terms: Optional[Set[str]] = None,
+    context_term: str = "",
+    context_definition: str = ""
 ) -> str:
-    """Generates the complete HTML output for GoldenDict."""
-    template = env.get_template("goldendict_output.html")
-    css_content = load_content("styles.css")
-    js_content = load_content("scripts.js")
-    settings_handlers = get_settings_handlers(config)
-    word_highlighter = create_word_highlighter(compiled_pattern) if compiled_pattern else None
-    highlighted_text = highlight_words(text, words, word_highlighter)
+    """Generates the complete HTML output for GoldenDict; `context_term` heads it with one word's definition in `text`."""
+    with span("render.assets"):
+        template = env.get_template("goldendict_output.html")
+        css_content = load_content("styles.css")
+        js_content = load_content("scripts.js")
+        settings_handlers = get_settings_handlers(config)
+    snapshot = config.snapshot
+    anki_config = config.anki
+    with span("render.highlight", words=len(words)):
+        word_highlighter = create_word_highlighter(compiled_pattern, known_terms) if compiled_pattern else None
+        highlighted_text = highlight_words(text, words, word_highlighter)
 
     # Extract corrected sentence and guide if available
     corrected_sentence = ""
@@ -112,31 +129,35 @@ def generate_goldendict_html(
         corrected_sentence = grammar_check_data.get("CorrectedSentence", "")
         correction_guide = grammar_check_data.get("CorrectionGuide", "")
 
-    return template.render(
-        settings_handlers=settings_handlers,
-        css_content=css_content,
-        highlighted_text=highlighted_text,
-        translation=translation,
-        audio_file_path=audio_file_path,
-        autoplay=config.audio.autoplay,
-        translation_time=translation_time,
-        analysis_time=analysis_time,
-        audio_time=audio_time,
-        anki_config_js=json.dumps({
-            "deckName": config.anki.deck_name,
-            "modelName": config.anki.model_name,
-            "fields": config.anki.fields,
-            "ankiConnectUrl": config.anki.connect_url,
-            "api_key": config.anki.api_key
-        }),
-        js_content=js_content,
-        show_translation=config.html_template.show_translation,
-        show_timing_info=config.html_template.show_timing_info,
-        grammar_check_time=grammar_check_time,
-        original_text=text if grammar_check_data else '',  # Pass original text if grammar check data is available
-        corrected_text=corrected_sentence,  # Pass corrected sentence
-        correction_guide=correction_guide  # Pass correction guide
-    )
+    with span("render.template"):
+        return template.render(
+            settings_handlers=settings_handlers,
+            css_content=css_content,
+            highlighted_text=highlighted_text,
+            translation=translation,
+            audio_file_path=audio_file_path,
+            autoplay=snapshot.audio.autoplay,
+            word_audio_enabled=snapshot.audio.autoplay and bool(config.get_setting('ttsEnabled', True)),
+            translation_time=translation_time,
+            analysis_time=analysis_time,
+            audio_time=audio_time,
+            anki_config_js=json.dumps({
+                "deckName": anki_config.deck_name,
+                "modelName": anki_config.model_name,
+                "fields": anki_config.fields,
+                "ankiConnectUrl": anki_config.connect_url,
+                "api_key": anki_config.api_key
+            }),
+            js_content=js_content,
+            show_translation=snapshot.html_template.show_translation,
+            show_timing_info=snapshot.html_template.show_timing_info,
+            grammar_check_time=grammar_check_time,
+            original_text=text if grammar_check_data else '',  # Pass original text if grammar check data is available
+            corrected_text=corrected_sentence,  # Pass corrected sentence
+            correction_guide=correction_guide,  # Pass correction guide
+            context_term=context_term,
+            context_definition=context_definition
+        )
 
 def generate_grammar_check_html(original_text: str, config: Config, grammar_check_data: Dict = None, grammar_check_time: float = None) -> str:
     """Generates the HTML output for grammar check results, reusing goldendict_output.html."""
@@ -149,8 +170,11 @@ def generate_grammar_check_html(original_text: str, config: Config, grammar_chec
     corrected_sentence = ""
     correction_guide = ""
     if grammar_check_data:
-        corrected_sentence = grammar_check_data.get("CorrectedSentence", "")
+        # The edits are highlighted from a local diff; strip any bold markup the model added anyway
+        corrected_sentence = grammar_check_data.get("CorrectedSentence", "").replace("**", "")
         correction_guide = grammar_check_data.get("CorrectionGuide", "")
+    with span("render.diff"):
+        diff = diff_tokens(original_text, corrected_sentence) if corrected_sentence else []
 
     # Handle None for grammar_check_time here:
     if grammar_check_time is None:
@@ -161,6 +185,7 @@ def generate_grammar_check_html(original_text: str, config: Config, grammar_chec
         css_content=css_content,
         original_text=original_text,
         translation=corrected_sentence,  # Use corrected text as translation
+        diff=diff,
         correction_guide=correction_guide,
         audio_file_path="",  # No audio for grammar check
         autoplay=False,
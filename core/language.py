@@ -0,0 +1,75 @@
+import re
+from functools import lru_cache
+from typing import Dict
+
+UNKNOWN = "Unknown"
+ENGLISH = "English"
+LATIN = "Latin"  # Latin script with diacritics: French, German, Spanish, Vietnamese, ...
+CHINESE = "Chinese"
+JAPANESE = "Japanese"
+KOREAN = "Korean"
+RUSSIAN = "Russian"  # Any Cyrillic-script text
+
+# Share of letters (not of raw characters) a script needs before it decides the language
+CJK_THRESHOLD = 0.1
+KANA_THRESHOLD = 0.05
+DIACRITIC_THRESHOLD = 0.03
+# Script shares settle within the first few hundred characters, so longer text is only sampled
+SAMPLE_CHARS = 512
+
+_ASCII_NON_LETTERS = bytes(c for c in range(128) if not chr(c).isalpha())
+
+# One alternation, so a single regex pass counts every script; each match is a run of one script
+_SCRIPT_RUNS = re.compile(
+    r"(?P<han>[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)"
+    r"|(?P<kana>[\u3040-\u309f\u30a0-\u30ff\u31f0-\u31ff\uff66-\uff9f]+)"
+    r"|(?P<hangul>[\uac00-\ud7af\u1100-\u11ff\u3130-\u318f]+)"
+    r"|(?P<cyrillic>[\u0400-\u052f]+)"
+    r"|(?P<latin>[A-Za-z]+)"
+    r"|(?P<latin_ext>[\u00c0-\u00d6\u00d8-\u00f6\u00f8-\u024f\u1e00-\u1eff]+)"
+)
+
+def count_scripts(text: str) -> Dict[str, int]:
+    """Counts letters per script (han, kana, hangul, cyrillic, latin, latin_ext) in one pass."""
+    counts = dict.fromkeys(_SCRIPT_RUNS.groupindex, 0)
+    for match in _SCRIPT_RUNS.finditer(text):
+        counts[match.lastgroup] += match.end() - match.start()
+    return counts
+
+def detect_language(text: str) -> str:
+    """
+    Detects the language of the given text from the scripts its letters belong to.
+
+    Args:
+        text: The text to analyze. Only the first SAMPLE_CHARS characters are inspected.
+
+    Returns:
+        One of "Chinese", "Japanese", "Korean", "Russian", "Latin" (accented Latin script),
+        "English", or "Unknown" when the text has no letters at all.
+    """
+    return detect_sample_language(text[:SAMPLE_CHARS])
+
+# Keyed by the sample, so long texts are not kept alive by the cache and texts sharing a prefix share an entry
+@lru_cache(maxsize=4096)
+def detect_sample_language(sample: str) -> str:
+    """Detects the language of a sample of at most SAMPLE_CHARS characters; see detect_language."""
+    if sample.isascii():
+        # Plain ASCII is the common case; counting its letters needs no regex at all
+        return ENGLISH if sample.encode("ascii").translate(None, _ASCII_NON_LETTERS) else UNKNOWN
+    counts = count_scripts(sample)
+    letters = sum(counts.values())
+    if not letters:
+        return UNKNOWN
+    # Japanese mixes kana into Han text, so any noticeable kana decides it before Han does
+    if counts["kana"] / letters > KANA_THRESHOLD:
+        return JAPANESE
+    if counts["hangul"] / letters > CJK_THRESHOLD:
+        return KOREAN
+    if counts["han"] / letters > CJK_THRESHOLD:
+        return CHINESE
+    latin = counts["latin"] + counts["latin_ext"]
+    if counts["cyrillic"] > latin:
+        return RUSSIAN
+    if latin and counts["latin_ext"] / latin > DIACRITIC_THRESHOLD:
+        return LATIN
+    return ENGLISH if latin else UNKNOWN
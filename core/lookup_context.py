@@ -0,0 +1,98 @@
+import re
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from core.html_generator import WordData
+
+_EDGE_PUNCTUATION = re.compile(r"^[^\w]+|[^\w]+$")
+_SUFFIXES = (("ies", "y"), ("es", ""), ("s", ""), ("ed", ""), ("ing", ""))  # Tried in order, first match wins
+
+
+class ContextMatch(NamedTuple):
+    term: str  # As analyzed in the sentence
+    definition: str
+    sentence: str
+    translation: str
+
+
+def normalize(text: str) -> str:
+    """Lowercases, collapses whitespace and drops punctuation around the text."""
+    return _EDGE_PUNCTUATION.sub("", " ".join(text.split()).lower())
+
+def _stem(word: str) -> str:
+    # Just enough to match "cats" or "looked" against the analyzed "cat" or "look"
+    if word.endswith(("'s", "’s")):
+        word = word[:-2]
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    return word
+
+def stem_key(text: str) -> str:
+    return " ".join(_stem(word) for word in normalize(text).split())
+
+
+class LookupContext:
+    """Short-lived memory of recently analyzed sentences, their words and translations.
+
+    Looking up a single word or short phrase right after the sentence it came from is answered
+    from that sentence's analysis: newest sentences first, exact term matches before matches of
+    lightly stemmed English words. Entries expire `ttl_seconds` after the sentence was last looked
+    up. `store` holds the entries (sentence -> JSON-serializable dict, oldest first), so several
+    workers can share them through the shared cache.
+    """
+
+    def __init__(self, store: MutableMapping, ttl_seconds: float = 600, max_sentences: int = 50):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.max_sentences = max_sentences
+        self._lock = threading.Lock()
+
+    def remember(self, sentence: str, words: Iterable[WordData], translation: str):
+        entry = {
+            "storedAt": time.time(),
+            "translation": translation,
+            "words": [[word_data.word, word_data.definition] for word_data in words],
+        }
+        if not entry["words"]:
+            return
+        with self._lock:
+            self.store.pop(sentence, None)  # Re-inserted as the newest
+            self.store[sentence] = entry
+            while len(self.store) > self.max_sentences:
+                self.store.pop(next(iter(self.store)), None)
+
+    def touch(self, sentence: str):
+        """Keeps a sentence looked up again (e.g. served from the page cache) from expiring."""
+        entry = self.store.get(sentence)
+        if entry is not None:
+            self.remember(sentence, [WordData(*word) for word in entry["words"]], entry["translation"])
+
+    def lookup(self, text: str) -> Optional[ContextMatch]:
+        key = normalize(text)
+        if not key:
+            return None
+        stemmed = stem_key(text)
+        expires_before = time.time() - self.ttl_seconds
+        for sentence in reversed(list(self.store)):
+            entry = self.store.get(sentence)
+            if entry is None:
+                continue
+            if entry["storedAt"] < expires_before:
+                break  # Older sentences expired too
+            match = self._match(key, stemmed, sentence, entry)
+            if match is not None:
+                return match
+        return None
+
+    @staticmethod
+    def _match(key: str, stemmed: str, sentence: str, entry: Dict) -> Optional[ContextMatch]:
+        words: List[List[str]] = entry["words"]
+        for word, definition in words:
+            if normalize(word) == key:
+                return ContextMatch(word, definition, sentence, entry["translation"])
+        for word, definition in words:
+            if stem_key(word) == stemmed:
+                return ContextMatch(word, definition, sentence, entry["translation"])
+        return None
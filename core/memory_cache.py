@@ -0,0 +1,100 @@
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Iterator
+from core.metrics import CACHE_BYTES, CACHE_EVICTIONS
+
+ENTRY_OVERHEAD = 104  # Bytes of OrderedDict bookkeeping per entry, on top of the key and value objects
+MAX_ZDICT_BYTES = 32768  # zlib only looks back this far
+
+
+class CompressedCache(MutableMapping):
+    """In-process LRU cache of strings, stored zlib-compressed and kept within a byte budget.
+
+    `zdict` primes the compressor with content most values share (for pages: the inlined CSS, JS
+    and template), so each entry mostly stores what is specific to it. Resident size counts the
+    key, the compressed value and a fixed per-entry overhead; the least recently used entries are
+    evicted once it exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int, level: int = 6, zdict: bytes = b"", name: str = "html"):
+        self.max_bytes = max_bytes
+        self.level = level
+        self.zdict = zdict[-MAX_ZDICT_BYTES:]
+        self.name = name
+        self.resident_bytes = 0
+        self.raw_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._raw_sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _compress(self, raw: bytes) -> bytes:
+        compressor = zlib.compressobj(self.level, zdict=self.zdict) if self.zdict else zlib.compressobj(self.level)
+        return compressor.compress(raw) + compressor.flush()
+
+    def _decompress(self, data: bytes) -> str:
+        decompressor = zlib.decompressobj(zdict=self.zdict) if self.zdict else zlib.decompressobj()
+        return (decompressor.decompress(data) + decompressor.flush()).decode("utf-8")
+
+    @staticmethod
+    def _entry_size(key: str, data: bytes) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(data) + ENTRY_OVERHEAD
+
+    def __getitem__(self, key: str) -> str:
+        with self._lock:
+            data = self._entries[key]
+            self._entries.move_to_end(key)
+        return self._decompress(data)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __setitem__(self, key: str, value: str):
+        raw = value.encode("utf-8")  # Raw size in bytes, not characters: CJK text is three bytes a character
+        data = self._compress(raw)
+        size = self._entry_size(key, data)
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                return  # Would evict everything else and still not fit
+            self._entries[key] = data
+            self._raw_sizes[key] = len(raw)
+            self.resident_bytes += size
+            self.raw_bytes += len(raw)
+            while self.resident_bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+                CACHE_EVICTIONS.inc(self.name)
+            CACHE_BYTES.set(self.resident_bytes, self.name)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                raise KeyError(key)
+            self._discard(key)
+            CACHE_BYTES.set(self.resident_bytes, self.name)
+
+    def _discard(self, key: str):
+        data = self._entries.pop(key, None)
+        if data is not None:
+            self.resident_bytes -= self._entry_size(key, data)
+            self.raw_bytes -= self._raw_sizes.pop(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "residentBytes": self.resident_bytes,
+            "maxBytes": self.max_bytes,
+            "rawBytes": self.raw_bytes,
+            "compressionRatio": round(self.raw_bytes / self.resident_bytes, 2) if self.resident_bytes else 0,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,259 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple
+
+# Seconds; spans a cached HTML hit (sub-millisecond) up to a slow provider call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PUBLISH_INTERVAL = 5.0  # Seconds between snapshots a worker publishes for the others to add up
+STALE_AFTER = 30.0  # Snapshots older than this are from a worker that stopped
+
+Values = Dict[Tuple[str, ...], Any]  # Label values -> value (a list of bucket counts and sum for histograms)
+
+
+class Registry:
+    """Holds every metric and renders them in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.metrics: List["_Metric"] = []
+
+    def register(self, metric: "_Metric"):
+        self.metrics.append(metric)
+
+    def snapshot(self) -> Dict[str, List]:
+        """Returns the raw values of every metric as JSON-serializable [label values, value] pairs."""
+        return {metric.name: [[list(labels), value] for labels, value in metric.current_values().items()] for metric in self.metrics}
+
+    def render(self, others: Iterable[Dict[str, List]] = ()) -> str:
+        """Renders every metric; `others` are snapshots of other worker processes, added label set by label set."""
+        values = {metric.name: metric.current_values() for metric in self.metrics}
+        for snapshot in others:
+            for metric in self.metrics:
+                for labels, value in snapshot.get(metric.name, ()):
+                    metric.merge(values[metric.name], tuple(labels), value)
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for suffix, labels, value in metric.samples(values):
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    """Base for metrics; label values are passed positionally in the order of `labelnames`."""
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def current_values(self) -> Values:
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(values: Values, labels: Tuple[str, ...], value: Any):
+        values[labels] = values.get(labels, 0) + value
+
+    def samples(self, values: Dict[str, Values]) -> Iterator[Tuple[str, List[Tuple[str, str]], float]]:
+        """Yields (name suffix, labels, value) from `values`, the values of every metric by name."""
+        for labels, value in values[self.name].items():
+            yield "", list(zip(self.labelnames, labels)), value
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down; with `callback`, values are computed at scrape time from the other metrics' values instead."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), registry: Registry = REGISTRY,
+                 callback: Optional[Callable[[Dict[str, Values]], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, documentation, labelnames, registry)
+        self.callback = callback
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self, values: Dict[str, Values]):
+        if self.callback is None:
+            yield from super().samples(values)
+            return
+        for labels, value in self.callback(values).items():
+            yield "", list(zip(self.labelnames, labels)), value
+
+
+class Histogram(_Metric):
+    """Counts observations into fixed buckets; each label set keeps per-bucket counts, a sum and a count."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), registry: Registry = REGISTRY,
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # One slot per bucket plus +Inf, then sum
+                state = self._values[labels] = [0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, *labels)
+
+    def value(self, *labels: str) -> float:
+        """Returns the number of observations for the label set."""
+        state = self._values.get(labels)
+        return sum(state[:-1]) if state else 0
+
+    def current_values(self) -> Values:
+        with self._lock:
+            return {labels: list(state) for labels, state in self._values.items()}
+
+    @staticmethod
+    def merge(values: Values, labels: Tuple[str, ...], value: Any):
+        state = values.get(labels)
+        values[labels] = list(value) if state is None else [a + b for a, b in zip(state, value)]
+
+    def samples(self, values: Dict[str, Values]):
+        for labels, state in values[self.name].items():
+            label_pairs = list(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                yield "_bucket", label_pairs + [("le", _format_value(bound))], cumulative
+            yield "_sum", label_pairs, state[-1]
+            yield "_count", label_pairs, cumulative
+
+
+def _format_labels(labels: List[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# --- Lookup pipeline metrics ---
+
+STAGE_SECONDS = Histogram(
+    "linguaboost_stage_duration_seconds", "Duration of one pipeline stage.", ("stage", "feature", "provider"),
+)
+REQUEST_SECONDS = Histogram(
+    "linguaboost_request_duration_seconds", "Duration of HTTP requests by endpoint.", ("endpoint",),
+)
+IN_FLIGHT = Gauge(
+    "linguaboost_requests_in_flight", "HTTP requests currently being handled, by endpoint.", ("endpoint",),
+)
+ROUTE_SECONDS = Histogram(
+    "linguaboost_route_duration_seconds", "Duration of successful provider calls by routing rule and target.", ("route", "provider", "model"),
+)
+CACHE_REQUESTS = Counter(
+    "linguaboost_cache_requests_total", "Cache lookups by cache layer and result (hit or miss).", ("cache", "result"),
+)
+CACHE_BYTES = Gauge(
+    "linguaboost_cache_resident_bytes", "Bytes held by an in-memory cache layer, compressed values included.", ("cache",),
+)
+CACHE_EVICTIONS = Counter(
+    "linguaboost_cache_evictions_total", "Entries evicted from an in-memory cache layer to stay within its byte budget.", ("cache",),
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "linguaboost_scheduler_wait_seconds", "Time calls queued for a provider, TTS or AnkiConnect slot, by priority class.", ("resource", "priority"),
+)
+SCHEDULER_QUEUE = Gauge(
+    "linguaboost_scheduler_queued", "Calls waiting for a slot, by resource and priority class.", ("resource", "priority"),
+)
+ERRORS = Counter(
+    "linguaboost_errors_total", "Errors by component and exception type.", ("component", "type"),
+)
+DEADLINE_MISSES = Counter(
+    "linguaboost_deadline_misses_total", "Lookup features that missed their deadline and were rendered without.", ("feature",),
+)
+LATE_COMPLETIONS = Counter(
+    "linguaboost_late_completions_total", "Features that finished in the background after missing their deadline, by outcome.", ("feature", "result"),
+)
+TOKENS = Counter(
+    "linguaboost_tokens_total", "Provider tokens by provider and kind (prompt, completion, cached).", ("provider", "kind"),
+)
+
+def _cache_hit_ratios(values: Dict[str, Values]) -> Dict[Tuple[str, ...], float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), count in values[CACHE_REQUESTS.name].items():
+        hits_and_lookups = totals.setdefault(cache, [0, 0])
+        hits_and_lookups[1] += count
+        if result == "hit":
+            hits_and_lookups[0] += count
+    return {(cache,): round(hits / lookups, 4) for cache, (hits, lookups) in totals.items() if lookups}
+
+CACHE_HIT_RATIO = Gauge(
+    "linguaboost_cache_hit_ratio", "Share of cache lookups that hit since startup, by cache layer.", ("cache",),
+    callback=_cache_hit_ratios,
+)
+
+def publish_periodically(store: MutableMapping, key: str, interval: float = PUBLISH_INTERVAL):
+    """Writes this process's snapshot to `store` under `key` every `interval` seconds from a daemon thread."""
+    def run():
+        while True:
+            try:
+                store[key] = {"at": time.time(), "metrics": REGISTRY.snapshot()}
+            except Exception as e:
+                print(f"Error publishing metrics: {e}")
+            time.sleep(interval)
+    threading.Thread(target=run, name="metrics-publish", daemon=True).start()
+
+def peer_snapshots(store: MutableMapping, own_key: str) -> List[Dict[str, List]]:
+    """Returns the snapshots other processes published to `store`, leaving out those of processes that stopped."""
+    snapshots = []
+    now = time.time()
+    for key in list(store):
+        entry = store.get(key)
+        if key != own_key and entry is not None and now - entry["at"] <= STALE_AFTER:
+            snapshots.append(entry["metrics"])
+    return snapshots
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+def record_error(component: str, error: BaseException):
+    ERRORS.inc(component, type(error).__name__)
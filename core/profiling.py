@@ -0,0 +1,246 @@
+import asyncio
+import contextvars
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MAX_STACK_DEPTH = 64
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("linguaboost_trace", default=None)
+
+
+class Trace:
+    """Spans (and optionally CPU stack samples) recorded while handling one request.
+
+    Spans are kept per lane: one lane per (thread, asyncio task), so spans of concurrent tasks
+    never overlap within a lane. Times are seconds relative to the start of the trace.
+    """
+
+    def __init__(self, name: str, args: Optional[Dict[str, Any]] = None):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.args = args or {}
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.spans: List[Tuple[str, float, float, int, Dict[str, Any]]] = []  # (name, start, duration, lane, args)
+        self.samples: List[Tuple[float, int, Tuple[Tuple[str, str, int], ...]]] = []  # (time, thread id, stack root first)
+        self.lanes: Dict[Tuple[int, int], Tuple[int, str]] = {}
+        self.threads: Dict[int, str] = {threading.get_ident(): threading.current_thread().name}
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop_sampling = threading.Event()
+
+    def now(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def lane(self) -> int:
+        thread_id = threading.get_ident()
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = (thread_id, id(task) if task else 0)
+        with self._lock:
+            if key not in self.lanes:
+                thread_name = threading.current_thread().name
+                self.threads.setdefault(thread_id, thread_name)
+                self.lanes[key] = (len(self.lanes) + 1, f"{thread_name} / {task.get_name()}" if task else thread_name)
+            return self.lanes[key][0]
+
+    def add_span(self, name: str, start: float, duration: float, lane: int, args: Dict[str, Any]):
+        with self._lock:
+            self.spans.append((name, start, duration, lane, args))
+
+    def start_sampling(self, interval: float):
+        self._sampler = threading.Thread(target=self._sample, args=(interval,), name="profile-sampler", daemon=True)
+        self._sampler.start()
+
+    def finish(self):
+        self.duration = self.now()
+        # The whole request as the root span of the thread that handled it
+        self.add_span(self.name, 0.0, self.duration, self.lane(), self.args)
+        self._stop_sampling.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _sample(self, interval: float):
+        while not self._stop_sampling.wait(interval):
+            frames = sys._current_frames()
+            at = self.now()
+            with self._lock:
+                thread_ids = list(self.threads)
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append((code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+                    frame = frame.f_back
+                if stack:
+                    self.samples.append((at, thread_id, tuple(reversed(stack))))
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.trace_id,
+            "name": self.name,
+            "args": self.args,
+            "startedAt": self.started_at,
+            "duration": round(self.duration or 0, 4),
+            "spans": len(self.spans),
+            "samples": len(self.samples),
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Exports the trace in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        events = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": f"LinguaBoost {self.name}"}}]
+        for lane, lane_name in self.lanes.values():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": lane, "args": {"name": lane_name}})
+        for name, start, duration, lane, args in self.spans:
+            events.append({"name": name, "cat": "linguaboost", "ph": "X", "ts": round(start * 1e6, 1),
+                           "dur": round(duration * 1e6, 1), "pid": 1, "tid": lane, "args": args})
+        trace = {"traceEvents": events, "displayTimeUnit": "ms", "otherData": self.summary()}
+        if self.samples:
+            stack_frames: Dict[str, Dict[str, Any]] = {}
+            frame_ids: Dict[Tuple, str] = {}
+            samples = []
+            for at, thread_id, stack in self.samples:
+                parent = None
+                for depth in range(len(stack)):
+                    path = stack[:depth + 1]
+                    if path not in frame_ids:
+                        frame_ids[path] = str(len(frame_ids) + 1)
+                        function, file_name, line = stack[depth]
+                        stack_frames[frame_ids[path]] = {"name": f"{function} ({file_name}:{line})", "category": "python"}
+                        if parent is not None:
+                            stack_frames[frame_ids[path]]["parent"] = parent
+                    parent = frame_ids[path]
+                samples.append({"cpu": 0, "tid": thread_id, "ts": round(at * 1e6, 1), "name": "sample", "sf": parent, "weight": 1})
+            for thread_id in {sample[1] for sample in self.samples}:
+                events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": thread_id, "args": {"name": f"{self.threads[thread_id]} (CPU samples)"}})
+            trace["stackFrames"] = stack_frames
+            trace["samples"] = samples
+        return trace
+
+    def to_speedscope(self) -> Dict[str, Any]:
+        """Exports spans (one evented profile per lane) and samples (one sampled profile per thread) for speedscope."""
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[str, int] = {}
+
+        def frame(name: str, file_name: Optional[str] = None, line: Optional[int] = None) -> int:
+            key = f"{name}\0{file_name}\0{line}"
+            if key not in frame_index:
+                frame_index[key] = len(frames)
+                frames.append({"name": name, "file": file_name, "line": line} if file_name else {"name": name})
+            return frame_index[key]
+
+        end = self.duration or self.now()
+        profiles = []
+        for lane, lane_name in sorted(self.lanes.values()):
+            events = []
+            # Outer spans first when they start together, so opens and closes nest
+            lane_spans = sorted((span for span in self.spans if span[3] == lane), key=lambda span: (span[1], -span[2]))
+            open_spans: List[Tuple[int, float]] = []
+            for name, start, duration, _, _ in lane_spans:
+                while open_spans and open_spans[-1][1] <= start:
+                    closed_frame, closed_at = open_spans.pop()
+                    events.append({"type": "C", "frame": closed_frame, "at": round(closed_at * 1e6, 1)})
+                index = frame(name)
+                events.append({"type": "O", "frame": index, "at": round(start * 1e6, 1)})
+                open_spans.append((index, min(start + duration, open_spans[-1][1] if open_spans else start + duration)))
+            while open_spans:
+                closed_frame, closed_at = open_spans.pop()
+                events.append({"type": "C", "frame": closed_frame, "at": round(closed_at * 1e6, 1)})
+            profiles.append({"type": "evented", "name": lane_name, "unit": "microseconds", "startValue": 0,
+                             "endValue": round(end * 1e6, 1), "events": events})
+        for thread_id, thread_name in self.threads.items():
+            thread_samples = [sample for sample in self.samples if sample[1] == thread_id]
+            if not thread_samples:
+                continue
+            weights = [round((thread_samples[i + 1][0] if i + 1 < len(thread_samples) else end) - sample[0], 6) * 1e3
+                       for i, sample in enumerate(thread_samples)]
+            profiles.append({
+                "type": "sampled", "name": f"{thread_name} (CPU samples)", "unit": "milliseconds",
+                "startValue": round(thread_samples[0][0] * 1e3, 3), "endValue": round(end * 1e3, 3),
+                "samples": [[frame(*entry) for entry in sample[2]] for sample in thread_samples],
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"LinguaBoost {self.name} {self.trace_id}",
+            "exporter": "linguaboost",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+class ProfileStore:
+    """Keeps the most recent retained traces, exported, oldest evicted first.
+
+    `store` holds them (trace id -> JSON-serializable exports); a shared cache mapping lets every
+    worker process serve traces recorded by the others.
+    """
+
+    def __init__(self, capacity: int, store: Optional[MutableMapping] = None):
+        self.capacity = max(1, capacity)
+        self._traces: MutableMapping[str, Dict[str, Any]] = OrderedDict() if store is None else store
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        exported = {"summary": trace.summary(), "chrome": trace.to_chrome_trace(), "speedscope": trace.to_speedscope()}
+        with self._lock:
+            self._traces[trace.trace_id] = exported
+            while len(self._traces) > self.capacity:
+                self._traces.pop(next(iter(self._traces)), None)
+
+    def get(self, trace_id: str, export_format: str = "chrome") -> Optional[Dict[str, Any]]:
+        """Returns a retained trace as Chrome trace JSON ("chrome") or speedscope JSON ("speedscope")."""
+        exported = self._traces.get(trace_id)
+        return exported[export_format] if exported is not None else None
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            trace_ids = list(self._traces)
+        return [exported["summary"] for exported in map(self._traces.get, reversed(trace_ids)) if exported is not None]
+
+
+def start_trace(name: str, args: Optional[Dict[str, Any]] = None, sample_interval: float = 0) -> Tuple[Trace, contextvars.Token]:
+    """Makes a new trace current for this context and the tasks and threads it spawns."""
+    trace = Trace(name, args)
+    if sample_interval > 0:
+        trace.start_sampling(sample_interval)
+    return trace, _current_trace.set(trace)
+
+def end_trace(trace: Trace, token: contextvars.Token):
+    trace.finish()
+    _current_trace.reset(token)
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+@contextmanager
+def span(name: str, **args):
+    """Records a span on the current trace; does nothing when the request is not being traced."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    lane = trace.lane()
+    start = trace.now()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start, trace.now() - start, lane, args)
+
+def traced(function: Callable, name: str, **args) -> Callable:
+    """Wraps a function handed to another thread so its run shows up as its own span there."""
+    def run(*call_args, **call_kwargs):
+        with span(name, **args):
+            return function(*call_args, **call_kwargs)
+    return run
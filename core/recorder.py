@@ -0,0 +1,38 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator
+
+
+class RequestRecorder:
+    """Appends one JSON line per recorded lookup; the file is written by a background thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recorder")
+
+    def record(self, entry: Dict):
+        self._writer.submit(self._write, json.dumps(entry, ensure_ascii=False))
+
+    def _write(self, line: str):
+        self._file.write(line + "\n")
+        self._file.flush()
+
+    def flush(self):
+        """Waits until queued entries are written."""
+        self._writer.submit(lambda: None).result()
+
+
+def read_recording(path: str) -> Iterator[Dict]:
+    """Yields the entries of a recording, skipping blank and truncated lines."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
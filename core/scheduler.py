@@ -0,0 +1,207 @@
+import asyncio
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Callable, Coroutine, Deque, Dict, List
+from core.metrics import SCHEDULER_QUEUE, SCHEDULER_WAIT_SECONDS
+from core.types import SchedulerConfig
+
+INTERACTIVE = 0  # A lookup someone is waiting for
+DEFERRED = 1  # Lookup work that missed its deadline, queued Anki notes
+PREFETCH = 2  # Speculative warming: pronunciations, the Anki note index
+BULK = 3  # Document jobs
+PRIORITY_NAMES = ("interactive", "deferred", "prefetch", "bulk")
+WAIT_WINDOW = 500  # Recent admissions kept per class for wait percentiles
+
+
+class PriorityScope:
+    """The priority of one unit of work; lowering it also reorders that work's queued calls."""
+
+    __slots__ = ("level",)
+
+    def __init__(self, level: int):
+        self.level = level
+
+
+_INTERACTIVE_SCOPE = PriorityScope(INTERACTIVE)  # Default of threads and requests; never lowered
+_scope: ContextVar[PriorityScope] = ContextVar("priority_scope", default=_INTERACTIVE_SCOPE)
+
+def set_priority(level: int):
+    """Sets the priority of everything the current thread (or task) runs from now on; for background thread entry points."""
+    _scope.set(PriorityScope(level))
+
+async def run_at(scope: PriorityScope, coroutine: Coroutine):
+    """Awaits the coroutine with `scope` as its priority, so the scope can be lowered while it runs."""
+    token = _scope.set(scope)
+    try:
+        return await coroutine
+    finally:
+        _scope.reset(token)
+
+def lower_priority(scope: PriorityScope, level: int):
+    """Lowers a running unit of work; its calls that are still queued wait behind higher classes from now on."""
+    if level > scope.level:
+        scope.level = level
+        for scheduler in SCHEDULERS.values():
+            scheduler.reschedule()
+
+
+class _Waiter:
+    __slots__ = ("scope", "seq", "notify", "enqueued_at", "granted", "level")
+
+    def __init__(self, scope: PriorityScope, seq: int, notify: Callable[[], None]):
+        self.scope = scope
+        self.seq = seq
+        self.notify = notify
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+        self.level = scope.level  # Class the slot was granted under
+
+
+class Scheduler:
+    """Admits calls to one resource (provider, TTS or AnkiConnect) into a fixed number of slots by priority.
+
+    Queued calls are admitted highest class first, then in arrival order. `reserved` of the slots
+    only admit interactive calls, so background work never takes the last of them; background
+    calls wait (and interactive ones overtake them) until a slot outside the reserve frees up.
+    Running calls are not interrupted. With `slots` 0 every call is admitted at once.
+    """
+
+    def __init__(self, resource: str, slots: int = 0, interactive_share: float = 0.0):
+        self.resource = resource
+        self.running = 0
+        self.background_running = 0
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._admitted = [0] * len(PRIORITY_NAMES)
+        self._waits: List[Deque[float]] = [deque(maxlen=WAIT_WINDOW) for _ in PRIORITY_NAMES]
+        self._lock = threading.Lock()
+        self.configure(slots, interactive_share)
+
+    def configure(self, slots: int, interactive_share: float):
+        with self._lock:
+            self.slots = max(0, slots)
+            # At least one slot stays open to background work
+            self.reserved = min(self.slots - 1, math.ceil(self.slots * interactive_share)) if self.slots > 1 else 0
+            self._dispatch()
+
+    def reschedule(self):
+        with self._lock:
+            self._dispatch()
+
+    @contextmanager
+    def slot(self):
+        """Holds a slot for a blocking call, at the priority of the calling thread."""
+        event = threading.Event()
+        waiter = self._enqueue(event.set)
+        event.wait()
+        try:
+            yield
+        finally:
+            self._release(waiter.level)
+
+    @asynccontextmanager
+    async def slot_async(self):
+        """Holds a slot for a call awaited on an event loop, at the priority of the calling task."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = self._enqueue(lambda: loop.call_soon_threadsafe(_resolve, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.granted:
+                    self._waiting.remove(waiter)
+                    self._update_queue_gauge()
+                    raise
+            self._release(waiter.level)
+            raise
+        try:
+            yield
+        finally:
+            self._release(waiter.level)
+
+    def _enqueue(self, notify: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(_scope.get(), next(self._seq), notify)
+        with self._lock:
+            self._waiting.append(waiter)
+            self._dispatch()
+        return waiter
+
+    def _admissible(self, level: int) -> bool:
+        if self.slots == 0:
+            return True
+        if self.running >= self.slots:
+            return False
+        return level == INTERACTIVE or self.background_running < self.slots - self.reserved
+
+    def _dispatch(self):
+        # Called with the lock held; the queue is short, so the next waiter is found by a scan
+        while self._waiting:
+            waiter = min(self._waiting, key=lambda queued: (queued.scope.level, queued.seq))
+            level = waiter.scope.level
+            if not self._admissible(level):
+                break  # Every other waiter is of the same or a lower class
+            self._waiting.remove(waiter)
+            self.running += 1
+            if level != INTERACTIVE:
+                self.background_running += 1
+            wait = time.perf_counter() - waiter.enqueued_at
+            self._admitted[level] += 1
+            self._waits[level].append(wait)
+            SCHEDULER_WAIT_SECONDS.observe(wait, self.resource, PRIORITY_NAMES[level])
+            waiter.level = level
+            waiter.granted = True
+            waiter.notify()
+        self._update_queue_gauge()
+
+    def _release(self, level: int):
+        with self._lock:
+            self.running -= 1
+            if level != INTERACTIVE:
+                self.background_running -= 1
+            self._dispatch()
+
+    def _update_queue_gauge(self):
+        counts = [0] * len(PRIORITY_NAMES)
+        for waiter in self._waiting:
+            counts[waiter.scope.level] += 1
+        for level, count in enumerate(counts):
+            SCHEDULER_QUEUE.set(count, self.resource, PRIORITY_NAMES[level])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            waiting = [0] * len(PRIORITY_NAMES)
+            for waiter in self._waiting:
+                waiting[waiter.scope.level] += 1
+            classes = {}
+            for level, name in enumerate(PRIORITY_NAMES):
+                waits = sorted(self._waits[level])
+                classes[name] = {
+                    "waiting": waiting[level],
+                    "admitted": self._admitted[level],
+                    "p50WaitMs": round(waits[len(waits) // 2] * 1000, 1) if waits else 0,
+                    "p95WaitMs": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0,
+                }
+            return {"slots": self.slots, "reserved": self.reserved, "running": self.running,
+                    "backgroundRunning": self.background_running, "classes": classes}
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+SCHEDULERS: Dict[str, Scheduler] = {resource: Scheduler(resource) for resource in ("provider", "tts", "anki")}
+
+def configure_schedulers(config: SchedulerConfig):
+    """Applies the configured slots; when disabled, calls are admitted without limit as before."""
+    for resource, slots in (("provider", config.provider_slots), ("tts", config.tts_slots), ("anki", config.anki_slots)):
+        SCHEDULERS[resource].configure(slots if config.enabled else 0, config.interactive_share)
+
+def scheduler_stats() -> Dict[str, Dict]:
+    return {resource: scheduler.stats() for resource, scheduler in SCHEDULERS.items()}
@@ -1,16 +1,37 @@
+import asyncio
+import hashlib
 import os
 import tempfile
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from edge_tts.communicate import Communicate
 from core.config import Config
 from core.types import AudioConfig
-from typing import Tuple
+from typing import Dict, Iterable, Tuple
 from core.errors import AIProviderError
+from core.metrics import STAGE_SECONDS, record_cache, record_error
+from core.profiling import span
+from core.scheduler import PREFETCH, SCHEDULERS, set_priority
+
+WORD_AUDIO_DIR = "linguaboost_audio"
+BUDGET_WINDOW = 60.0
+TRIM_INTERVAL = 100  # Word audio files written between trims of the directory
 
 class AudioService:
     def __init__(self, config: Config):
         self.config = config
         self.audio_config = config.audio
+        self.word_audio_dir = os.path.join(tempfile.gettempdir(), WORD_AUDIO_DIR)
+        os.makedirs(self.word_audio_dir, exist_ok=True)
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=max(1, self.audio_config.prefetch_workers), thread_name_prefix="tts-prefetch")
+        self._in_flight: Dict[str, Future] = {}
+        self._synthesis_times = deque()
+        self._writes_since_trim = 0
+        self._lock = threading.Lock()
+        # Files left by earlier runs count against the cap too
+        threading.Thread(target=self.trim_word_audio, name="word-audio-trim", daemon=True).start()
 
     async def generate_audio(self, text: str) -> Tuple[str, float]:
         start_time = time.perf_counter()
@@ -21,8 +42,132 @@ class AudioService:
         audio_file_path = os.path.join(temp_dir, next(tempfile._get_candidate_names()) + ".mp3")
         try:
             communicator = Communicate(text, voice)
-            await communicator.save(audio_file_path)
+            async with SCHEDULERS["tts"].slot_async():
+                with span("tts", voice=voice), STAGE_SECONDS.time("tts", "sentence", "edge-tts"):
+                    await communicator.save(audio_file_path)
         except Exception as e:
             print(f"Error generating audio: {e}")
+            record_error("tts", e)
+            raise AIProviderError(f"Error generating audio with edge-tts: {e}")
+        return audio_file_path, time.perf_counter() - start_time
+
+    def word_audio_path(self, word: str) -> str:
+        """Returns where the pronunciation of `word` is cached for the current voice."""
+        key = hashlib.sha1(f"{self.config.voice_default}\0{word.strip().lower()}".encode("utf-8")).hexdigest()
+        return os.path.join(self.word_audio_dir, f"{key}.mp3")
+
+    def store_word_audio(self, word: str, data: bytes) -> bool:
+        """Caches a pronunciation synthesized elsewhere (e.g. from a cache snapshot) unless one is cached already."""
+        path = self.word_audio_path(word)
+        if os.path.exists(path):
+            return False
+        temp_path = f"{path}.{threading.get_ident()}.part"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        self._count_write()
+        return True
+
+    def prefetch(self, words: Iterable[str]) -> int:
+        """Queues pronunciations that are not cached yet, within the per-minute synthesis budget; returns how many were queued."""
+        if not self.audio_config.prefetch_enabled:
+            return 0
+        queued = 0
+        for word in dict.fromkeys(word.strip().lower() for word in words if word.strip()):
+            with self._lock:
+                if word in self._in_flight or os.path.exists(self.word_audio_path(word)) or not self._take_budget():
+                    continue
+                self._in_flight[word] = self._prefetch_pool.submit(self._synthesize_word, word)
+            queued += 1
+        return queued
+
+    def close(self):
+        """Lets queued prefetches finish (their files serve the replacement too), then stops the prefetch threads."""
+        self._prefetch_pool.shutdown(wait=False)
+
+    async def get_word_audio(self, word: str) -> str:
+        """Returns the cached pronunciation of `word`, waiting for a prefetch in progress or synthesizing it now."""
+        word = word.strip().lower()
+        path = self.word_audio_path(word)
+        try:
+            os.utime(path)  # Marks it recently played, so trimming deletes it last
+            record_cache("word_audio", True)
+            return path
+        except FileNotFoundError:
+            pass
+        record_cache("word_audio", False)
+        with self._lock:
+            future = self._in_flight.get(word)
+        if future is not None:
+            return await asyncio.wrap_future(future)
+        await self._save_word_audio(word, path)
+        return path
+
+    def trim_word_audio(self) -> int:
+        """Deletes the least recently played word audio files beyond word_audio_max_mb; returns how many were deleted."""
+        files = []
+        with os.scandir(self.word_audio_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".mp3"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        budget = self.audio_config.word_audio_max_mb * 1024 * 1024
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= budget:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass  # Trimmed by another worker
+            total -= size
+        return removed
+
+    def _count_write(self):
+        with self._lock:
+            self._writes_since_trim += 1
+            if self._writes_since_trim < TRIM_INTERVAL:
+                return
+            self._writes_since_trim = 0
+        self.trim_word_audio()
+
+    def _take_budget(self) -> bool:
+        now = time.monotonic()
+        while self._synthesis_times and now - self._synthesis_times[0] > BUDGET_WINDOW:
+            self._synthesis_times.popleft()
+        if len(self._synthesis_times) >= self.audio_config.prefetch_per_minute:
+            return False
+        self._synthesis_times.append(now)
+        return True
+
+    def _synthesize_word(self, word: str) -> str:
+        set_priority(PREFETCH)  # Runs on a prefetch pool thread
+        path = self.word_audio_path(word)
+        try:
+            asyncio.run(self._save_word_audio(word, path))
+            return path
+        finally:
+            with self._lock:
+                self._in_flight.pop(word, None)
+
+    async def _save_word_audio(self, word: str, path: str):
+        # Written under a temporary name so a half-written file is never served
+        temp_path = f"{path}.{threading.get_ident()}.part"
+        try:
+            async with SCHEDULERS["tts"].slot_async():
+                with STAGE_SECONDS.time("tts", "word", "edge-tts"):
+                    await Communicate(word, self.config.voice_default).save(temp_path)
+            os.replace(temp_path, path)
+        except Exception as e:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            print(f"Error generating word audio: {e}")
+            record_error("tts", e)
             raise AIProviderError(f"Error generating audio with edge-tts: {e}")
-        return audio_file_path, time.perf_counter() - start_time
\ No newline at end of file
+        self._count_write()
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Set
+from core.cache import CacheManager
+from core.config import Config
+from core.connectors.anki_connector import AnkiConnector
+from core.services.audio_service import AudioService
+from core.services.translation_service import MAX_RESULT_CACHE_SIZE, TranslationService
+from core.shared_cache import SharedCache
+
+RETIRE_GRACE = 60.0  # Seconds replaced services stay open for work that outlives its request (late features, Anki batches, job items)
+
+
+class Services(NamedTuple):
+    version: int
+    translation_service: TranslationService
+    audio_service: Optional[AudioService]
+    anki_connector: AnkiConnector
+
+
+def diff_settings(old: Dict[str, Dict[str, str]], new: Dict[str, Dict[str, str]]) -> Set[tuple]:
+    """Returns the (section, key) pairs whose values differ between two config.as_dict() snapshots."""
+    changed = set()
+    for section in old.keys() | new.keys():
+        old_items = old.get(section, {})
+        new_items = new.get(section, {})
+        for key in old_items.keys() | new_items.keys():
+            if old_items.get(key) != new_items.get(key):
+                changed.add((section, key))
+    return changed
+
+
+class ServiceContainer:
+    """Holds the current set of services and swaps in rebuilt components when settings change.
+
+    Requests read `current` once and keep using that set, so in-flight lookups finish on the
+    services they started with while new requests pick up the replacement. Replaced components
+    are closed (connection pools, executors) once no request that acquired a set holding them
+    is still running, and not before RETIRE_GRACE has passed.
+    """
+
+    def __init__(self, config: Config, cache_manager: CacheManager, shared_cache: Optional[SharedCache] = None):
+        self.config = config
+        self.cache_manager = cache_manager
+        self.shared_cache = shared_cache
+        self._lock = threading.Lock()
+        # Services version -> requests that acquired it and have not released it yet
+        self._in_use: Dict[int, int] = {}
+        self._in_use_changed = threading.Condition()
+        self._current = Services(
+            version=1,
+            translation_service=self._build_translation_service(),
+            audio_service=self._build_audio_service(),
+            anki_connector=self._build_anki_connector(),
+        )
+
+    @property
+    def current(self) -> Services:
+        return self._current
+
+    def acquire(self) -> Services:
+        """Returns the current services and keeps them (and any newer ones) open until release()."""
+        with self._in_use_changed:
+            services = self._current
+            self._in_use[services.version] = self._in_use.get(services.version, 0) + 1
+            return services
+
+    def release(self, services: Services):
+        with self._in_use_changed:
+            self._in_use[services.version] -= 1
+            if not self._in_use[services.version]:
+                del self._in_use[services.version]
+            self._in_use_changed.notify_all()
+
+    def reload(self, previous_settings: Dict[str, Dict[str, str]]) -> Services:
+        """Rebuilds only the components affected by the settings that changed since previous_settings."""
+        with self._lock:
+            changed = diff_settings(previous_settings, self.config.as_dict())
+            services = self._current
+            replacements = {}
+            if any(self._affects_provider(section, key, previous_settings) for section, key in changed):
+                replacements["translation_service"] = self._build_translation_service()
+            if any(self._affects_audio(section, key) for section, key in changed):
+                replacements["audio_service"] = self._build_audio_service()
+            if any(section.startswith("anki") for section, _ in changed):
+                replacements["anki_connector"] = self._build_anki_connector()
+            if replacements:
+                with self._in_use_changed:
+                    self._current = services._replace(version=services.version + 1, **replacements)
+                print(f"Services reloaded (v{self._current.version}): {', '.join(replacements)}")
+                replaced = [component for component in (getattr(services, name) for name in replacements) if component is not None]
+                threading.Thread(target=self._close_when_unused, args=(replaced, services.version),
+                                 name=f"services-v{services.version}-close", daemon=True).start()
+            return self._current
+
+    def _close_when_unused(self, components: List, last_version: int):
+        """Closes replaced components once no request holds a services set up to `last_version`, the newest that contains them."""
+        time.sleep(RETIRE_GRACE)
+        with self._in_use_changed:
+            self._in_use_changed.wait_for(lambda: not any(version <= last_version for version in self._in_use))
+        for component in components:
+            try:
+                component.close()
+            except Exception as e:
+                print(f"Error closing replaced {type(component).__name__}: {e}")
+
+    def _affects_provider(self, section: str, key: str, previous_settings: Dict[str, Dict[str, str]]) -> bool:
+        if section in ("providers", "translation_memory") or section.startswith("routing") or (section, key) == ("settings", "sentenceconcurrency"):
+            return True
+        # Edits to providers that are not selected before or after the change leave the client alone
+        selected = {self.config.selected_provider, previous_settings.get("providers", {}).get("selected_provider")}
+        if self.config.routing.enabled:
+            selected.update(target.provider for rule in self.config.routing.rules for target in rule.targets)
+        return any(section in (f"providers.{name}", f"providers.{name}.parameters") for name in selected)
+
+    def _affects_audio(self, section: str, key: str) -> bool:
+        # Autoplay is read from the config when rendering and needs no rebuild
+        return section == "voice" or (section == "audio" and key != "autoplay") or (section, key) == ("settings", "ttsenabled")
+
+    def _build_translation_service(self) -> TranslationService:
+        if self.shared_cache is None:
+            return TranslationService(self.config)
+        # Results are shared per provider setup, like the in-process cache that a provider change discards
+        provider_settings = {section: items for section, items in self.config.as_dict().items()
+                             if section == "providers" or section.startswith(("providers.", "routing"))}
+        scope = hashlib.sha1(json.dumps(provider_settings, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        return TranslationService(self.config, self.shared_cache.mapping(f"results:{scope}", MAX_RESULT_CACHE_SIZE, "json"))
+
+    def _build_audio_service(self) -> Optional[AudioService]:
+        return AudioService(self.config) if self.config.get_setting('ttsEnabled', True) else None
+
+    def _build_anki_connector(self) -> AnkiConnector:
+        anki_connector = AnkiConnector(self.config, self.cache_manager)
+        anki_connector.start_bootstrap()
+        return anki_connector
@@ -0,0 +1,386 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Set
+from core.config import Config
+from core.errors import TranslationError
+from core.helpers import split_sentences
+from core.scheduler import BULK, set_priority
+from core.services.translation_service import TranslationService, FEATURE_PROMPTS, USAGE_KEYS
+
+CHECKPOINT_INTERVAL = 20
+PAUSE_POLL_INTERVAL = 0.2
+HEARTBEAT_INTERVAL = 5.0  # Seconds between touches of a running job's owner file
+HEARTBEAT_TIMEOUT = 30.0  # An owner file untouched this long was left by a process that stopped
+DEFAULT_JOB_FEATURES = ("translation", "analysis")
+
+
+def chunk_paragraph(paragraph: str, max_chunk_chars: int) -> List[str]:
+    """Groups the sentences of one paragraph into chunks of at most max_chunk_chars; a longer sentence stays whole."""
+    chunks = []
+    current = ""
+    for sentence in split_sentences(" ".join(paragraph.split())):
+        if current and len(current) + 1 + len(sentence) > max_chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+def chunk_document(text: str, max_chunk_chars: int, executor: Optional[ProcessPoolExecutor] = None) -> List[str]:
+    """Splits a document into paragraph-aligned chunks, fanning paragraphs out to the process pool when given."""
+    paragraphs = [p for p in re.split(r"\n\s*\n", text) if p.strip()]
+    chunker = partial(chunk_paragraph, max_chunk_chars=max_chunk_chars)
+    if executor is None:
+        chunked = map(chunker, paragraphs)
+    else:
+        chunked = executor.map(chunker, paragraphs, chunksize=64)
+    return [chunk for chunks in chunked for chunk in chunks]
+
+
+class DocumentJob:
+    def __init__(self, job_id: str, features: List[str], output_dir: str):
+        self.job_id = job_id
+        self.features = features
+        self.document_path = os.path.join(output_dir, f"{job_id}.txt")
+        self.output_path = os.path.join(output_dir, f"{job_id}.jsonl")
+        self.state_path = os.path.join(output_dir, f"{job_id}.state.json")
+        # Names the process running the job (and its mtime is that process's heartbeat), so other workers leave it alone
+        self.owner_path = os.path.join(output_dir, f"{job_id}.owner")
+        # Pause and resume requests that reached another worker, for the owner to apply
+        self.control_path = os.path.join(output_dir, f"{job_id}.control")
+        self.status = "pending"
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.tokens = dict.fromkeys(USAGE_KEYS, 0)
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.owner_pid: Optional[int] = None
+        self.thread: Optional[threading.Thread] = None
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def pause(self):
+        self._resume_event.clear()
+        self.status = "paused"
+        self.save_state()
+
+    def resume(self):
+        self.status = "running"
+        self._resume_event.set()
+        self.save_state()
+
+    def progress(self) -> Dict:
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0
+        return {
+            "jobId": self.job_id,
+            "status": self.status,
+            "features": self.features,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "percent": round(100 * self.completed / self.total, 1) if self.total else 0,
+            "tokens": dict(self.tokens),
+            "elapsed": round(elapsed, 1),
+            "output": self.output_path,
+            "error": self.error,
+            "owner": self.owner_pid,
+        }
+
+    def claim(self) -> bool:
+        """Makes this process the job's owner; fails while another live process owns it."""
+        temp_path = f"{self.owner_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        try:
+            for _ in range(2):
+                try:
+                    os.link(temp_path, self.owner_path)  # Atomic, and fails when an owner file exists
+                    self.owner_pid = os.getpid()
+                    return True
+                except FileExistsError:
+                    if self.owner() is not None:
+                        return False
+                    self.release(stale=True)
+            return False
+        finally:
+            os.remove(temp_path)
+
+    def owner(self) -> Optional[int]:
+        """Returns the pid of another process that is running the job, or None."""
+        try:
+            with open(self.owner_path, "r", encoding="utf-8") as f:
+                pid = int(f.read())
+            age = time.time() - os.path.getmtime(self.owner_path)
+        except (FileNotFoundError, ValueError):
+            return None
+        return None if pid == os.getpid() or age > HEARTBEAT_TIMEOUT else pid
+
+    def heartbeat(self):
+        try:
+            os.utime(self.owner_path)
+        except FileNotFoundError:
+            pass
+
+    def release(self, stale: bool = False):
+        """Removes the owner file if this process (or, with `stale`, a process that stopped) wrote it."""
+        try:
+            with open(self.owner_path, "r", encoding="utf-8") as f:
+                pid = int(f.read() or 0)
+            if stale or pid == os.getpid():
+                os.remove(self.owner_path)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def forward(self, action: str):
+        """Leaves a pause or resume request for the process that owns the job."""
+        temp_path = f"{self.control_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(action)
+        os.replace(temp_path, self.control_path)
+        self.status = "paused" if action == "pause" else "running"  # As the owner will report it shortly
+
+    def take_forwarded(self) -> Optional[str]:
+        """Returns (and consumes) the latest request another worker forwarded."""
+        taken_path = f"{self.control_path}.{os.getpid()}.taken"
+        try:
+            os.replace(self.control_path, taken_path)
+        except FileNotFoundError:
+            return None
+        with open(taken_path, "r", encoding="utf-8") as f:
+            action = f.read().strip()
+        os.remove(taken_path)
+        return action
+
+    def completed_indices(self) -> Set[int]:
+        """Reads back the indices already written to the JSONL output, which doubles as the checkpoint."""
+        indices = set()
+        if not os.path.exists(self.output_path):
+            return indices
+        with open(self.output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    indices.add(json.loads(line)["index"])
+                except (json.JSONDecodeError, KeyError):
+                    continue  # A torn last line from a crash is simply redone
+        return indices
+
+    def record(self, item: Dict):
+        with self._lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            self.completed += 1
+            if item.get("errors"):
+                self.failed += 1
+            for key in self.tokens:
+                self.tokens[key] += item["tokens"].get(key, 0)
+            if self.completed % CHECKPOINT_INTERVAL == 0:
+                self.save_state()
+
+    def save_state(self):
+        state = {
+            "job_id": self.job_id,
+            "features": self.features,
+            "status": self.status,
+            "total": self.total,
+            "tokens": self.tokens,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    @classmethod
+    def load(cls, job_id: str, output_dir: str) -> "DocumentJob":
+        if not re.fullmatch(r"[0-9a-f]{12}", job_id):
+            raise TranslationError(f"Unknown job: {job_id}")
+        job = cls(job_id, [], output_dir)
+        try:
+            with open(job.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            raise TranslationError(f"Unknown job: {job_id}")
+        job.features = state["features"]
+        job.total = state.get("total", 0)
+        job.tokens.update(state.get("tokens", {}))
+        job.created_at = state.get("created_at", job.created_at)
+        job.started_at = state.get("started_at")
+        job.finished_at = state.get("finished_at")
+        job.error = state.get("error")
+        job.completed = len(job.completed_indices())
+        job.owner_pid = job.owner()
+        if job.owner_pid is not None:
+            job.status = state["status"]  # Running (or paused) in another worker, which keeps the state current
+        else:
+            # A job that was running when the process stopped resumes as paused
+            job.status = "completed" if state["status"] == "completed" else "paused"
+        if job.status == "paused":
+            job._resume_event.clear()
+        return job
+
+
+class JobManager:
+    def __init__(self, config: Config, translation_service: TranslationService):
+        self.jobs_config = config.jobs
+        self.translation_service = translation_service
+        # Sentence results of jobs, kept apart from the lookup cache so that a document cannot evict lookups
+        self.result_cache: Dict[str, Dict] = {}
+        self.jobs: Dict[str, DocumentJob] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        os.makedirs(self.jobs_config.output_dir, exist_ok=True)
+
+    def submit(self, text: str, features: List[str] = DEFAULT_JOB_FEATURES) -> DocumentJob:
+        unknown = [feature for feature in features if feature not in FEATURE_PROMPTS]
+        if unknown:
+            raise TranslationError(f"Unknown job features: {', '.join(unknown)}")
+        if not text.strip():
+            raise TranslationError("Document is empty")
+        job = DocumentJob(uuid.uuid4().hex[:12], list(features), self.jobs_config.output_dir)
+        with open(job.document_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        job.claim()
+        job.save_state()
+        self.jobs[job.job_id] = job
+        self._start(job)
+        return job
+
+    def get(self, job_id: str) -> DocumentJob:
+        job = self.jobs.get(job_id)
+        if job is None or not job.is_running:
+            # Not running in this process: another worker may own it, so its state is read afresh
+            job = self.jobs[job_id] = DocumentJob.load(job_id, self.jobs_config.output_dir)
+        return job
+
+    def pause(self, job_id: str) -> DocumentJob:
+        job = self.get(job_id)
+        if job.owner_pid is not None and not job.is_running:
+            job.forward("pause")
+        elif job.status in ("pending", "running"):
+            job.pause()
+        return job
+
+    def resume(self, job_id: str) -> DocumentJob:
+        job = self.get(job_id)
+        if job.owner_pid is not None and not job.is_running:
+            job.forward("resume")
+        elif job.status == "paused":
+            if job.is_running:
+                job.resume()
+            elif job.claim():
+                job.resume()
+                self._start(job)
+            else:
+                job.forward("resume")  # Another worker resumed it first
+        return job
+
+    def shutdown(self):
+        for job in self.jobs.values():
+            if job.is_running:
+                job.pause()
+                job.release()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=max(1, self.jobs_config.process_workers))
+            return self._executor
+
+    def _start(self, job: DocumentJob):
+        """Runs a job this process has claimed."""
+        job.thread = threading.Thread(target=self._run, args=(job,), name=f"job-{job.job_id}", daemon=True)
+        job.thread.start()
+        threading.Thread(target=self._supervise, args=(job,), name=f"job-{job.job_id}-owner", daemon=True).start()
+
+    def _supervise(self, job: DocumentJob):
+        """Keeps the job's ownership fresh and applies pause and resume requests forwarded by other workers."""
+        last_heartbeat = time.monotonic()
+        while job.is_running:
+            action = job.take_forwarded()
+            if action == "pause" and job.status in ("pending", "running"):
+                job.pause()
+            elif action == "resume" and job.status == "paused":
+                job.resume()
+            if time.monotonic() - last_heartbeat >= HEARTBEAT_INTERVAL:
+                job.heartbeat()
+                last_heartbeat = time.monotonic()
+            time.sleep(PAUSE_POLL_INTERVAL)
+
+    def _run(self, job: DocumentJob):
+        set_priority(BULK)  # Document jobs only get provider slots that lookups leave free
+        try:
+            with open(job.document_path, "r", encoding="utf-8") as f:
+                text = f.read()
+            chunks = chunk_document(text, self.jobs_config.max_chunk_chars, self._get_executor())
+            job.total = len(chunks)
+            done = job.completed_indices()
+            job.completed = len(done)
+            if job.status == "pending":
+                job.status = "running"
+            job.started_at = time.time()
+            job.save_state()
+            pending = [index for index in range(len(chunks)) if index not in done]
+            asyncio.run(self._process(job, chunks, pending))
+            if job.completed >= job.total:
+                job.status = "completed"
+                job.finished_at = time.time()
+        except Exception as e:
+            print(f"Error running job {job.job_id}: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        job.save_state()
+        job.release()
+
+    async def _process(self, job: DocumentJob, chunks: List[str], pending: List[int]):
+        queue: asyncio.Queue = asyncio.Queue()
+        for index in pending:
+            queue.put_nowait(index)
+
+        async def worker():
+            while True:
+                while not job._resume_event.is_set():
+                    await asyncio.sleep(PAUSE_POLL_INTERVAL)
+                try:
+                    index = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                job.record(await self._process_item(job.features, index, chunks[index]))
+
+        await asyncio.gather(*(worker() for _ in range(max(1, self.jobs_config.workers))))
+
+    async def _process_item(self, features: List[str], index: int, chunk: str) -> Dict:
+        start_time = time.perf_counter()
+        # Translation and analysis go sentence by sentence as in lookups; provider responses are parsed in the process pool
+        executor = self._get_executor()
+        results = await asyncio.gather(*(self.translation_service.get_feature_data(feature, chunk, self.result_cache, executor) for feature in features))
+        item = {"index": index, "text": chunk, "timings": {}, "tokens": dict.fromkeys(USAGE_KEYS, 0), "errors": []}
+        for feature, (data, elapsed, usage, failed) in zip(features, results):
+            item[feature] = data
+            item["timings"][feature] = round(elapsed, 3)
+            if failed:
+                item["errors"].append(feature)  # Also when only some sentences failed; the item holds the rest
+            for key in item["tokens"]:
+                item["tokens"][key] += usage.get(key) or 0
+        item["timings"]["total"] = round(time.perf_counter() - start_time, 3)
+        return item
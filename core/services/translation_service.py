@@ -1,14 +1,79 @@
+import re
 import time
 import asyncio
+import hashlib
+from concurrent.futures import Executor
 from providers.provider_factory import get_ai_provider
 from core.config import Config
-from prompts.custom_prompt import generate_grammar_check_prompt, generate_translation_prompt, generate_analysis_prompt
-from typing import Dict, Tuple
+from core.errors import IncompleteResultError, TranslationError
+from core.helpers import split_sentences
+from core.metrics import STAGE_SECONDS, TOKENS, record_cache, record_error
+from core.profiling import span, traced
+from core.scheduler import SCHEDULERS
+from core.shared_cache import SharedMapping
+from core.translation_memory import TranslationMemory
+from core.types import Prompt
+from prompts.custom_prompt import PROMPT_VERSION, generate_grammar_check_prompt, generate_translation_prompt, generate_analysis_prompt
+from typing import Callable, Dict, Iterator, List, MutableMapping, Optional, Tuple
+
+MAX_RESULT_CACHE_SIZE = 10000
+DEFAULT_SENTENCE_CONCURRENCY = 4
+USAGE_KEYS = ("prompt_tokens", "completion_tokens", "cached_tokens")
+
+FEATURE_PROMPTS: Dict[str, Callable[[str], Prompt]] = {
+    "translation": generate_translation_prompt,
+    "analysis": generate_analysis_prompt,
+    "grammar_check": generate_grammar_check_prompt,
+}
+FEATURE_NAMES = {prompt_generator: feature for feature, prompt_generator in FEATURE_PROMPTS.items()}
+
+
+def merge_sentence_translations(results: List[Dict]) -> Dict:
+    """Joins per-sentence translations back into a single "Translation"."""
+    merged = ""
+    for result in results:
+        part = result.get("Translation", "").strip()
+        if not part:
+            continue
+        if merged and merged[-1].isascii() and part[0].isascii():
+            merged += " "
+        merged += part
+    return {"Translation": merged} if merged else {}
+
+def merge_sentence_analyses(results: List[Dict]) -> Dict:
+    """Concatenates per-sentence "Words" lists, dropping repeated words."""
+    words = []
+    seen = set()
+    for result in results:
+        for word_data in result.get("Words", []):
+            key = word_data.get("word", "").lower()
+            if key and key not in seen:
+                seen.add(key)
+                words.append(word_data)
+    return {"Words": words} if words else {}
+
+
+SEGMENT_MERGES: Dict[str, Callable[[List[Dict]], Dict]] = {
+    "translation": merge_sentence_translations,
+    "analysis": merge_sentence_analyses,
+}
 
 
 class TranslationService:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, result_cache: Optional[MutableMapping[str, Dict]] = None):
         self.config = config
+        self.sentence_concurrency = int(config.get_setting("sentenceConcurrency", DEFAULT_SENTENCE_CONCURRENCY))
+        # Parsed provider results keyed by feature and sentence, shared by whole-text and per-sentence lookups
+        # A SharedMapping when several worker processes serve lookups
+        self.result_cache: MutableMapping[str, Dict] = {} if result_cache is None else result_cache
+        # Provider token usage since this service was built; cached_tokens is the part of prompt_tokens served from a prefix cache
+        self.usage_totals = dict.fromkeys(USAGE_KEYS, 0)
+        self.provider_calls = 0
+        memory_config = config.translation_memory
+        # Near-duplicates of sentences analyzed before; this process's index over the result cache
+        self.translation_memory = TranslationMemory(
+            memory_config.threshold, memory_config.ngram, memory_config.num_perm, memory_config.bands, memory_config.max_entries
+        ) if memory_config.enabled else None
         try:
             self.ai_provider = get_ai_provider(config)
         except Exception as e:
@@ -16,22 +81,187 @@ class TranslationService:
             print(f"Please check the 'selected_provider' setting in your config.ini file.")
             raise  # Re-raise the exception to halt execution
 
-    async def get_grammar_check_data(self, text: str) -> Tuple[Dict, float]:
-        return await self._get_ai_data(text, generate_grammar_check_prompt)
+    async def get_grammar_check_data(self, text: str, force_refresh: bool = False) -> Tuple[Dict, float]:
+        grammar_check_data, elapsed, _ = await self._fetch_ai_data(text, generate_grammar_check_prompt, force_refresh)
+        if not grammar_check_data:
+            raise IncompleteResultError(1, grammar_check_data, elapsed)
+        return grammar_check_data, elapsed
 
-    async def get_translation_data(self, text: str) -> Tuple[Dict, float]:
-        return await self._get_ai_data(text, generate_translation_prompt)
+    async def get_translation_data(self, text: str, force_refresh: bool = False) -> Tuple[Dict, float]:
+        return await self._get_lookup_data(text, "translation", force_refresh)
 
-    async def get_analysis_data(self, text: str) -> Tuple[Dict, float]:
-        return await self._get_ai_data(text, generate_analysis_prompt)
+    async def get_analysis_data(self, text: str, force_refresh: bool = False) -> Tuple[Dict, float]:
+        return await self._get_lookup_data(text, "analysis", force_refresh)
+
+    async def _get_lookup_data(self, text: str, feature: str, force_refresh: bool) -> Tuple[Dict, float]:
+        """Runs a feature per sentence for a lookup; raises IncompleteResultError, carrying what did succeed, when any sentence failed."""
+        data, elapsed, _, failed = await self._get_segmented_data(text, FEATURE_PROMPTS[feature], SEGMENT_MERGES[feature], force_refresh)
+        if failed:
+            raise IncompleteResultError(failed, data, elapsed)
+        return data, elapsed
+
+    async def _get_segmented_data(self, text: str, prompt_generator: Callable, merge: Callable[[List[Dict]], Dict], force_refresh: bool,
+                                  result_cache: Optional[MutableMapping[str, Dict]] = None, executor: Optional[Executor] = None) -> Tuple[Dict, float, Dict[str, int], int]:
+        """Runs the prompt once per sentence with bounded concurrency and merges the results and their token usage.
+
+        The last element counts the sentences that got no result (a provider or parsing error); the merge leaves them out.
+        """
+        sentences = split_sentences(text)
+        if len(sentences) <= 1:
+            data, elapsed, usage = await self._fetch_ai_data(text, prompt_generator, force_refresh, result_cache, executor)
+            return data, elapsed, usage, 0 if data else 1
 
-    async def _get_ai_data(self, text: str, prompt_generator: callable) -> Tuple[Dict, float]:
         start_time = time.perf_counter()
+        semaphore = asyncio.Semaphore(max(1, self.sentence_concurrency))
+
+        async def run(sentence: str) -> Tuple[Dict, float, Dict[str, int]]:
+            async with semaphore:
+                return await self._fetch_ai_data(sentence, prompt_generator, force_refresh, result_cache, executor)
+
+        with span("sentences", feature=FEATURE_NAMES.get(prompt_generator, prompt_generator.__name__), count=len(sentences)):
+            results = await asyncio.gather(*(run(sentence) for sentence in sentences))
+        usage = {key: sum(sentence_usage.get(key) or 0 for _, _, sentence_usage in results) for key in USAGE_KEYS}
+        failed = sum(1 for sentence_data, _, _ in results if not sentence_data)
+        return merge([sentence_data for sentence_data, _, _ in results]), time.perf_counter() - start_time, usage, failed
+
+    async def get_feature_data(self, feature: str, text: str, result_cache: Optional[MutableMapping[str, Dict]] = None,
+                               executor: Optional[Executor] = None) -> Tuple[Dict, float, Dict[str, int], int]:
+        """Runs a single feature on the text as lookups do (translation and analysis per sentence); also returns the token usage and the number of sentences that failed.
+
+        `result_cache` stands in for the lookup cache (document jobs keep their own) and `executor`, when given, parses
+        provider responses in another process.
+        """
+        if feature not in FEATURE_PROMPTS:
+            raise TranslationError(f"Unknown feature: {feature}")
+        merge = SEGMENT_MERGES.get(feature)
+        if merge is None:
+            data, elapsed, usage = await self._fetch_ai_data(text, FEATURE_PROMPTS[feature], False, result_cache, executor)
+            return data, elapsed, usage, 0 if data else 1
+        return await self._get_segmented_data(text, FEATURE_PROMPTS[feature], merge, False, result_cache, executor)
+
+    async def _fetch_ai_data(self, text: str, prompt_generator: Callable, force_refresh: bool,
+                             result_cache: Optional[MutableMapping[str, Dict]] = None, executor: Optional[Executor] = None) -> Tuple[Dict, float, Dict[str, int]]:
+        start_time = time.perf_counter()
+        cache_key = f"{prompt_generator.__name__}:{text.strip()}"
+        # The translation memory indexes the lookup cache only
+        translation_memory = self.translation_memory if result_cache is None else None
+        result_cache = self.result_cache if result_cache is None else result_cache
+        # One read: another worker may trim the shared cache between a membership test and the lookup
+        cached = None if force_refresh else result_cache.get(cache_key)
+        if cached is not None:
+            record_cache("result", True)
+            return cached, time.perf_counter() - start_time, {}
+        record_cache("result", False)
+        feature = FEATURE_NAMES.get(prompt_generator, prompt_generator.__name__)
+        recalled = None
+        if prompt_generator is generate_analysis_prompt and translation_memory is not None and not force_refresh:
+            recalled = self._recall_analysis(text)
+            if recalled is not None and not self.config.translation_memory.reference:
+                return recalled, time.perf_counter() - start_time, {}
+        provider = self.ai_provider.provider_name
         try:
-            prompt = prompt_generator(text)
-            raw_response = await asyncio.to_thread(self.ai_provider.generate_content, prompt)
-            translation_data = self.ai_provider.parse_response(raw_response)
+            if recalled is not None:
+                # Only the words the similar sentence did not cover are asked for
+                prompt = generate_analysis_prompt(text, known_words=[word_data["word"] for word_data in recalled["Words"]])
+            else:
+                prompt = prompt_generator(text)
+            # Queued by priority before taking a thread, so background calls never crowd out a lookup
+            async with SCHEDULERS["provider"].slot_async():
+                with span("provider_call", feature=feature, provider=provider), STAGE_SECONDS.time("provider_call", feature, provider):
+                    # The inner span starts once a worker thread picks the call up; the gap is to_thread scheduling
+                    raw_response, usage = await asyncio.to_thread(traced(self.ai_provider.generate_content_with_usage, "provider.generate", feature=feature), prompt)
+            with span("json_parse", feature=feature), STAGE_SECONDS.time("json_parse", feature, provider):
+                if executor is None:
+                    translation_data = self.ai_provider.parse_response(raw_response)
+                else:
+                    translation_data = await asyncio.get_running_loop().run_in_executor(executor, type(self.ai_provider).parse_response, raw_response)
         except Exception as e:
             print(f"Error getting data: {e}")
-            return {}, 0
-        return translation_data, time.perf_counter() - start_time
\ No newline at end of file
+            record_error("provider", e)
+            return {}, 0, {}
+        self._record_usage(usage)
+        if recalled is not None:
+            translation_data = merge_sentence_analyses([recalled, translation_data])
+        self._store_result(cache_key, translation_data, result_cache)
+        if prompt_generator is generate_analysis_prompt and translation_memory is not None and translation_data:
+            self.translation_memory.add(text)
+        return translation_data, time.perf_counter() - start_time, usage
+
+    def _recall_analysis(self, text: str) -> Optional[Dict]:
+        """Returns the analysis of a near-duplicate sentence, keeping the words that also occur in `text`; None if none do."""
+        with span("translation_memory"), STAGE_SECONDS.time("translation_memory", "analysis", "local"):
+            match = self.translation_memory.query(text)
+            data = self.result_cache.get(f"{generate_analysis_prompt.__name__}:{match[0]}") if match else None
+        if match and data is None:
+            self.translation_memory.discard(match[0])  # Evicted from the result cache
+        words = []
+        if data is not None:
+            lowered = text.lower()
+            words = [word_data for word_data in data.get("Words", [])
+                     if word_data.get("word") and re.search(rf"(?<!\w){re.escape(word_data.get('word', '').lower())}(?!\w)", lowered)]
+        # A similar sentence none of whose words occur here says nothing about this one
+        record_cache("translation_memory", bool(words))
+        return {"Words": words} if words else None
+
+    def cached_data(self, feature: str, text: str) -> Dict:
+        """Returns the cached result of a feature for the text, merged per sentence as lookups split it; never calls the provider."""
+        prompt_generator = FEATURE_PROMPTS[feature]
+        merge = SEGMENT_MERGES.get(feature)
+        sentences = split_sentences(text) if merge is not None else []
+        if len(sentences) <= 1:
+            return self.result_cache.get(f"{prompt_generator.__name__}:{text.strip()}") or {}
+        return merge([self.result_cache.get(f"{prompt_generator.__name__}:{sentence.strip()}") or {} for sentence in sentences])
+
+    def close(self):
+        self.ai_provider.close()
+
+    def provenance(self) -> Dict:
+        """Identifies what produces this service's results: provider, model (the rules, when routing) and prompt version."""
+        model = getattr(self.ai_provider, "model_name", "")
+        if not model and self.config.routing.enabled:
+            model = "routes:" + hashlib.sha1(repr(self.config.routing.rules).encode("utf-8")).hexdigest()[:12]
+        return {"provider": self.ai_provider.provider_name, "model": model, "promptVersion": PROMPT_VERSION}
+
+    def cached_results(self) -> Iterator[Tuple[str, Dict]]:
+        """Yields the cached results as (cache key, parsed result), oldest first."""
+        for cache_key in list(self.result_cache):
+            data = self.result_cache.get(cache_key)
+            if data:
+                yield cache_key, data
+
+    def restore_result(self, cache_key: str, data: Dict) -> bool:
+        """Caches a result produced elsewhere (e.g. from a cache snapshot) unless one is cached already."""
+        if not data or cache_key in self.result_cache:
+            return False
+        self._store_result(cache_key, data)
+        if cache_key.startswith(f"{generate_analysis_prompt.__name__}:") and self.translation_memory is not None:
+            self.translation_memory.add(cache_key.partition(":")[2])
+        return True
+
+    def usage_stats(self) -> Dict:
+        """Returns accumulated token usage and the share of prompt tokens read from provider-side caches."""
+        prompt_tokens = self.usage_totals["prompt_tokens"]
+        return {
+            "promptVersion": PROMPT_VERSION,
+            "provider": self.ai_provider.provider_name,
+            "calls": self.provider_calls,
+            **self.usage_totals,
+            "cachedRatio": round(self.usage_totals["cached_tokens"] / prompt_tokens, 3) if prompt_tokens else 0,
+            "translationMemory": self.translation_memory.stats() if self.translation_memory is not None else None,
+        }
+
+    def _record_usage(self, usage: Dict[str, int]):
+        self.provider_calls += 1
+        for key in USAGE_KEYS:
+            self.usage_totals[key] += usage.get(key) or 0
+            if usage.get(key):
+                TOKENS.inc(self.ai_provider.provider_name, key[:-len("_tokens")], amount=usage[key])
+
+    def _store_result(self, cache_key: str, data: Dict, result_cache: Optional[MutableMapping[str, Dict]] = None):
+        if not data:
+            return
+        result_cache = self.result_cache if result_cache is None else result_cache
+        # A shared mapping trims itself; counting and ordering its keys on every store would cost a query each
+        if not isinstance(result_cache, SharedMapping) and cache_key not in result_cache and len(result_cache) >= MAX_RESULT_CACHE_SIZE:
+            result_cache.pop(next(iter(result_cache)))
+        result_cache[cache_key] = data
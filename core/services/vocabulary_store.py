@@ -0,0 +1,179 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DAY_SECONDS = 86400
+BLOCK_DAYS = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    word TEXT NOT NULL UNIQUE,
+    display TEXT NOT NULL,
+    definition TEXT NOT NULL,
+    lookup_count INTEGER NOT NULL DEFAULT 0,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_sentence_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS sentences (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE,
+    translation TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS lookups (
+    word_id INTEGER NOT NULL,
+    sentence_id INTEGER NOT NULL,
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS daily_counts (
+    day INTEGER NOT NULL,
+    word_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, word_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS block_counts (
+    block INTEGER NOT NULL,
+    word_id INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (block, word_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lookups_word_ts ON lookups (word_id, ts);
+CREATE INDEX IF NOT EXISTS lookups_ts ON lookups (ts);
+CREATE INDEX IF NOT EXISTS words_count ON words (lookup_count DESC);
+"""
+
+
+class VocabularyStore:
+    """Local history of analyzed words with their context sentences.
+
+    Every lookup is appended to `lookups`. Counts are also rolled up per word into days and into
+    32-day blocks, so a top-N query over a period sums whole blocks plus the days at its edges
+    instead of individual lookups. Writes go through a single background thread so recording
+    never blocks the request.
+    """
+
+    def __init__(self, db_path: str):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vocabulary")
+
+    def record(self, words: Iterable, sentence: str, translation: str, timestamp: Optional[float] = None) -> Future:
+        """Queues WordData entries seen in `sentence` for writing."""
+        entries = [(word_data.word, word_data.definition) for word_data in words]
+        return self._writer.submit(self._record, entries, sentence, translation, timestamp or time.time())
+
+    def _record(self, entries: List[Tuple[str, str]], sentence: str, translation: str, timestamp: float):
+        if not entries:
+            return
+        day = int(timestamp // DAY_SECONDS)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO sentences (text, translation) VALUES (?, ?) "
+                "ON CONFLICT(text) DO UPDATE SET translation = excluded.translation WHERE excluded.translation != ''",
+                (sentence, translation),
+            )
+            sentence_id = self._db.execute("SELECT id FROM sentences WHERE text = ?", (sentence,)).fetchone()[0]
+            for word, definition in entries:
+                self._db.execute(
+                    "INSERT INTO words (word, display, definition, lookup_count, first_seen, last_seen, last_sentence_id) VALUES (?, ?, ?, 1, ?, ?, ?) "
+                    "ON CONFLICT(word) DO UPDATE SET definition = excluded.definition, lookup_count = lookup_count + 1, "
+                    "last_seen = excluded.last_seen, last_sentence_id = excluded.last_sentence_id",
+                    (word.lower(), word, definition, timestamp, timestamp, sentence_id),
+                )
+                word_id = self._db.execute("SELECT id FROM words WHERE word = ?", (word.lower(),)).fetchone()[0]
+                self._db.execute("INSERT INTO lookups (word_id, sentence_id, ts) VALUES (?, ?, ?)", (word_id, sentence_id, timestamp))
+                self._db.execute(
+                    "INSERT INTO daily_counts (day, word_id, count) VALUES (?, ?, 1) "
+                    "ON CONFLICT(day, word_id) DO UPDATE SET count = count + 1",
+                    (day, word_id),
+                )
+                self._db.execute(
+                    "INSERT INTO block_counts (block, word_id, count) VALUES (?, ?, 1) "
+                    "ON CONFLICT(block, word_id) DO UPDATE SET count = count + 1",
+                    (day // BLOCK_DAYS, word_id),
+                )
+
+    def flush(self):
+        """Waits until queued records are written."""
+        self._writer.submit(lambda: None).result()
+
+    def top_words(self, since: Optional[float] = None, until: Optional[float] = None, limit: int = 20, offset: int = 0,
+                  exclude: Optional[Callable[[str], bool]] = None) -> List[Dict]:
+        """Returns the most looked-up words in [since, until] (whole days), skipping words for which exclude() is true."""
+        if since is None and until is None:
+            query = "SELECT id, lookup_count FROM words ORDER BY lookup_count DESC, last_seen DESC"
+            params: tuple = ()
+        else:
+            first_day = int(since // DAY_SECONDS) if since is not None else 0
+            last_day = int(until // DAY_SECONDS) if until is not None else int(time.time() // DAY_SECONDS)
+            # Blocks fully inside the period, plus the loose days before and after them
+            first_block = -(-first_day // BLOCK_DAYS)
+            last_block = (last_day + 1) // BLOCK_DAYS - 1
+            if first_block > last_block:
+                first_block, last_block = 1, 0
+                edges = (first_day, last_day, 1, 0)
+            else:
+                edges = (first_day, first_block * BLOCK_DAYS - 1, (last_block + 1) * BLOCK_DAYS, last_day)
+            query = ("SELECT word_id, SUM(count) AS total FROM ("
+                     "SELECT word_id, count FROM daily_counts WHERE day BETWEEN ? AND ? "
+                     "UNION ALL SELECT word_id, count FROM daily_counts WHERE day BETWEEN ? AND ? "
+                     "UNION ALL SELECT word_id, count FROM block_counts WHERE block BETWEEN ? AND ?"
+                     ") GROUP BY word_id ORDER BY total DESC")
+            params = edges + (first_block, last_block)
+        with self._lock:
+            ranked = []
+            skipped = 0
+            for word_id, count in self._db.execute(query, params):
+                if exclude is not None:
+                    word = self._db.execute("SELECT display FROM words WHERE id = ?", (word_id,)).fetchone()[0]
+                    if exclude(word):
+                        continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                ranked.append((word_id, count))
+                if len(ranked) >= limit:
+                    break
+            return [dict(self._describe(word_id), periodCount=count) for word_id, count in ranked]
+
+    def history(self, word: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Returns the lookups of one word, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT l.ts, s.text, s.translation FROM lookups l JOIN words w ON w.id = l.word_id "
+                "JOIN sentences s ON s.id = l.sentence_id WHERE w.word = ? ORDER BY l.ts DESC LIMIT ? OFFSET ?",
+                (word.lower(), limit, offset),
+            ).fetchall()
+        return [{"timestamp": ts, "sentence": text, "translation": translation} for ts, text, translation in rows]
+
+    def entries(self, words: Iterable[str]) -> List[Dict]:
+        """Returns the stored definition and latest context of each given word that is known to the store."""
+        with self._lock:
+            result = []
+            for word in words:
+                row = self._db.execute("SELECT id FROM words WHERE word = ?", (word.lower(),)).fetchone()
+                if row:
+                    result.append(self._describe(row[0]))
+            return result
+
+    def _describe(self, word_id: int) -> Dict:
+        display, definition, lookup_count, first_seen, last_seen, sentence, translation = self._db.execute(
+            "SELECT w.display, w.definition, w.lookup_count, w.first_seen, w.last_seen, s.text, s.translation "
+            "FROM words w LEFT JOIN sentences s ON s.id = w.last_sentence_id WHERE w.id = ?",
+            (word_id,),
+        ).fetchone()
+        return {
+            "word": display,
+            "definition": definition,
+            "lookupCount": lookup_count,
+            "firstSeen": first_seen,
+            "lastSeen": last_seen,
+            "sentence": sentence or "",
+            "translation": translation or "",
+        }
@@ -0,0 +1,133 @@
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Any, Callable, Iterator, List, Optional
+
+TRIM_EVERY = 100  # Writes between checks that a namespace is within its entry limit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_age ON entries (namespace, stored_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SharedCache:
+    """Cache entries and small metadata values in one SQLite file that every worker process opens.
+
+    WAL mode lets workers read while another one writes; entries live in named namespaces, each
+    trimmed to its own entry limit, oldest first.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM entries WHERE namespace = ? AND key = ?", (namespace, key)).fetchone()
+        return row[0] if row else None
+
+    def set(self, namespace: str, key: str, value: bytes):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO entries (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                             (namespace, key, value, time.time()))
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key)).rowcount > 0
+
+    def count(self, namespace: str) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    def keys(self, namespace: str) -> List[str]:
+        """Returns the keys of a namespace, oldest first."""
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT key FROM entries WHERE namespace = ? ORDER BY stored_at", (namespace,))]
+
+    def trim(self, namespace: str, max_entries: int) -> int:
+        """Deletes the oldest entries beyond `max_entries`; returns how many were deleted."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "DELETE FROM entries WHERE namespace = ? AND key IN "
+                "(SELECT key FROM entries WHERE namespace = ? ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (namespace, namespace, max_entries),
+            ).rowcount
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def mapping(self, namespace: str, max_entries: int, codec: str = "text") -> "SharedMapping":
+        return SharedMapping(self, namespace, max_entries, codec)
+
+
+class SharedMapping(MutableMapping):
+    """A dict-like view of one namespace, so code written against an in-process dict can use the shared cache.
+
+    With codec "text" values are strings; with "json" they are any JSON-serializable value.
+    """
+
+    def __init__(self, cache: SharedCache, namespace: str, max_entries: int, codec: str = "text"):
+        self.cache = cache
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._encode: Callable[[Any], bytes] = _CODECS[codec][0]
+        self._decode: Callable[[bytes], Any] = _CODECS[codec][1]
+        self._writes = 0
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.cache.get(self.namespace, key)
+        if value is None:
+            raise KeyError(key)
+        return self._decode(value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.cache.get(self.namespace, key)
+        return default if value is None else self._decode(value)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.cache.get(self.namespace, key) is not None
+
+    def __setitem__(self, key: str, value: Any):
+        self.cache.set(self.namespace, key, self._encode(value))
+        self._writes += 1
+        if self._writes % TRIM_EVERY == 0:
+            self.cache.trim(self.namespace, self.max_entries)
+
+    def __delitem__(self, key: str):
+        if not self.cache.delete(self.namespace, key):
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.cache.keys(self.namespace))
+
+    def __len__(self) -> int:
+        return self.cache.count(self.namespace)
+
+
+_CODECS = {
+    "text": (lambda value: value.encode("utf-8"), lambda data: bytes(data).decode("utf-8")),
+    "json": (lambda value: json.dumps(value, ensure_ascii=False).encode("utf-8"), lambda data: json.loads(data)),
+}
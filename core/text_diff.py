@@ -0,0 +1,51 @@
+import re
+from difflib import SequenceMatcher
+from typing import List, NamedTuple
+
+EQUAL = "equal"
+INSERT = "insert"
+DELETE = "delete"
+REPLACE = "replace"
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+# CJK characters are tokens on their own (no spaces to split on); other words keep inner apostrophes
+_TOKENS = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+(?:['’][^\W_{_CJK}]+)*|\s+|\S")
+
+
+class DiffOp(NamedTuple):
+    op: str  # equal, insert, delete or replace
+    original: str  # Empty for insertions
+    corrected: str  # Empty for deletions
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into words, single CJK characters, punctuation marks and whitespace runs; joining gives the text back."""
+    return _TOKENS.findall(text)
+
+def diff_tokens(original: str, corrected: str) -> List[DiffOp]:
+    """Returns the token-level edits turning `original` into `corrected`, adjacent edits merged into one op."""
+    original_tokens = tokenize(original)
+    corrected_tokens = tokenize(corrected)
+    # Whitespace runs compare equal, so a changed line break or double space is not reported as an edit
+    matcher = SequenceMatcher(None, [" " if token.isspace() else token for token in original_tokens],
+                              [" " if token.isspace() else token for token in corrected_tokens], autojunk=False)
+    ops: List[DiffOp] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        ops.append(DiffOp(tag, "".join(original_tokens[i1:i2]), "".join(corrected_tokens[j1:j2])))
+    return _merge_edits(ops)
+
+def _merge_edits(ops: List[DiffOp]) -> List[DiffOp]:
+    # An edit, a lone space and another edit ("a bad -> an good") read better as one replacement
+    merged: List[DiffOp] = []
+    for op in ops:
+        if (op.op != EQUAL and len(merged) >= 2 and merged[-2].op != EQUAL
+                and merged[-1].op == EQUAL and merged[-1].original.isspace()):
+            space = merged.pop()
+            previous = merged.pop()
+            op = DiffOp(REPLACE, previous.original + space.original + op.original,
+                        previous.corrected + space.corrected + op.corrected)
+        elif op.op != EQUAL and merged and merged[-1].op != EQUAL:
+            previous = merged.pop()
+            op = DiffOp(REPLACE, previous.original + op.original, previous.corrected + op.corrected)
+        merged.append(op)
+    return merged
@@ -0,0 +1,161 @@
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+MAX_CANDIDATES = 32  # Bucket-sharing sentences compared per query, most shared bands first
+ESTIMATE_MARGIN = 0.15  # Signature estimates this far below the threshold still get an exact check
+_MASK = (1 << 64) - 1
+_EMPTY = 1 << 64  # Above every bin value
+_DENSIFY_OFFSET = 0x9E3779B97F4A7C15  # Shifts borrowed values by distance, so bins borrowing from different bins differ
+_SPREAD = 0xD6E8FEB86659FD93  # Odd 64-bit multiplier
+
+
+def stable_hash(data: bytes) -> int:
+    """64-bit hash that is the same in every process; the builtin hash() of str is salted per process (PYTHONHASHSEED).
+
+    CRC-32 spread over 64 bits by an odd multiplier (a bijection), which keeps the bin index and value uniform.
+    """
+    return (zlib.crc32(data) * _SPREAD) & _MASK
+
+
+class TranslationMemory:
+    """Finds previously processed sentences that are near-duplicates of a new one, fully locally.
+
+    Each sentence is reduced to a MinHash signature of its character n-grams; signatures are split
+    into bands and hashed into buckets (locality-sensitive hashing), so a query only compares
+    against sentences sharing at least one band. Candidates are kept when the share of equal
+    signature values (an estimate of n-gram Jaccard similarity) is close to `threshold`, and match
+    when their exact n-gram Jaccard similarity reaches it.
+    """
+
+    def __init__(self, threshold: float = 0.7, ngram: int = 3, num_perm: int = 64, bands: int = 16,
+                 max_entries: int = 20000):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.ngram = max(1, ngram)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, array]" = OrderedDict()  # text -> signature, oldest first
+        self._buckets: List[Dict[int, Set[str]]] = [{} for _ in range(bands)]
+        self._query_times: Deque[float] = deque(maxlen=1000)
+        self.queries = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def shingles(self, text: str) -> Set[str]:
+        normalized = " ".join(text.lower().split())
+        if len(normalized) <= self.ngram:
+            return {normalized}
+        return {normalized[i:i + self.ngram] for i in range(len(normalized) - self.ngram + 1)}
+
+    def signature(self, text: str) -> array:
+        """One-permutation MinHash: each n-gram hash falls into one of `num_perm` bins, which keep their minimum.
+
+        Empty bins (short texts) take the value of the next filled bin plus an offset per step, so
+        equal texts still get equal signatures and the bins stay comparable position by position.
+        """
+        bins = [_EMPTY] * self.num_perm
+        for shingle in self.shingles(text):
+            value = stable_hash(shingle.encode("utf-8"))
+            index = value % self.num_perm
+            value //= self.num_perm
+            if value < bins[index]:
+                bins[index] = value
+        if _EMPTY in bins:
+            filled = [index for index, value in enumerate(bins) if value != _EMPTY]
+            source = filled[0] + self.num_perm  # Past the last filled bin, borrow from the first one
+            dense = bins[:]
+            for index in range(self.num_perm - 1, -1, -1):
+                if bins[index] != _EMPTY:
+                    source = index
+                else:
+                    dense[index] = (bins[source % self.num_perm] + (source - index) * _DENSIFY_OFFSET) & _MASK
+            bins = dense
+        return array("Q", bins)
+
+    def _band_keys(self, signature: array) -> List[int]:
+        return [stable_hash(signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, text: str):
+        text = text.strip()
+        if not text:
+            return
+        signature = self.signature(text)
+        with self._lock:
+            if text in self._entries:
+                self._entries.move_to_end(text)
+                return
+            self._entries[text] = signature
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                buckets.setdefault(key, set()).add(text)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, text: str):
+        with self._lock:
+            if text.strip() in self._entries:
+                self._remove(text.strip())
+
+    def _remove(self, text: str):
+        signature = self._entries.pop(text)
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket.discard(text)
+                if not bucket:
+                    del buckets[key]
+
+    def query(self, text: str) -> Optional[Tuple[str, float]]:
+        """Returns the most similar other sentence at or above the threshold, with its estimated similarity."""
+        start_time = time.perf_counter()
+        text = text.strip()
+        shingles = self.shingles(text)
+        signature = self.signature(text)
+        best: Optional[Tuple[str, float]] = None
+        with self._lock:
+            # Sentences sharing more bands are likelier matches; only the top ones are compared
+            candidates: Counter = Counter()
+            for buckets, key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(buckets.get(key, ()))
+            candidates.pop(text, None)
+            for candidate, _ in candidates.most_common(MAX_CANDIDATES):
+                estimate = sum(x == y for x, y in zip(signature, self._entries[candidate])) / self.num_perm
+                if estimate < self.threshold - ESTIMATE_MARGIN:
+                    continue
+                # Signatures of short texts share borrowed bins and overestimate; the exact n-gram Jaccard decides
+                other = self.shingles(candidate)
+                similarity = len(shingles & other) / len(shingles | other)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (candidate, similarity)
+            self.queries += 1
+            self.hits += best is not None
+            self._query_times.append(time.perf_counter() - start_time)
+        return best
+
+    def memory_bytes(self) -> int:
+        """Approximate resident size of the index: signatures, indexed texts and band buckets."""
+        with self._lock:
+            size = sys.getsizeof(self._entries)
+            for text, signature in self._entries.items():
+                size += sys.getsizeof(text) + sys.getsizeof(signature)
+            for buckets in self._buckets:
+                size += sys.getsizeof(buckets) + sum(sys.getsizeof(bucket) for bucket in buckets.values())
+        return size
+
+    def stats(self) -> Dict:
+        times = sorted(self._query_times)
+        return {
+            "entries": len(self._entries),
+            "memoryBytes": self.memory_bytes(),
+            "queries": self.queries,
+            "hits": self.hits,
+            "meanQueryUs": round(sum(times) / len(times) * 1e6, 1) if times else 0,
+            "p95QueryUs": round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1e6, 1) if times else 0,
+        }
@@ -1,4 +1,4 @@
-from typing import NamedTuple, Dict, Any
+from typing import NamedTuple, Dict, Any, Tuple
 
 class Features(NamedTuple):
     translation_enabled: bool
@@ -12,9 +12,16 @@ class AnkiConfig(NamedTuple):
     connect_url: str
     api_key: str
     fields: Dict[str, str]
+    timeout: float = 5.0
+    index_sync_interval: float = 300.0
+    outbox_path: str = "anki_outbox.sqlite3"
 
 class AudioConfig(NamedTuple):
     autoplay: bool
+    prefetch_enabled: bool = True
+    prefetch_workers: int = 2
+    prefetch_per_minute: int = 60
+    word_audio_max_mb: int = 100
 
 class HTMLTemplateConfig(NamedTuple):
     show_translation: bool
@@ -24,4 +31,121 @@ class ProviderConfig(NamedTuple):
     api_key: str
     base_url: str
     model: str
-    parameters: Dict[str, Any]  # type: ignore
\ No newline at end of file
+    parameters: Dict[str, Any]  # type: ignore
+
+class JobsConfig(NamedTuple):
+    output_dir: str
+    workers: int
+    process_workers: int
+    max_chunk_chars: int
+
+class VocabularyConfig(NamedTuple):
+    enabled: bool
+    path: str
+
+class RecorderConfig(NamedTuple):
+    enabled: bool
+    path: str
+
+class ProfilingConfig(NamedTuple):
+    enabled: bool
+    slow_threshold_ms: float
+    buffer_size: int
+    sample_interval_ms: float
+
+class DeadlinesConfig(NamedTuple):
+    """Milliseconds a lookup waits for each feature; 0 means no limit. budget_ms caps them all."""
+    budget_ms: float
+    translation_ms: float
+    analysis_ms: float
+    tts_ms: float
+    grammar_check_ms: float
+
+class RouteTarget(NamedTuple):
+    provider: str
+    model: str  # Empty for the model configured in the provider's section
+
+class RouteRule(NamedTuple):
+    """Sends prompts matching every given condition to `targets`, tried in order; empty conditions match anything."""
+    name: str
+    features: Tuple[str, ...]
+    languages: Tuple[str, ...]
+    min_chars: int
+    max_chars: int
+    min_tokens: int
+    max_tokens: int
+    targets: Tuple[RouteTarget, ...]
+
+class RoutingConfig(NamedTuple):
+    enabled: bool
+    prefer_fastest: bool
+    rules: Tuple[RouteRule, ...]
+
+class WorkersConfig(NamedTuple):
+    count: int
+    host: str
+    port: int
+    shared_cache_path: str
+    config_check_interval_ms: float
+
+class TranslationMemoryConfig(NamedTuple):
+    enabled: bool
+    threshold: float
+    ngram: int
+    num_perm: int
+    bands: int
+    max_entries: int
+    reference: bool  # Ask the model for the words a near match lacks instead of answering from it alone
+
+class MemoryCacheConfig(NamedTuple):
+    budget_mb: float  # Resident size of the in-process page cache, compressed
+    compression_level: int
+
+class LookupContextConfig(NamedTuple):
+    enabled: bool
+    ttl_seconds: float  # How long after a sentence's lookup its words answer word lookups
+    max_sentences: int
+
+class CacheSnapshotConfig(NamedTuple):
+    import_path: str  # Cache snapshot merged into the caches at startup; empty for none
+
+class SchedulerConfig(NamedTuple):
+    enabled: bool
+    provider_slots: int  # Concurrent calls per resource; 0 means no limit
+    tts_slots: int
+    anki_slots: int
+    interactive_share: float  # Share of each resource's slots that only interactive lookups may use
+
+class ConfigSnapshot(NamedTuple):
+    version: int
+    fingerprint: str  # Hash of every setting; equal in all processes that loaded the same settings
+    anki: AnkiConfig
+    audio: AudioConfig
+    html_template: HTMLTemplateConfig
+    jobs: JobsConfig
+    vocabulary: VocabularyConfig
+    recorder: RecorderConfig
+    profiling: ProfilingConfig
+    deadlines: DeadlinesConfig
+    routing: RoutingConfig
+    workers: WorkersConfig
+    translation_memory: TranslationMemoryConfig
+    memory_cache: MemoryCacheConfig
+    lookup_context: LookupContextConfig
+    cache_snapshot: CacheSnapshotConfig
+    scheduler: SchedulerConfig
+    voice_default: str
+    selected_provider: str
+    providers: Dict[str, ProviderConfig]
+    settings: Dict[str, Any]
+
+class Prompt(NamedTuple):
+    """A prompt split into a static instruction prefix and the per-request content that follows it."""
+    version: int
+    instructions: str
+    content: str
+    feature: str = ""
+
+    @property
+    def text(self) -> str:
+        return f"{self.instructions}\n\n{self.content}"
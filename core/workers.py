@@ -0,0 +1,86 @@
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict
+from werkzeug.serving import make_server
+
+RESPAWN_DELAY = 1.0  # Seconds before replacing a worker that exited on its own
+
+
+def serve(app, host: str, port: int, workers: int, init_worker: Callable[[int], None]):
+    """Serves `app` from `workers` processes that share one listening socket.
+
+    The socket is bound once and inherited by forked workers, so the kernel spreads connections
+    across them. `init_worker(index)` builds each worker's runtime state after the fork. Without
+    os.fork (Windows) or with one worker, the app runs in this process.
+    """
+    if workers > 1 and not hasattr(os, "fork"):
+        print("Multiple workers need os.fork, which this platform lacks; running a single worker.")
+        workers = 1
+    if workers <= 1:
+        init_worker(0)
+        app.run(host=host, port=port, debug=False)
+        return
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(128)
+    listener.set_inheritable(True)
+    print(f"Serving on http://{host}:{port} with {workers} workers")
+
+    children: Dict[int, int] = {}  # pid -> worker index
+    for index in range(workers):
+        children[_spawn(app, host, port, listener, index, init_worker)] = index
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            _signal(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"Worker {index} (pid {pid}) exited with status {status}; restarting it")
+            time.sleep(RESPAWN_DELAY)
+            children[_spawn(app, host, port, listener, index, init_worker)] = index
+    listener.close()
+
+def _spawn(app, host: str, port: int, listener: socket.socket, index: int, init_worker: Callable[[int], None]) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # Worker process: exit through SystemExit on SIGTERM so atexit flushes run
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    exit_code = 0
+    try:
+        init_worker(index)
+        server = make_server(host, port, app, threaded=True, fd=listener.fileno())
+        print(f"Worker {index} started (pid {os.getpid()})")
+        server.serve_forever()
+    except SystemExit as e:
+        exit_code = e.code or 0
+    except BaseException as e:
+        print(f"Worker {index} failed: {e}")
+        exit_code = 1
+    sys.exit(exit_code)
+
+def _signal(pid: int, signum: int):
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
@@ -1,28 +1,15 @@
 # prompts/custom_prompt.py
-from typing import Callable
+from typing import Callable, Sequence
 import re
+from core.language import CHINESE, detect_language
+from core.types import Prompt
 
-def detect_language(text: str) -> str:
-    """
-    Detects the language of the given text based on Unicode character ranges.
-
-    Args:
-        text: The text to analyze.
-
-    Returns:
-        "Chinese" if the text primarily contains Chinese characters, "English" otherwise.
-    """
-    chinese_count = 0
-    for char in text:
-        if '\u4e00' <= char <= '\u9fff':  # Basic CJK Unified Ideographs
-            chinese_count += 1
-    
-    if chinese_count / len(text) > 0.1:
-        return "Chinese"
-    else:
-        return "English"
+# Bump when any instruction block below changes; it is part of every prompt's static prefix.
+# The instructions come first and never contain request text, so provider-side prefix caches
+# (OpenAI-compatible prompt caching, Gemini context caching) can reuse them across requests.
+PROMPT_VERSION = 4
 
-def generate_translation_prompt(text: str) -> str:
+def generate_translation_prompt(text: str) -> Prompt:
     """
     Generates a prompt for translating a sentence, automatically detecting the source language.
 
@@ -30,19 +17,18 @@ def generate_translation_prompt(text: str) -> str:
         text: The sentence to translate.
 
     Returns:
-        A string containing the complete prompt.
+        A Prompt whose instructions depend only on the target language.
     """
     source_language = detect_language(text)
 
-    if source_language == "Chinese":
+    if source_language == CHINESE:
         target_language = "English"
     else:
         target_language = "simplified Chinese"
 
-    return f"""
-        Translate the following sentence into {target_language}.
-
-        Input Sentence: {text}
+    instructions = f"""
+        [LinguaBoost prompt v{PROMPT_VERSION}: translation]
+        Translate the input sentence given at the end into {target_language}.
 
         Instructions:
         1. **Translation:**
@@ -51,22 +37,23 @@ def generate_translation_prompt(text: str) -> str:
             *   Use precise {target_language} equivalents for technical terms.
             *   Output a JSON object that contains the translation as a single JSON string named "Translation".
         """
+    return Prompt(PROMPT_VERSION, instructions, f"Input Sentence: {text}", "translation")
 
-def generate_analysis_prompt(text: str, definition_language: str = "English") -> str:
+def generate_analysis_prompt(text: str, definition_language: str = "English", known_words: Sequence[str] = ()) -> Prompt:
     """
     Generates a prompt for extracting vocabulary from a sentence.
 
     Args:
         text: The sentence to analyze.
         definition_language: The desired language for definitions.
+        known_words: Words already defined (from a similar sentence) that the model should skip.
 
     Returns:
-        A string containing the complete prompt.
+        A Prompt whose instructions depend only on the definition language.
     """
-    return f"""
-        Extract vocabulary from the following sentence.
-
-        Input Sentence: {text}
+    instructions = f"""
+        [LinguaBoost prompt v{PROMPT_VERSION}: analysis]
+        Extract vocabulary from the input sentence given at the end.
 
         Output a JSON object as follows:
 
@@ -87,9 +74,14 @@ def generate_analysis_prompt(text: str, definition_language: str = "English") ->
             *   For each extracted word or phrase, create a JSON object within the "Words" array:
                 *   "word": The word or phrase (string).
                 *   "definition": Its {definition_language} definition, considering the context (string).
+            *   If a "Known Vocabulary" line precedes the input sentence, leave out the words and phrases it lists.
         """
+    content = f"Input Sentence: {text}"
+    if known_words:
+        content = f"Known Vocabulary: {'; '.join(known_words)}\n{content}"
+    return Prompt(PROMPT_VERSION, instructions, content, "analysis")
 
-def generate_grammar_check_prompt(text: str) -> str:
+def generate_grammar_check_prompt(text: str) -> Prompt:
     """
     Generates a prompt for correcting grammatical errors in a sentence.
 
@@ -97,12 +89,11 @@ def generate_grammar_check_prompt(text: str) -> str:
         text: The sentence to check.
 
     Returns:
-        A string containing the complete prompt.
+        A Prompt with fixed instructions.
     """
-    return f"""
-        Correct any grammatical errors in the following sentence and provide a guide for correction.
-
-        Input Sentence: {text}
+    instructions = f"""
+        [LinguaBoost prompt v{PROMPT_VERSION}: grammar_check]
+        Correct any grammatical errors in the input sentence given at the end and provide a guide for correction.
 
         Instructions:
         1. **Correction:**
@@ -123,6 +114,7 @@ def generate_grammar_check_prompt(text: str) -> str:
                 (Continue with numbered items for each error found)
         3. **Output**
             *   Output a JSON object that contains the following:
-                * "CorrectedSentence": The corrected sentence as a single JSON string. Please bold the modified parts.
+                * "CorrectedSentence": The corrected sentence as a single plain JSON string, without any markup or highlighting.
                 * "CorrectionGuide": specific guidance on the grammatical errors found as a single JSON string.
         """
+    return Prompt(PROMPT_VERSION, instructions, f"Input Sentence: {text}", "grammar_check")
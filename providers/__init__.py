@@ -1,8 +1,9 @@
 # providers/__init__.py
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Tuple, Union
 from core.config import Config
 from core.errors import UnsupportedAIProviderError
+from core.types import Prompt
 
 class AIProvider(ABC):
     def __init__(self, config: Config, provider_name: str):
@@ -10,11 +11,24 @@ class AIProvider(ABC):
         self.provider_name = provider_name
 
     @abstractmethod
-    def generate_content(self, prompt: str) -> str:
+    def generate_content(self, prompt: Union[str, Prompt]) -> str:
         """Generates content based on the given prompt."""
         pass
 
+    def generate_content_with_usage(self, prompt: Union[str, Prompt]) -> Tuple[str, Dict[str, int]]:
+        """Generates content and returns it with the provider's token usage (prompt, completion and cached tokens), if reported."""
+        return self.generate_content(prompt), {}
+
+    def close(self):
+        """Releases the provider's HTTP connections; called once a settings change has replaced it."""
+        pass
+
+    @staticmethod
     @abstractmethod
-    def parse_response(self, response: str) -> dict:
-        """Parses the raw response from the AI."""
-        pass
\ No newline at end of file
+    def parse_response(response: str) -> dict:
+        """Parses the raw response from the AI; static, so document jobs can run it in a worker process."""
+        pass
+
+def prompt_text(prompt: Union[str, Prompt]) -> str:
+    """Flattens a Prompt into one string with the static instructions first."""
+    return prompt.text if isinstance(prompt, Prompt) else prompt
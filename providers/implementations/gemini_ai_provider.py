@@ -1,29 +1,86 @@
 import google.generativeai as genai
 from core.errors import JSONParsingError
 from core.helpers import remove_trailing_commas
+from core.types import Prompt
 from google.generativeai.types import GenerationConfig
 import re
 import json
-from providers import AIProvider
+import threading
+import time
+from typing import Dict, Optional, Tuple, Union
+from providers import AIProvider, prompt_text
+
+DEFAULT_CONTEXT_CACHE_TTL = 3600
+MIN_CONTEXT_CACHE_TOKENS = 1024  # Smallest content Gemini caches explicitly (the 2.5 Flash minimum; other models need more)
+CHARS_PER_TOKEN = 4
 
 class GeminiAIProvider(AIProvider):
-    def __init__(self, config, provider_name):
+    def __init__(self, config, provider_name, model: Optional[str] = None):
         super().__init__(config, provider_name)
         provider_config = config.get_provider_config(provider_name)
         genai.configure(api_key=provider_config.api_key)
-        self.model = genai.GenerativeModel(provider_config.model)
+        self.model_name = model or provider_config.model
+        self.model = genai.GenerativeModel(self.model_name)
         self.generation_config = GenerationConfig(
             temperature=float(provider_config.parameters.get("temperature", 0.1)),
         )
+        self.context_cache = str(provider_config.parameters.get("context_cache", False)).lower() == "true"
+        self.context_cache_ttl = int(provider_config.parameters.get("context_cache_ttl", DEFAULT_CONTEXT_CACHE_TTL))
+        self.context_cache_min_tokens = int(provider_config.parameters.get("context_cache_min_tokens", MIN_CONTEXT_CACHE_TOKENS))
+        # Prompt instructions -> (model bound to their cached content, or None after a failed create; refresh or retry deadline)
+        self._cached_models: Dict[str, Tuple[Optional[genai.GenerativeModel], float]] = {}
+        self._cache_lock = threading.Lock()
+
+    def generate_content(self, prompt: Union[str, Prompt]) -> str:
+        return self.generate_content_with_usage(prompt)[0]
 
-    def generate_content(self, prompt: str) -> str:
+    def generate_content_with_usage(self, prompt: Union[str, Prompt]) -> Tuple[str, Dict[str, int]]:
         try:
-            response = self.model.generate_content(prompt, generation_config=self.generation_config)
-            return response.text
+            model = self._get_cached_model(prompt) if self.context_cache and isinstance(prompt, Prompt) else None
+            if model is not None:
+                response = model.generate_content(prompt.content, generation_config=self.generation_config)
+            else:
+                response = self.model.generate_content(prompt_text(prompt), generation_config=self.generation_config)
+            usage = {}
+            if response.usage_metadata:
+                usage = {
+                    "prompt_tokens": response.usage_metadata.prompt_token_count,
+                    "completion_tokens": response.usage_metadata.candidates_token_count,
+                    "cached_tokens": response.usage_metadata.cached_content_token_count,
+                }
+            return response.text, usage
         except Exception as e:
             raise Exception(f"Error generating content with Gemini: {e}")
 
-    def parse_response(self, response: str) -> dict:
+    def _get_cached_model(self, prompt: Prompt) -> Optional[genai.GenerativeModel]:
+        """Returns a model that reads the prompt's instructions from a Gemini cached content, creating it once per TTL.
+
+        Instructions shorter than Gemini's minimum cacheable size are sent in full without trying; a failed create
+        is retried after the TTL.
+        """
+        if len(prompt.instructions) // CHARS_PER_TOKEN < self.context_cache_min_tokens:
+            return None
+        with self._cache_lock:
+            entry = self._cached_models.get(prompt.instructions)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+            try:
+                cached_content = genai.caching.CachedContent.create(
+                    model=self.model_name,
+                    display_name=f"linguaboost-prompt-v{prompt.version}",
+                    system_instruction=prompt.instructions,
+                    ttl=self.context_cache_ttl,
+                )
+                # Refresh a little before Gemini expires the cached content
+                entry = (genai.GenerativeModel.from_cached_content(cached_content), time.time() + self.context_cache_ttl * 0.9)
+            except Exception as e:
+                print(f"Gemini context cache unavailable, sending full prompts (retry in {self.context_cache_ttl}s): {e}")
+                entry = (None, time.time() + self.context_cache_ttl)
+            self._cached_models[prompt.instructions] = entry
+            return entry[0]
+
+    @staticmethod
+    def parse_response(response: str) -> dict:
         try:
             match = re.search(r"\{.*\}", response, re.DOTALL)
             if not match:
@@ -32,4 +89,4 @@ class GeminiAIProvider(AIProvider):
             cleaned_response = remove_trailing_commas(json_string)
             return json.loads(cleaned_response)
         except json.JSONDecodeError as e:
-            raise JSONParsingError(f"Error decoding JSON: {e}", response)
\ No newline at end of file
+            raise JSONParsingError(f"Error decoding JSON: {e}", response)
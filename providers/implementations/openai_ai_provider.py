@@ -4,10 +4,12 @@ from core.errors import JSONParsingError
 from core.helpers import remove_trailing_commas
 import re
 from openai import OpenAI
-from providers import AIProvider
+from typing import Dict, Optional, Tuple, Union
+from core.types import Prompt
+from providers import AIProvider, prompt_text
 
 class OpenAIAIProvider(AIProvider):
-    def __init__(self, config, provider_name):
+    def __init__(self, config, provider_name, model: Optional[str] = None):
         super().__init__(config, provider_name)
         provider_config = config.get_provider_config(provider_name)
 
@@ -15,7 +17,7 @@ class OpenAIAIProvider(AIProvider):
             api_key=provider_config.api_key,
             base_url=provider_config.base_url
         )
-        self.model_name = provider_config.model
+        self.model_name = model or provider_config.model
         self.parameters = {}
         for key, value in provider_config.parameters.items():
             if key == "messages":
@@ -28,8 +30,13 @@ class OpenAIAIProvider(AIProvider):
             else:
                 self.parameters[key] = value
 
-    def generate_content(self, prompt: str) -> str:
+    def generate_content(self, prompt: Union[str, Prompt]) -> str:
+        return self.generate_content_with_usage(prompt)[0]
+
+    def generate_content_with_usage(self, prompt: Union[str, Prompt]) -> Tuple[str, Dict[str, int]]:
         try:
+            # The configured messages stay in front, so with the instructions first the request shares a long cacheable prefix
+            prompt = prompt_text(prompt)
             messages = [
                 {
                     "role": msg["role"],
@@ -44,11 +51,24 @@ class OpenAIAIProvider(AIProvider):
                 stream=stream,
                 max_tokens=512,
             )
-            return "".join(chunk.choices[0].delta.content for chunk in response if chunk.choices[0].delta.content is not None) if stream else response.choices[0].message.content
+            if stream:
+                return "".join(chunk.choices[0].delta.content for chunk in response if chunk.choices[0].delta.content is not None), {}
+            usage = {}
+            if response.usage:
+                usage = {
+                    "prompt_tokens": response.usage.prompt_tokens,
+                    "completion_tokens": response.usage.completion_tokens,
+                    "cached_tokens": _cached_tokens(response.usage),
+                }
+            return response.choices[0].message.content, usage
         except Exception as e:
             raise Exception(f"Error generating content with OpenAI: {e}")
 
-    def parse_response(self, response: str) -> dict:
+    def close(self):
+        self.client.close()
+
+    @staticmethod
+    def parse_response(response: str) -> dict:
         try:
             return json.loads(remove_trailing_commas(response))
         except json.JSONDecodeError:
@@ -60,4 +80,11 @@ class OpenAIAIProvider(AIProvider):
                 cleaned_response = remove_trailing_commas(json_string)
                 return json.loads(cleaned_response)
             except json.JSONDecodeError as e:
-                raise JSONParsingError(f"Error decoding JSON: {e}", response)
\ No newline at end of file
+                raise JSONParsingError(f"Error decoding JSON: {e}", response)
+
+def _cached_tokens(usage) -> int:
+    """Reads prompt cache hits from OpenAI's usage details, or from the DeepSeek-style field some compatible APIs use."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    if details is not None and getattr(details, "cached_tokens", None):
+        return details.cached_tokens
+    return getattr(usage, "prompt_cache_hit_tokens", None) or 0
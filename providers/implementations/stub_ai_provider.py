@@ -0,0 +1,55 @@
+import json
+import random
+import re
+import time
+from core.types import Prompt
+from typing import Dict, Optional, Set, Tuple, Union
+from providers import AIProvider, prompt_text
+
+_FEATURE = re.compile(r"\[LinguaBoost prompt v\d+: (\w+)\]")
+_WORDS = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?")
+
+class StubAIProvider(AIProvider):
+    """Offline provider for load tests: answers every prompt with deterministic JSON after a configurable delay.
+
+    Token usage is estimated at four characters per token, and an instruction block counts as
+    cached from its second use on, like a provider-side prefix cache.
+    """
+
+    def __init__(self, config, provider_name, model: Optional[str] = None):
+        super().__init__(config, provider_name)
+        provider_config = config.get_provider_config(provider_name)
+        self.model_name = model or provider_config.model
+        self.latency = float(provider_config.parameters.get("latency_ms", 300)) / 1000
+        self.jitter = float(provider_config.parameters.get("jitter_ms", 0)) / 1000
+        self._seen_instructions: Set[str] = set()
+
+    def generate_content(self, prompt: Union[str, Prompt]) -> str:
+        return self.generate_content_with_usage(prompt)[0]
+
+    def generate_content_with_usage(self, prompt: Union[str, Prompt]) -> Tuple[str, Dict[str, int]]:
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        text = prompt_text(prompt)
+        feature = _FEATURE.search(text)
+        content = prompt.content if isinstance(prompt, Prompt) else text
+        preamble, _, sentence = content.partition("Input Sentence:")
+        sentence = sentence.strip() or content
+        known = {word.strip().lower() for word in preamble.partition("Known Vocabulary:")[2].split(";")}
+        if feature and feature.group(1) == "translation":
+            result = {"Translation": f"[stub] {sentence}"}
+        elif feature and feature.group(1) == "grammar_check":
+            result = {"CorrectedSentence": sentence, "CorrectionGuide": "No errors found (stub)."}
+        else:
+            longest = sorted(set(_WORDS.findall(sentence)) - known, key=lambda word: (-len(word), word))[:3]
+            result = {"Words": [{"word": word, "definition": f"stub definition of {word}"} for word in longest]}
+        cached_tokens = 0
+        if isinstance(prompt, Prompt):
+            if prompt.instructions in self._seen_instructions:
+                cached_tokens = len(prompt.instructions) // 4
+            self._seen_instructions.add(prompt.instructions)
+        response = json.dumps(result, ensure_ascii=False)
+        return response, {"prompt_tokens": len(text) // 4, "completion_tokens": len(response) // 4, "cached_tokens": cached_tokens}
+
+    @staticmethod
+    def parse_response(response: str) -> dict:
+        return json.loads(response)
@@ -1,16 +1,26 @@
 # providers/provider_factory.py
+from typing import Optional
 from core.config import Config
 from core.errors import UnsupportedAIProviderError
 from providers.implementations.gemini_ai_provider import GeminiAIProvider
 from providers.implementations.openai_ai_provider import OpenAIAIProvider
+from providers.implementations.stub_ai_provider import StubAIProvider
+from providers.router import RoutingAIProvider
 from providers import AIProvider
 
 def get_ai_provider(config: Config) -> AIProvider:
     """Returns an AI provider instance based on the configuration."""
-    provider_name = config.get_ai_provider_name()
+    if config.routing.enabled:
+        return RoutingAIProvider(config, create_ai_provider)
+    return create_ai_provider(config, config.get_ai_provider_name())
+
+def create_ai_provider(config: Config, provider_name: str, model: Optional[str] = None) -> AIProvider:
+    """Returns the named provider, using `model` instead of the model in its section when given."""
     if provider_name == "gemini":
-        return GeminiAIProvider(config, provider_name)
+        return GeminiAIProvider(config, provider_name, model)
     elif provider_name == "openai":
-        return OpenAIAIProvider(config, provider_name)
+        return OpenAIAIProvider(config, provider_name, model)
+    elif provider_name == "stub":
+        return StubAIProvider(config, provider_name, model)
     else:
         raise UnsupportedAIProviderError(provider_name)
\ No newline at end of file
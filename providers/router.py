@@ -0,0 +1,165 @@
+# providers/router.py
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
+from core.config import Config
+from core.errors import AIProviderError
+from core.language import count_scripts, detect_language
+from core.metrics import ROUTE_SECONDS, record_error
+from core.types import Prompt, RouteRule, RouteTarget
+from providers import AIProvider
+
+DEFAULT_ROUTE = "default"
+LATENCY_WINDOW = 200  # Recent successful calls kept per route target for percentiles
+MIN_SAMPLES = 5  # Calls a target needs before prefer_fastest trusts its latency
+
+
+class RouteStats:
+    """Latency and outcome counters for one (route, target) pair."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.fallbacks = 0  # Calls this target answered after an earlier target of the route failed
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def mean_latency(self) -> Optional[float]:
+        return sum(self.latencies) / len(self.latencies) if len(self.latencies) >= MIN_SAMPLES else None
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly one token per CJK character and per four characters of anything else."""
+    counts = count_scripts(text)
+    cjk = counts["han"] + counts["kana"] + counts["hangul"]
+    return cjk + (len(text) - cjk + 3) // 4
+
+def rule_matches(rule: RouteRule, feature: str, text: str) -> bool:
+    if rule.features and feature not in rule.features:
+        return False
+    if rule.min_chars and len(text) < rule.min_chars or rule.max_chars and len(text) > rule.max_chars:
+        return False
+    if rule.min_tokens or rule.max_tokens:
+        tokens = estimate_tokens(text)
+        if rule.min_tokens and tokens < rule.min_tokens or rule.max_tokens and tokens > rule.max_tokens:
+            return False
+    if rule.languages and detect_language(text).lower() not in rule.languages:
+        return False
+    return True
+
+
+class RoutingAIProvider(AIProvider):
+    """Sends each prompt to the provider/model of the first [routing.rules] entry it matches.
+
+    Targets of a rule are tried in order until one returns a response its own provider can parse;
+    prompts no rule matches go to the selected provider. Responses are handed on as plain JSON.
+    """
+
+    def __init__(self, config: Config, create_provider: Callable[[Config, str, Optional[str]], AIProvider]):
+        super().__init__(config, "router")
+        self.routing = config.routing
+        self.default_target = RouteTarget(provider=config.selected_provider, model="")
+        self._create_provider = create_provider
+        self._providers: Dict[RouteTarget, AIProvider] = {}
+        self._stats: Dict[Tuple[str, RouteTarget], RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def route(self, prompt: Union[str, Prompt]) -> Tuple[str, Tuple[RouteTarget, ...]]:
+        """Returns the name of the matching rule and its targets in the order they should be tried."""
+        if isinstance(prompt, Prompt):
+            text = prompt.content.partition("Input Sentence:")[2].strip()
+            for rule in self.routing.rules:
+                if rule.targets and rule_matches(rule, prompt.feature, text):
+                    return rule.name, self._order(rule.name, rule.targets)
+        return DEFAULT_ROUTE, (self.default_target,)
+
+    def _order(self, route: str, targets: Tuple[RouteTarget, ...]) -> Tuple[RouteTarget, ...]:
+        if not self.routing.prefer_fastest or len(targets) < 2:
+            return targets
+        # Targets without enough samples sort first so every target gets measured; mostly failing ones go last
+        def latency(target: RouteTarget) -> float:
+            stats = self._stats.get((route, target))
+            if stats is None:
+                return 0.0
+            if stats.calls >= MIN_SAMPLES and stats.errors * 2 > stats.calls:
+                return float("inf")
+            mean = stats.mean_latency()
+            return 0.0 if mean is None else mean
+        return tuple(sorted(targets, key=latency))
+
+    def _provider(self, target: RouteTarget) -> AIProvider:
+        with self._lock:
+            if target not in self._providers:
+                self._providers[target] = self._create_provider(self.config, target.provider, target.model or None)
+            return self._providers[target]
+
+    def _route_stats(self, route: str, target: RouteTarget) -> RouteStats:
+        with self._lock:
+            return self._stats.setdefault((route, target), RouteStats())
+
+    def generate_content(self, prompt: Union[str, Prompt]) -> str:
+        return self.generate_content_with_usage(prompt)[0]
+
+    def generate_content_with_usage(self, prompt: Union[str, Prompt]) -> Tuple[str, Dict[str, int]]:
+        route, targets = self.route(prompt)
+        errors: List[str] = []
+        for target in targets:
+            stats = self._route_stats(route, target)
+            start_time = time.perf_counter()
+            try:
+                provider = self._provider(target)
+                raw_response, usage = provider.generate_content_with_usage(prompt)
+                data = provider.parse_response(raw_response)
+            except Exception as e:
+                stats.calls += 1
+                stats.errors += 1
+                record_error("routing", e)
+                errors.append(f"{target.provider}:{target.model or '-'}: {e}")
+                print(f"Route '{route}' target {target.provider} failed, trying the next: {e}")
+                continue
+            elapsed = time.perf_counter() - start_time
+            stats.calls += 1
+            stats.fallbacks += bool(errors)
+            stats.latencies.append(elapsed)
+            ROUTE_SECONDS.observe(elapsed, route, target.provider, self._model_name(target))
+            return json.dumps(data, ensure_ascii=False), usage
+        raise AIProviderError(f"All targets of route '{route}' failed: {'; '.join(errors)}")
+
+    def close(self):
+        with self._lock:
+            providers = list(self._providers.values())
+        for provider in providers:
+            provider.close()
+
+    @staticmethod
+    def parse_response(response: str) -> dict:
+        return json.loads(response)
+
+    def _model_name(self, target: RouteTarget) -> str:
+        provider = self._providers.get(target)
+        return target.model or getattr(provider, "model_name", "") or "-"
+
+    def route_stats(self) -> List[Dict]:
+        """Returns per-route, per-target call counts and latencies (seconds), in rule order."""
+        order = {rule.name: index for index, rule in enumerate(self.routing.rules)}
+        with self._lock:
+            stats = list(self._stats.items())
+        rows = []
+        for (route, target), entry in sorted(stats, key=lambda item: order.get(item[0][0], len(order))):
+            rows.append({
+                "route": route,
+                "provider": target.provider,
+                "model": self._model_name(target),
+                "calls": entry.calls,
+                "errors": entry.errors,
+                "fallbacks": entry.fallbacks,
+                "mean": round(sum(entry.latencies) / len(entry.latencies), 4) if entry.latencies else 0,
+                "p50": round(entry.percentile(0.5), 4),
+                "p95": round(entry.percentile(0.95), 4),
+            })
+        return rows
@@ -30,6 +30,7 @@ def update_grammar_check(config, key, value):
         config.set_setting('analysisEnabled', False)
 
 def get_settings_handlers(config: Config) -> List[SettingHandler]:
+    provider_config = config.get_provider_config(config.selected_provider)
     return [
         SettingHandler('translationEnabled', 'Translation:', config.get_setting("translationEnabled", True), 'checkbox', lambda c, k, v: update_config(c, k, v)),
         SettingHandler('ttsEnabled', 'TTS:', config.get_setting("ttsEnabled", True), 'checkbox', lambda c, k, v: update_config(c, k, v)),
@@ -37,7 +38,7 @@ def get_settings_handlers(config: Config) -> List[SettingHandler]:
         SettingHandler('autoplayEnabled', 'Autoplay:', config.audio.autoplay, 'checkbox', lambda c, k, v: update_audio_config(c, k, v)),
         # SettingHandler('grammarCheckEnabled', 'Grammar Check:', config.get_setting("grammarCheckEnabled", False), 'checkbox', lambda c, k, v: update_grammar_check(c, k, v)),
         SettingHandler('selectedProvider', 'AI Provider:', config.selected_provider, 'text' , lambda c, k, v: update_selected_provider(c, k, v)),
-        SettingHandler('apiKey', 'API Key:', config.get_provider_config(config.selected_provider).api_key, 'text', lambda c, k, v: update_provider_api_key(c, k, v)),
-        SettingHandler('baseUrl', 'Base URL:', config.get_provider_config(config.selected_provider).base_url, 'text', lambda c, k, v: update_provider_base_url(c, k, v)),
-        SettingHandler('model', 'Model:', config.get_provider_config(config.selected_provider).model, 'text', lambda c, k, v: update_provider_model(c, k, v)),
+        SettingHandler('apiKey', 'API Key:', provider_config.api_key, 'text', lambda c, k, v: update_provider_api_key(c, k, v)),
+        SettingHandler('baseUrl', 'Base URL:', provider_config.base_url, 'text', lambda c, k, v: update_provider_base_url(c, k, v)),
+        SettingHandler('model', 'Model:', provider_config.model, 'text', lambda c, k, v: update_provider_model(c, k, v)),
     ]
\ No newline at end of file
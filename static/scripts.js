@@ -9,6 +9,7 @@ document.body.appendChild(tooltip);
 
 let isAddingToAnki = false;
 let isSettingsPanelInitialized = false;
+const wordAudioCache = new Map();
 
 // --- Helper Functions ---
 const translationButton = document.getElementById('translation-button');
@@ -178,7 +179,7 @@ async function addToAnki(word, definition, text, translation) {
             throw new Error(`Error adding to Anki: ${data.error}`);
         }
 
-        showCustomAlert(`Successfully added: ${data.result}`);
+        showCustomAlert(data.result);
     } catch (error) {
         console.error("Error adding to Anki:", error);
         showCustomAlert(`Error: ${error.message}`);
@@ -228,11 +229,29 @@ function hideTooltip() {
     tooltip.classList.remove('visible');
 }
 
+function playWordAudio(word) {
+    // Served from the local audio cache, which the server fills in the background after each lookup
+    let audio = wordAudioCache.get(word);
+    if (!audio) {
+        audio = new Audio(`/word_audio?text=${encodeURIComponent(word)}`);
+        // A failed request is not kept, so the next hover asks again
+        audio.addEventListener('error', () => wordAudioCache.delete(word));
+        wordAudioCache.set(word, audio);
+    }
+    audio.currentTime = 0;
+    audio.play().catch(error => {
+        console.debug("Word audio unavailable:", error);
+        if (audio.error) wordAudioCache.delete(word);
+    });
+}
+
 function handleMouseEnter(event) {
     const target = event.target;
     if (!target.classList.contains('highlighted-term')) return;
 
     showTooltip(target);
+    // Only with TTS and autoplay on; otherwise there is no word audio to play
+    if (window.WORD_AUDIO_ENABLED) playWordAudio(target.textContent);
 }
 
 function handleMouseLeave(event) {
@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+import sys
+from typing import Dict, List, Set, Tuple, Union
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.cache import CacheManager
+from core.config import Config
+from core.types import Prompt
+from providers import AIProvider, prompt_text
+
+
+class FakeProvider(AIProvider):
+    """Answers every prompt from the sentence at its end; sentences in `fail` raise once, like a provider error."""
+
+    def __init__(self):
+        self.provider_name = "fake"
+        self.calls: List[str] = []
+        self.fail: Set[str] = set()
+
+    def generate_content(self, prompt: Union[str, Prompt]) -> str:
+        return self.generate_content_with_usage(prompt)[0]
+
+    def generate_content_with_usage(self, prompt: Union[str, Prompt]) -> Tuple[str, Dict[str, int]]:
+        sentence = prompt_text(prompt).rpartition("Input Sentence:")[2].strip()
+        self.calls.append(sentence)
+        if sentence in self.fail:
+            self.fail.discard(sentence)
+            raise RuntimeError(f"provider failed on {sentence!r}")
+        feature = prompt.feature if isinstance(prompt, Prompt) else ""
+        if feature == "translation":
+            result = {"Translation": f"T({sentence})"}
+        elif feature == "analysis":
+            result = {"Words": [{"word": sentence.split()[0].strip(".,!?"), "definition": "d"}]}
+        else:
+            result = {"CorrectedSentence": sentence, "CorrectionGuide": ""}
+        return json.dumps(result), {"prompt_tokens": 10, "completion_tokens": 5, "cached_tokens": 0}
+
+    @staticmethod
+    def parse_response(response: str) -> dict:
+        return json.loads(response)
+
+
+@pytest.fixture
+def config(tmp_path) -> Config:
+    """A Config over a copy of the repository's config.ini, cached next to it."""
+    shutil.copy(os.path.join(ROOT, "config.ini"), tmp_path / "config.ini")
+    return Config(str(tmp_path / "config.ini"), CacheManager(str(tmp_path / "cache.json")))
+
+@pytest.fixture
+def provider(monkeypatch) -> FakeProvider:
+    """Makes every TranslationService built afterwards use a FakeProvider."""
+    fake = FakeProvider()
+    monkeypatch.setattr("core.services.translation_service.get_ai_provider", lambda config: fake)
+    return fake
@@ -0,0 +1,110 @@
+from unittest import mock
+
+import pytest
+
+from core.connectors import anki_outbox
+from core.connectors.anki_connector import DUPLICATE_ERROR, NoteResult
+from core.connectors.anki_outbox import MAX_ATTEMPTS, MAX_RETRY_INTERVAL, RETRY_INTERVAL, AnkiOutbox
+from core.errors import AnkiActionError, AnkiError
+
+
+class Connector:
+    """Stands in for AnkiConnector; `error` is raised by the next add_notes call."""
+
+    def __init__(self):
+        self.batches = []
+        self.error = None
+
+    def add_notes(self, notes):
+        self.batches.append([note["word"] for note in notes])
+        if self.error is not None:
+            raise self.error
+        return [NoteResult(None, DUPLICATE_ERROR) if note["word"] == "dup" else NoteResult(len(self.batches)) for note in notes]
+
+
+class Stop(BaseException):
+    """Ends the outbox worker loop, which carries on after any Exception."""
+
+
+@pytest.fixture
+def connector() -> Connector:
+    return Connector()
+
+@pytest.fixture
+def outbox(tmp_path, connector) -> AnkiOutbox:
+    return AnkiOutbox(str(tmp_path / "outbox.db"), lambda: connector, batch_size=2)
+
+def enqueue(outbox: AnkiOutbox, *words: str):
+    outbox.enqueue_many([(word, {"word": word}) for word in words])
+
+
+def test_notes_are_delivered_in_batches(outbox, connector):
+    enqueue(outbox, "a", "b", "c")
+
+    assert outbox.deliver_pending() == 3
+    assert connector.batches == [["a", "b"], ["c"]]
+    stats = outbox.stats()
+    assert (stats["depth"], stats["delivered"], stats["ankiReachable"]) == (0, 3, True)
+    assert not outbox.is_pending("a")
+
+def test_duplicates_are_rejected_one_by_one(outbox, connector):
+    enqueue(outbox, "a", "dup")
+
+    outbox.deliver_pending()
+
+    assert outbox.stats()["delivered"] == 1
+    assert outbox.stats()["rejected"] == 1
+
+def test_notes_stay_pending_while_anki_is_unreachable(outbox, connector):
+    enqueue(outbox, "a")
+    connector.error = AnkiError("connection refused")
+
+    for _ in range(MAX_ATTEMPTS + 1):
+        with pytest.raises(AnkiError):
+            outbox.deliver_pending()
+
+    assert outbox.is_pending("a")
+    assert outbox.stats()["ankiReachable"] is False
+    connector.error = None
+    assert outbox.deliver_pending() == 1
+
+def test_batch_refused_by_anki_is_rejected_after_max_attempts(outbox, connector):
+    enqueue(outbox, "a")
+    connector.error = AnkiActionError("model was not found")
+
+    for _ in range(MAX_ATTEMPTS - 1):
+        with pytest.raises(AnkiActionError):
+            outbox.deliver_pending()
+        assert outbox.is_pending("a")
+    with pytest.raises(AnkiActionError):
+        outbox.deliver_pending()
+
+    stats = outbox.stats()
+    assert (stats["depth"], stats["rejected"], stats["ankiReachable"]) == (0, 1, True)
+
+def test_queue_survives_a_restart(tmp_path, connector):
+    enqueue(AnkiOutbox(str(tmp_path / "outbox.db"), lambda: connector), "a")
+
+    reopened = AnkiOutbox(str(tmp_path / "outbox.db"), lambda: connector)
+
+    assert reopened.is_pending("a")
+    assert reopened.deliver_pending() == 1
+
+def test_worker_backs_off_while_anki_is_down(outbox, connector):
+    enqueue(outbox, "a")
+    connector.error = AnkiError("connection refused")
+    waits = []
+
+    def wait(timeout):
+        waits.append(timeout)
+        if len(waits) == 8:
+            connector.error = None
+        if len(waits) == 10:
+            raise Stop()
+
+    with mock.patch.object(outbox._wake, "wait", wait), mock.patch.object(anki_outbox, "set_priority"):
+        with pytest.raises(Stop):
+            outbox._run()
+
+    assert waits == [RETRY_INTERVAL, 20, 40, 80, 160, MAX_RETRY_INTERVAL, MAX_RETRY_INTERVAL, MAX_RETRY_INTERVAL, RETRY_INTERVAL, RETRY_INTERVAL]
+    assert outbox.stats()["delivered"] == 1
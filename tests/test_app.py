@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import app as server
+from core.memory_cache import CompressedCache
+from core.services.translation_service import TranslationService
+from core.types import Features
+
+TEXT = "The sun rose. Birds sang loudly."
+FEATURES = Features(translation_enabled=True, tts_enabled=False, analysis_enabled=True, grammar_check_enabled=False)
+
+
+class NoteIndex:
+    def sync_if_stale(self):
+        pass
+
+    def known_terms(self, terms):
+        return set()
+
+
+@pytest.fixture
+def service(config, provider, monkeypatch) -> TranslationService:
+    """Points the app's module globals, normally set up by init_worker, at a single-worker test setup."""
+    monkeypatch.setattr(server, "config", config, raising=False)
+    monkeypatch.setattr(server, "translation_cache", CompressedCache(1024 * 1024), raising=False)
+    monkeypatch.setattr(server, "vocabulary_store", None, raising=False)
+    monkeypatch.setattr(server, "lookup_context", None)
+    anki_connector = SimpleNamespace(note_index=NoteIndex())
+    monkeypatch.setattr(server, "service_container", SimpleNamespace(current=SimpleNamespace(anki_connector=anki_connector)), raising=False)
+    return TranslationService(config)
+
+def lookup(service: TranslationService) -> str:
+    with server.app.test_request_context():
+        return asyncio.run(server.process_text(TEXT, FEATURES, server.config, service, None))
+
+
+def test_complete_page_is_cached(service, provider):
+    html = lookup(service)
+    provider.calls.clear()
+
+    assert lookup(service) == html
+    assert provider.calls == []
+    assert len(server.translation_cache) == 1
+
+def test_partial_page_is_not_cached(service, provider):
+    provider.fail.add("Birds sang loudly.")
+
+    html = lookup(service)
+
+    assert "T(The sun rose.)" in html
+    assert len(server.translation_cache) == 0
+
+def test_lookup_after_a_partial_page_retries_only_the_failed_sentence(service, provider):
+    provider.fail.add("Birds sang loudly.")
+    lookup(service)
+    provider.calls.clear()
+
+    html = lookup(service)
+
+    assert provider.calls == ["Birds sang loudly."]  # Only its translation failed; the analysis is cached
+    assert "T(The sun rose.) T(Birds sang loudly.)" in html
+    assert len(server.translation_cache) == 1
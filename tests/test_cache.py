@@ -0,0 +1,103 @@
+import json
+import os
+from unittest import mock
+
+import pytest
+
+from core.cache import SCHEMA_VERSION, CacheManager, atomic_write_json
+from core.errors import CacheError
+
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.fixture
+def cache_path(tmp_path) -> str:
+    return str(tmp_path / "anki_cache.json")
+
+
+def test_atomic_write_replaces_the_target(tmp_path):
+    path = str(tmp_path / "data.json")
+    atomic_write_json(path, {"a": 1})
+    atomic_write_json(path, {"a": 2})
+
+    assert read_json(path) == {"a": 2}
+    assert os.listdir(tmp_path) == ["data.json"]
+
+def test_failed_write_keeps_the_old_file_and_no_temp_file(tmp_path):
+    path = str(tmp_path / "data.json")
+    atomic_write_json(path, {"a": 1})
+
+    with pytest.raises(TypeError):
+        atomic_write_json(path, {"a": object()})
+
+    assert read_json(path) == {"a": 1}
+    assert os.listdir(tmp_path) == ["data.json"]
+
+def test_changes_are_written_once_on_flush(cache_path):
+    cache = CacheManager(cache_path, flush_delay=60)
+    cache.add_deck("Words")
+    cache.add_model("Basic")
+
+    assert not os.path.exists(cache_path)  # Still waiting for the write-behind timer
+    with mock.patch("core.cache.atomic_write_json", wraps=atomic_write_json) as write:
+        cache.flush()
+        cache.flush()
+
+    assert write.call_count == 1
+    assert read_json(cache_path) == {"schema": SCHEMA_VERSION, "decks": {"Words": True}, "models": {"Basic": True}}
+
+def test_write_behind_timer_flushes(cache_path):
+    cache = CacheManager(cache_path, flush_delay=0.01)
+    cache.add_deck("Words")
+
+    cache._flush_timer.join(5)
+
+    assert CacheManager(cache_path).deck_exists("Words")
+
+def test_config_is_written_to_its_own_file(cache_path):
+    cache = CacheManager(cache_path, flush_delay=60)
+    cache.update_config({"settings": {"ttsenabled": "True"}})
+    cache.flush()
+
+    assert read_json(cache.config_cache_path) == {"settings": {"ttsenabled": "True"}}
+    assert not os.path.exists(cache_path)
+
+def test_schema_1_cache_is_migrated(cache_path):
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"decks": {"Words": True}, "models": {}, "config": {"settings": {"ttsenabled": "True"}}}, f)
+
+    cache = CacheManager(cache_path, flush_delay=60)
+
+    assert cache.config == {"settings": {"ttsenabled": "True"}}
+    cache.flush()
+    assert read_json(cache_path) == {"schema": SCHEMA_VERSION, "decks": {"Words": True}, "models": {}}
+    assert read_json(cache.config_cache_path) == {"settings": {"ttsenabled": "True"}}
+
+def test_separate_config_file_wins_over_schema_1_config(cache_path):
+    cache = CacheManager(cache_path, flush_delay=60)
+    with open(cache_path, "w", encoding="utf-8") as f:
+        json.dump({"decks": {}, "models": {}, "config": {"old": {}}}, f)
+    with open(cache.config_cache_path, "w", encoding="utf-8") as f:
+        json.dump({"new": {}}, f)
+
+    assert cache.config == {"new": {}}
+
+def test_failed_flush_is_retried(cache_path):
+    cache = CacheManager(cache_path, flush_delay=60)
+    cache.add_deck("Words")
+
+    with mock.patch("core.cache.atomic_write_json", side_effect=OSError("disk full")):
+        with pytest.raises(CacheError):
+            cache.flush()
+    cache.flush()
+
+    assert read_json(cache_path)["decks"] == {"Words": True}
+
+def test_corrupt_cache_raises(cache_path):
+    with open(cache_path, "w", encoding="utf-8") as f:
+        f.write("{")
+
+    with pytest.raises(CacheError):
+        CacheManager(cache_path).decks
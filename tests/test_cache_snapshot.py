@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from core.cache_snapshot import AUDIO_INDEX, MANIFEST, RESULTS, SNAPSHOT_VERSION, _sha256, export_snapshot, import_snapshot
+from core.errors import CacheError
+from core.services.audio_service import AudioService
+from core.services.translation_service import TranslationService
+
+TEXT = "The cat sat."
+ANALYSIS = {"Words": [{"word": "cat", "definition": "a pet"}]}
+
+
+@pytest.fixture(autouse=True)
+def temp_dir(tmp_path, monkeypatch):
+    """Keeps word audio (and the trim of its directory) inside the test's directory."""
+    monkeypatch.setattr("core.services.audio_service.tempfile.gettempdir", lambda: str(tmp_path))
+
+@pytest.fixture
+def snapshot(config, provider) -> bytes:
+    translation_service, audio_service = TranslationService(config), AudioService(config)
+    translation_service.restore_result(f"generate_analysis_prompt:{TEXT}", ANALYSIS)
+    translation_service.restore_result(f"generate_translation_prompt:{TEXT}", {"Translation": "Le chat."})
+    audio_service.store_word_audio("cat", b"mp3 bytes")
+    file = io.BytesIO()
+    assert export_snapshot(file, translation_service, audio_service) == {"results": 2, "audio": 1}
+    return file.getvalue()
+
+@pytest.fixture
+def target(config, provider, tmp_path):
+    """Services of another installation, with empty caches."""
+    audio_service = AudioService(config)
+    audio_service.word_audio_dir = str(tmp_path / "target_audio")
+    os.makedirs(audio_service.word_audio_dir)
+    return TranslationService(config), audio_service
+
+def rewrite(snapshot: bytes, name: str, transform, fix_checksum: bool = False) -> io.BytesIO:
+    """Returns a copy of the snapshot with one member transformed, with a matching manifest checksum if asked."""
+    with zipfile.ZipFile(io.BytesIO(snapshot)) as source:
+        members = {member: source.read(member) for member in source.namelist()}
+    members[name] = transform(members[name])
+    if fix_checksum:
+        manifest = json.loads(members[MANIFEST])
+        manifest["sha256"][name] = _sha256(members[name])
+        members[MANIFEST] = json.dumps(manifest).encode("utf-8")
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        for member, data in members.items():
+            archive.writestr(member, data)
+    output.seek(0)
+    return output
+
+def edit_lines(edit):
+    return lambda data: b"".join(json.dumps(edit(json.loads(line))).encode("utf-8") + b"\n" for line in data.splitlines())
+
+
+def test_round_trip_restores_results_and_audio(snapshot, target):
+    translation_service, audio_service = target
+
+    counts = import_snapshot(io.BytesIO(snapshot), translation_service, audio_service)
+
+    assert counts["results"] == {"imported": 2, "existing": 0, "mismatched": 0}
+    assert counts["audio"] == {"imported": 1, "existing": 0, "mismatched": 0, "corrupt": 0}
+    assert translation_service.cached_data("analysis", TEXT) == ANALYSIS
+    with open(audio_service.word_audio_path("cat"), "rb") as f:
+        assert f.read() == b"mp3 bytes"
+
+def test_cached_entries_are_kept(snapshot, target):
+    translation_service, audio_service = target
+    translation_service.restore_result(f"generate_translation_prompt:{TEXT}", {"Translation": "Mine."})
+
+    counts = import_snapshot(io.BytesIO(snapshot), translation_service, audio_service)
+
+    assert counts["results"] == {"imported": 1, "existing": 1, "mismatched": 0}
+    assert translation_service.cached_data("translation", TEXT) == {"Translation": "Mine."}
+
+def test_results_from_another_provider_are_skipped(snapshot, target):
+    tampered = rewrite(snapshot, RESULTS, edit_lines(lambda entry: dict(entry, provider="other")), fix_checksum=True)
+
+    counts = import_snapshot(tampered, *target)
+
+    assert counts["results"] == {"imported": 0, "existing": 0, "mismatched": 2}
+    assert counts["audio"]["imported"] == 1
+
+def test_audio_without_a_service_is_skipped(snapshot, target):
+    counts = import_snapshot(io.BytesIO(snapshot), target[0], None)
+
+    assert counts["audio"]["mismatched"] == 1
+
+@pytest.mark.parametrize("name", [RESULTS, AUDIO_INDEX])
+def test_member_failing_its_checksum_is_rejected(snapshot, target, name):
+    tampered = rewrite(snapshot, name, lambda data: data.replace(b"cat", b"dog"))
+
+    with pytest.raises(CacheError, match="checksum"):
+        import_snapshot(tampered, *target)
+    assert not target[0].result_cache
+
+def test_corrupt_audio_file_is_counted_and_skipped(snapshot, target):
+    with zipfile.ZipFile(io.BytesIO(snapshot)) as archive:
+        audio_file = json.loads(archive.read(AUDIO_INDEX))["file"]
+    tampered = rewrite(snapshot, audio_file, lambda data: b"truncated")
+
+    counts = import_snapshot(tampered, *target)
+
+    assert counts["audio"]["corrupt"] == 1
+    assert not os.path.exists(target[1].word_audio_path("cat"))
+
+def test_newer_version_is_rejected(snapshot, target):
+    newer = rewrite(snapshot, MANIFEST, lambda data: json.dumps(dict(json.loads(data), version=SNAPSHOT_VERSION + 1)).encode("utf-8"))
+
+    with pytest.raises(CacheError, match="newer"):
+        import_snapshot(newer, *target)
+
+def test_file_that_is_not_a_zip_is_rejected(target):
+    with pytest.raises(CacheError):
+        import_snapshot(io.BytesIO(b"not a zip file"), *target)
+
+def test_other_zip_file_is_rejected(target):
+    file = io.BytesIO()
+    with zipfile.ZipFile(file, "w") as archive:
+        archive.writestr(MANIFEST, json.dumps({"format": "something else"}))
+    file.seek(0)
+
+    with pytest.raises(CacheError, match="Not a LinguaBoost cache snapshot"):
+        import_snapshot(file, *target)
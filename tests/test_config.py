@@ -0,0 +1,55 @@
+import pytest
+
+from core.cache import CacheManager
+from core.config import Config
+from core.errors import ConfigurationError
+
+
+def test_snapshot_is_read_only(config):
+    with pytest.raises(TypeError):
+        config.snapshot.settings["ttsenabled"] = False
+
+def test_setting_change_compiles_a_new_snapshot(config):
+    before = config.snapshot
+    value = config.get_setting("ttsEnabled")
+
+    config.set_setting("ttsEnabled", not value)
+
+    assert config.snapshot is not before
+    assert config.snapshot.version == before.version + 1
+    assert config.snapshot.fingerprint != before.fingerprint
+    assert config.get_setting("ttsEnabled") is (not value)
+    assert before.settings["ttsenabled"] is value  # Requests holding the old snapshot keep seeing it
+
+def test_fingerprint_depends_only_on_the_settings(config):
+    fingerprint = config.snapshot.fingerprint
+    value = config.get_setting("ttsEnabled")
+
+    config.set_setting("ttsEnabled", not value)
+    config.set_setting("ttsEnabled", value)
+
+    assert config.snapshot.fingerprint == fingerprint
+    assert config.snapshot.version == 3
+
+def test_fingerprint_matches_across_processes(config, tmp_path):
+    config.selected_provider = "stub"
+    config.save_settings(config.config_path)
+
+    other = Config(config.config_path, CacheManager(str(tmp_path / "other.json")))
+
+    assert other.snapshot.fingerprint == config.snapshot.fingerprint
+    assert other.selected_provider == "stub"
+
+def test_properties_read_from_the_snapshot(config):
+    config.selected_provider = "stub"
+
+    assert config.snapshot.selected_provider == "stub"
+    assert config.get_provider_config("stub") is config.snapshot.providers["stub"]
+
+def test_unknown_provider_raises(config):
+    with pytest.raises(ConfigurationError):
+        config.get_provider_config("missing")
+
+def test_missing_file_raises(tmp_path):
+    with pytest.raises(ConfigurationError):
+        Config(str(tmp_path / "missing.ini"), CacheManager(str(tmp_path / "cache.json")))
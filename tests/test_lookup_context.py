@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from unittest import mock
+
+import pytest
+
+from core.html_generator import WordData
+from core.lookup_context import LookupContext, normalize, stem_key
+from core.shared_cache import SharedCache
+
+SENTENCE = "The cats looked at the running dogs."
+WORDS = [WordData("cat", "a small feline"), WordData("look at", "to direct one's eyes"), WordData("Dogs", "canines")]
+
+
+@pytest.fixture
+def context() -> LookupContext:
+    context = LookupContext(OrderedDict(), ttl_seconds=600, max_sentences=3)
+    context.remember(SENTENCE, WORDS, "Les chats regardaient les chiens.")
+    return context
+
+
+def test_normalize_and_stem():
+    assert normalize("  Cats,  ") == "cats"
+    assert stem_key("Cats'") == "cat"
+    assert stem_key("studies looked") == "study look"
+    assert stem_key("is") == "is"  # Too short to strip
+
+def test_exact_term_match(context):
+    match = context.lookup("dogs!")
+
+    assert (match.term, match.definition, match.sentence) == ("Dogs", "canines", SENTENCE)
+    assert match.translation == "Les chats regardaient les chiens."
+
+def test_stemmed_match(context):
+    assert context.lookup("Cats").term == "cat"
+    assert context.lookup("looked at").term == "look at"
+
+def test_unknown_word_is_not_answered(context):
+    assert context.lookup("horse") is None
+    assert context.lookup("...") is None
+
+def test_newest_sentence_wins(context):
+    context.remember("A cat sat.", [WordData("cat", "a pet")], "")
+
+    assert context.lookup("cat").definition == "a pet"
+
+def test_entries_expire(context):
+    with mock.patch("core.lookup_context.time.time", return_value=context.store[SENTENCE]["storedAt"] + 601):
+        assert context.lookup("cat") is None
+
+def test_touch_renews_an_entry(context):
+    stored_at = context.store[SENTENCE]["storedAt"]
+    context.remember("Another sentence.", [WordData("another", "one more")], "")
+
+    with mock.patch("core.lookup_context.time.time", return_value=stored_at + 300):
+        context.touch(SENTENCE)
+    with mock.patch("core.lookup_context.time.time", return_value=stored_at + 700):
+        assert context.lookup("cat") is not None
+        assert context.lookup("another") is None
+
+def test_oldest_sentences_are_dropped(context):
+    for i in range(3):
+        context.remember(f"Sentence {i}.", [WordData(f"word{i}", "")], "")
+
+    assert list(context.store) == ["Sentence 0.", "Sentence 1.", "Sentence 2."]
+    assert context.lookup("cat") is None
+
+def test_sentences_without_words_are_not_stored(context):
+    context.remember("Nothing here.", [], "")
+
+    assert "Nothing here." not in context.store
+
+def test_context_is_shared_through_the_shared_cache(tmp_path):
+    path = str(tmp_path / "shared.db")
+    LookupContext(SharedCache(path).mapping("context", 10, codec="json")).remember(SENTENCE, WORDS, "")
+
+    other_worker = LookupContext(SharedCache(path).mapping("context", 10, codec="json"))
+
+    assert other_worker.lookup("dogs").term == "Dogs"
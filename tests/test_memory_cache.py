@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from core.memory_cache import CompressedCache
+
+PAGE = "<html>" + "<p>shared template</p>" * 50 + "{}</html>"
+
+
+def page(i: int) -> str:
+    # Incompressible per-page content, so every entry has about the same resident size
+    return PAGE.format(os.urandom(200).hex() + str(i))
+
+def entry_size(cache: CompressedCache, key: str) -> int:
+    return CompressedCache._entry_size(key, cache._entries[key])
+
+
+def test_values_round_trip():
+    cache = CompressedCache(1 << 20)
+    cache["a"] = "日本語のページ"
+
+    assert cache["a"] == "日本語のページ"
+    assert "a" in cache
+    assert cache.get("missing") is None
+
+def test_resident_bytes_stay_within_the_budget():
+    cache = CompressedCache(4000)
+    for i in range(50):
+        cache[str(i)] = page(i)
+
+    assert cache.resident_bytes <= cache.max_bytes
+    assert cache.resident_bytes == sum(entry_size(cache, key) for key in cache)
+    assert cache.evictions == 50 - len(cache)
+    assert "49" in cache
+
+def test_least_recently_read_entry_is_evicted_first():
+    cache = CompressedCache(1 << 20)
+    for i in range(3):
+        cache[str(i)] = page(i)
+    cache["0"]
+    cache.max_bytes = cache.resident_bytes + 100  # Room for three pages, whatever their exact compressed sizes
+
+    cache["3"] = page(3)
+
+    assert list(cache) == ["2", "0", "3"]
+
+def test_replacing_and_deleting_keep_the_counts():
+    cache = CompressedCache(1 << 20)
+    cache["a"] = page(0)
+    cache["a"] = "short"
+    del cache["a"]
+
+    assert (len(cache), cache.resident_bytes, cache.raw_bytes) == (0, 0, 0)
+    with pytest.raises(KeyError):
+        del cache["a"]
+
+def test_value_larger_than_the_budget_is_not_stored():
+    cache = CompressedCache(1000)
+    cache["small"] = "x"
+
+    cache["big"] = os.urandom(2000).hex()
+
+    assert list(cache) == ["small"]
+    assert cache.evictions == 0
+
+def test_raw_bytes_count_utf8_bytes():
+    cache = CompressedCache(1 << 20)
+    cache["a"] = "汉字"
+
+    assert cache.raw_bytes == 6
+
+def test_shared_dictionary_shrinks_entries():
+    plain = CompressedCache(1 << 20)
+    primed = CompressedCache(1 << 20, zdict=PAGE.encode("utf-8"))
+    value = PAGE.format("specific")
+    plain["a"] = primed["a"] = value
+
+    assert primed["a"] == value
+    assert primed.resident_bytes < plain.resident_bytes
+    assert primed.stats()["compressionRatio"] > plain.stats()["compressionRatio"]
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from core.services.translation_service import TranslationService
+from core.translation_memory import TranslationMemory
+
+SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "She sells sea shells by the sea shore every summer.",
+    "Our meeting has been moved to Thursday afternoon.",
+    "Please remember to water the plants while I am away.",
+]
+
+
+@pytest.fixture
+def memory() -> TranslationMemory:
+    memory = TranslationMemory(threshold=0.7)
+    for sentence in SENTENCES:
+        memory.add(sentence)
+    return memory
+
+
+def test_near_duplicate_is_recalled(memory):
+    match = memory.query("The quick brown fox jumped over the lazy dog!")
+
+    assert match is not None
+    assert match[0] == SENTENCES[0]
+    assert 0.7 <= match[1] < 1
+
+def test_unrelated_sentence_is_not_recalled(memory):
+    assert memory.query("Stock prices fell sharply after the announcement.") is None
+    assert memory.stats()["queries"] == 1
+    assert memory.stats()["hits"] == 0
+
+def test_a_sentence_does_not_match_itself(memory):
+    assert memory.query(SENTENCES[1]) is None
+
+def test_recall_finds_near_duplicates_among_many_sentences():
+    memory = TranslationMemory(threshold=0.7)
+    sentences = [f"Item number {i} was shipped to customer {i * 7919 % 10007} on day {i % 365}." for i in range(2000)]
+    for sentence in sentences:
+        memory.add(sentence)
+
+    queries = sentences[::100]
+    matches = [memory.query(sentence.replace("was shipped", "got shipped")) for sentence in queries]
+
+    assert [match and match[0] for match in matches] == queries
+
+def test_oldest_entries_are_evicted():
+    memory = TranslationMemory(max_entries=2)
+    for sentence in SENTENCES[:3]:
+        memory.add(sentence)
+
+    assert memory.stats()["entries"] == 2
+    assert memory.query(SENTENCES[0].replace("quick", "quik")) is None
+    assert memory.query(SENTENCES[2].replace("moved", "moving")) is not None
+    assert sum(len(bucket) for buckets in memory._buckets for bucket in buckets.values()) == 2 * memory.bands
+
+def test_discard_removes_the_sentence(memory):
+    memory.discard(SENTENCES[0])
+
+    assert memory.query("The quick brown fox jumped over the lazy dog!") is None
+
+def test_short_texts_get_equal_signatures_only_when_equal():
+    memory = TranslationMemory()
+
+    assert memory.signature("cat") == memory.signature("CAT")
+    assert memory.signature("cat") != memory.signature("cap")
+
+def test_signatures_do_not_depend_on_the_hash_seed():
+    script = "from core.translation_memory import TranslationMemory; print(list(TranslationMemory().signature('a stable sentence')))"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    outputs = {
+        subprocess.run([sys.executable, "-c", script], cwd=root, env=dict(os.environ, PYTHONHASHSEED=seed),
+                       capture_output=True, text=True, check=True).stdout
+        for seed in ("1", "2")
+    }
+
+    assert len(outputs) == 1
+
+@pytest.fixture
+def service(config, provider) -> TranslationService:
+    config._set_config_value("translation_memory", "enabled", "true")
+    return TranslationService(config)
+
+def test_analysis_is_recalled_from_a_near_duplicate(service, provider):
+    asyncio.run(service.get_analysis_data(SENTENCES[0]))
+    provider.calls.clear()
+
+    data, _ = asyncio.run(service.get_analysis_data("The quick brown fox jumped over the lazy dog!"))
+
+    assert data == {"Words": [{"word": "The", "definition": "d"}]}
+    assert provider.calls == []
+
+def test_near_duplicate_without_shared_words_is_a_miss(service, provider):
+    asyncio.run(service.get_analysis_data("Quickly the brown fox jumps over the lazy dog."))
+    provider.calls.clear()
+    text = "Slowly the brown fox jumps over the lazy dog."
+    assert service.translation_memory.query(text) is not None
+
+    data, _ = asyncio.run(service.get_analysis_data(text))
+
+    assert data == {"Words": [{"word": "Slowly", "definition": "d"}]}
+    assert provider.calls == [text]
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from core.errors import IncompleteResultError
+from core.services.translation_service import TranslationService, merge_sentence_analyses, merge_sentence_translations
+
+TEXT = "The sun rose. Birds sang loudly. We left early."
+
+
+@pytest.fixture
+def service(config, provider) -> TranslationService:
+    return TranslationService(config)
+
+
+def test_translation_runs_once_per_sentence_and_merges(service, provider):
+    data, _ = asyncio.run(service.get_translation_data(TEXT))
+
+    assert data == {"Translation": "T(The sun rose.) T(Birds sang loudly.) T(We left early.)"}
+    assert sorted(provider.calls) == sorted(["The sun rose.", "Birds sang loudly.", "We left early."])
+    assert set(service.result_cache) == {f"generate_translation_prompt:{sentence}" for sentence in provider.calls}
+
+def test_sentences_are_served_from_the_result_cache(service, provider):
+    asyncio.run(service.get_translation_data(TEXT))
+    provider.calls.clear()
+
+    asyncio.run(service.get_translation_data("Birds sang loudly. A new one."))
+
+    assert provider.calls == ["A new one."]
+
+def test_single_sentence_is_not_split(service, provider):
+    data, _ = asyncio.run(service.get_analysis_data("Hello there."))
+
+    assert data == {"Words": [{"word": "Hello", "definition": "d"}]}
+    assert provider.calls == ["Hello there."]
+
+def test_failed_sentence_raises_with_the_rest_merged(service, provider):
+    provider.fail.add("Birds sang loudly.")
+
+    with pytest.raises(IncompleteResultError) as raised:
+        asyncio.run(service.get_translation_data(TEXT))
+
+    assert raised.value.failed == 1
+    assert raised.value.data == {"Translation": "T(The sun rose.) T(We left early.)"}
+    assert "generate_translation_prompt:Birds sang loudly." not in service.result_cache
+
+def test_retry_after_a_failure_only_asks_for_the_missing_sentence(service, provider):
+    provider.fail.add("Birds sang loudly.")
+    with pytest.raises(IncompleteResultError):
+        asyncio.run(service.get_translation_data(TEXT))
+    provider.calls.clear()
+
+    data, _ = asyncio.run(service.get_translation_data(TEXT))
+
+    assert provider.calls == ["Birds sang loudly."]
+    assert data["Translation"].count("T(") == 3
+
+def test_failed_grammar_check_raises(service, provider):
+    provider.fail.add("Me go home.")
+
+    with pytest.raises(IncompleteResultError) as raised:
+        asyncio.run(service.get_grammar_check_data("Me go home."))
+
+    assert raised.value.data == {}
+
+def test_feature_data_reports_failed_sentences_and_uses_the_given_cache(service, provider):
+    provider.fail.add("We left early.")
+    job_cache = {}
+
+    data, _, usage, failed = asyncio.run(service.get_feature_data("analysis", TEXT, job_cache))
+
+    assert failed == 1
+    assert [word["word"] for word in data["Words"]] == ["The", "Birds"]
+    assert usage["prompt_tokens"] == 20  # Failed calls report no usage
+    assert len(job_cache) == 2
+    assert not service.result_cache
+
+def test_merge_sentence_translations_spaces_only_between_ascii():
+    assert merge_sentence_translations([{"Translation": "Hi."}, {}, {"Translation": "Bye."}]) == {"Translation": "Hi. Bye."}
+    assert merge_sentence_translations([{"Translation": "你好。"}, {"Translation": "再见。"}]) == {"Translation": "你好。再见。"}
+    assert merge_sentence_translations([{}, {}]) == {}
+
+def test_merge_sentence_analyses_drops_repeated_words():
+    merged = merge_sentence_analyses([
+        {"Words": [{"word": "Run", "definition": "a"}]},
+        {"Words": [{"word": "run", "definition": "b"}, {"word": "fast", "definition": "c"}]},
+    ])
+
+    assert merged == {"Words": [{"word": "Run", "definition": "a"}, {"word": "fast", "definition": "c"}]}
@@ -0,0 +1,68 @@
+import random
+from collections import Counter
+
+import pytest
+
+from core.html_generator import WordData
+from core.services.vocabulary_store import BLOCK_DAYS, DAY_SECONDS, VocabularyStore
+
+START = 20000 * DAY_SECONDS  # A block boundary is every BLOCK_DAYS days from day 0
+
+
+@pytest.fixture
+def store(tmp_path) -> VocabularyStore:
+    return VocabularyStore(str(tmp_path / "vocabulary.db"))
+
+def record(store: VocabularyStore, day: float, *words: str, sentence: str = "A sentence.", translation: str = ""):
+    store.record([WordData(word, f"def of {word}") for word in words], sentence, translation, START + day * DAY_SECONDS)
+
+
+def test_words_are_counted_case_insensitively(store):
+    record(store, 0, "Apple", "pear")
+    record(store, 1, "apple", sentence="Another sentence.", translation="Une autre phrase.")
+    store.flush()
+
+    top = store.top_words()
+
+    assert [(entry["word"], entry["lookupCount"]) for entry in top] == [("Apple", 2), ("pear", 1)]
+    assert top[0]["sentence"] == "Another sentence."
+    assert top[0]["translation"] == "Une autre phrase."
+    assert top[0]["firstSeen"] == START
+
+def test_history_is_newest_first(store):
+    record(store, 0, "apple", sentence="First.")
+    record(store, 2, "apple", sentence="Second.")
+    store.flush()
+
+    assert [entry["sentence"] for entry in store.history("APPLE")] == ["Second.", "First."]
+    assert store.history("apple", limit=1, offset=1)[0]["sentence"] == "First."
+
+def test_empty_translation_keeps_the_stored_one(store):
+    record(store, 0, "apple", translation="Une pomme.")
+    record(store, 1, "apple")
+    store.flush()
+
+    assert store.entries(["apple", "unknown"])[0]["translation"] == "Une pomme."
+
+def test_period_counts_match_the_individual_lookups(store):
+    rng = random.Random(7)
+    lookups = [(rng.randrange(3 * BLOCK_DAYS), rng.choice("abcdefgh")) for _ in range(600)]
+    for day, word in lookups:
+        record(store, day + rng.random(), word)
+    store.flush()
+
+    # Periods inside one block, across one boundary, and spanning whole blocks
+    for first, last in [(3, 10), (BLOCK_DAYS - 2, BLOCK_DAYS + 2), (0, BLOCK_DAYS - 1), (5, 3 * BLOCK_DAYS - 1), (0, 3 * BLOCK_DAYS)]:
+        expected = Counter(word for day, word in lookups if first <= day <= last)
+        top = store.top_words(START + first * DAY_SECONDS, START + last * DAY_SECONDS + 1, limit=10)
+        assert {entry["word"]: entry["periodCount"] for entry in top} == dict(expected), (first, last)
+
+def test_top_words_pages_after_exclusions(store):
+    for count, word in enumerate(["a", "b", "c", "d"], start=1):
+        for _ in range(count):
+            record(store, 0, word)
+    store.flush()
+
+    top = store.top_words(START, START, limit=2, offset=1, exclude=lambda word: word == "c")
+
+    assert [entry["word"] for entry in top] == ["b", "a"]
@@ -0,0 +1,45 @@
+import argparse
+import time
+from core.config import load_config
+from core.cache import CacheManager
+from core.services.translation_service import TranslationService
+from core.services.job_service import JobManager, DEFAULT_JOB_FEATURES
+
+PROGRESS_INTERVAL = 1.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs a whole document through LinguaBoost and writes the results as JSONL.")
+    parser.add_argument("document", nargs="?", help="Path to a UTF-8 text document.")
+    parser.add_argument("--features", default=",".join(DEFAULT_JOB_FEATURES), help="Comma-separated features: translation, analysis, grammar_check.")
+    parser.add_argument("--resume", metavar="JOB_ID", help="Resume a paused or interrupted job from its checkpoint.")
+    args = parser.parse_args()
+    if not args.document and not args.resume:
+        parser.error("either a document or --resume JOB_ID is required")
+
+    cache_manager = CacheManager()
+    config, _ = load_config(cache_manager)
+    job_manager = JobManager(config, TranslationService(config))
+
+    if args.resume:
+        job = job_manager.resume(args.resume)
+    else:
+        with open(args.document, "r", encoding="utf-8") as f:
+            job = job_manager.submit(f.read(), [feature.strip() for feature in args.features.split(",")])
+    print(f"Job {job.job_id} -> {job.output_path}")
+    if job.owner_pid is not None and not job.is_running:
+        print(f"Job {job.job_id} is running in process {job.owner_pid}; the resume request was passed on to it.")
+
+    try:
+        while job.is_running:
+            progress = job.progress()
+            print(f"\r{progress['completed']}/{progress['total']} ({progress['percent']}%) tokens={progress['tokens']['prompt_tokens'] + progress['tokens']['completion_tokens']} cached={progress['tokens']['cached_tokens']}", end="", flush=True)
+            time.sleep(PROGRESS_INTERVAL)
+    except KeyboardInterrupt:
+        job.pause()
+        print(f"\nPaused. Resume with: python translate_document.py --resume {job.job_id}")
+    finally:
+        job_manager.shutdown()
+    print(f"\n{job.progress()}")
+
+if __name__ == "__main__":
+    main()